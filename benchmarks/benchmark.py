@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+
+"""
+Goal:
+  * Track the performance of the client hot paths,
+    so regressions show up before a release.
+
+How to:
+  * `python benchmarks/benchmark.py --output results.json`
+  * `python benchmarks/benchmark.py --baseline results.json`
+    compares the median time per operation against an earlier run
+    and exits with 1 if one got slower by more than `--threshold`.
+  * All requests go to a local `xmrto_simulator`, started on a free port.
+  * Benchmarks:
+    - connection_request: `XmrtoConnection._request()` round trip,
+      session_get the plain `requests` round trip it adds overhead to.
+    - decode_*: `CreateOrder.get()`, `OrderStatus.get()`, `CheckPrice.get()`.
+    - order_status_to_json, order_status_str: `XmrtoOrderStatus` serialization.
+    - follow_order: polls per second while following an order.
+    - quote_50: `QuoteEngine.quote()` for 50 amounts from one fetched rate.
+    - import, cli_help: cold import and `bin/xmrto_wrapper --help` startup.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess  # nosec
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from xmrto_wrapper._version import __version__  # noqa: E402
+from xmrto_wrapper.xmrto_metrics import MetricsRegistry  # noqa: E402
+from xmrto_wrapper.xmrto_quote import QuoteEngine  # noqa: E402
+from xmrto_wrapper.xmrto_simulator import (  # noqa: E402
+    SimulatorConfig,
+    start_simulator,
+)
+from xmrto_wrapper.xmrto_wrapper import (  # noqa: E402
+    API_VERSIONS,
+    CheckPrice,
+    CreateOrder,
+    OrderStatus,
+    PollingPolicy,
+    XmrtoConnection,
+    XmrtoOrderStatus,
+    follow_order,
+)
+
+ROUNDS = 5
+THRESHOLD = 0.2
+
+CREATE_ORDER_RESPONSE = {
+    "uuid": "xmrto-bench1",
+    "state": "TO_BE_CREATED",
+    "btc_dest_address": "3EktnHQD7RiAE6uzMj2ZifT9YgRrkSgzQX",
+    "btc_amount": "0.01000000",
+    "uses_lightning": False,
+}
+ORDER_STATUS_RESPONSE = {
+    "uuid": "xmrto-bench1",
+    "state": "PAID_UNCONFIRMED",
+    "btc_amount": "0.01000000",
+    "btc_amount_partial": "0",
+    "btc_dest_address": "3EktnHQD7RiAE6uzMj2ZifT9YgRrkSgzQX",
+    "created_at": "2020-12-04T12:00:00Z",
+    "incoming_price_btc": "0.0075",
+    "receiving_subaddress": "8" + "4" * 94,
+    "incoming_amount_total": "1.3334",
+    "remaining_amount_incoming": "0",
+    "incoming_num_confirmations_remaining": 3,
+    "seconds_till_timeout": None,
+    "uses_lightning": False,
+    "payments": [],
+}
+CHECK_PRICE_RESPONSE = {
+    "btc_amount": "0.01000000",
+    "incoming_amount_total": "1.3334",
+    "incoming_num_confirmations_remaining": 0,
+    "incoming_price_btc": "0.0075",
+}
+
+
+def measure(func, rounds: int = ROUNDS, warmup: int = 1):
+    """Seconds per operation, one sample per round.
+
+    :param func: Runs one round, returns the number of operations done.
+    """
+
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    operations = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        done = func()
+        elapsed = time.perf_counter() - start
+        operations += done
+        samples.append(elapsed / done)
+
+    return {
+        "unit": "s/op",
+        "rounds": rounds,
+        "operations": operations,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if rounds > 1 else 0.0,
+    }
+
+
+def repeat(func, number):
+    def round_():
+        for _ in range(number):
+            func()
+        return number
+
+    return round_
+
+
+def run_process(*args):
+    def round_():
+        subprocess.run(  # nosec
+            [sys.executable, *args],
+            cwd=ROOT,
+            env=dict(os.environ, PYTHONPATH=ROOT),
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        return 1
+
+    return round_
+
+
+def bench_connection(url, rounds):
+    connection = XmrtoConnection(url=url, metrics=MetricsRegistry())
+    parameters_url = f"{url}/api/v3/xmr2btc/order_parameter_query/"
+    session = connection.get_connection()
+
+    return {
+        "connection_request": measure(
+            repeat(
+                lambda: connection._request(
+                    url=parameters_url, func=connection._get
+                ),
+                200,
+            ),
+            rounds=rounds,
+        ),
+        "session_get": measure(
+            repeat(lambda: session.get(parameters_url).json(), 200),
+            rounds=rounds,
+        ),
+    }
+
+
+def bench_decoders(rounds):
+    api = API_VERSIONS.v3
+    return {
+        "decode_create_order": measure(
+            repeat(lambda: CreateOrder.get(CREATE_ORDER_RESPONSE, api), 20000),
+            rounds=rounds,
+        ),
+        "decode_order_status": measure(
+            repeat(lambda: OrderStatus.get(ORDER_STATUS_RESPONSE, api), 20000),
+            rounds=rounds,
+        ),
+        "decode_check_price": measure(
+            repeat(lambda: CheckPrice.get(CHECK_PRICE_RESPONSE, api), 20000),
+            rounds=rounds,
+        ),
+    }
+
+
+def bench_serialization(url, rounds):
+    order_status = XmrtoOrderStatus(url=url, uuid="xmrto-bench1")
+    order_status.order_status, _ = OrderStatus.get(
+        ORDER_STATUS_RESPONSE, API_VERSIONS.v3
+    )
+    for name, value in vars(order_status.order_status).items():
+        if hasattr(order_status, name):
+            setattr(order_status, name, value)
+
+    return {
+        "order_status_to_json": measure(
+            repeat(order_status._to_json, 20000), rounds=rounds
+        ),
+        "order_status_str": measure(
+            repeat(order_status.__str__, 20000), rounds=rounds
+        ),
+    }
+
+
+def bench_quote(url, rounds):
+    engine = QuoteEngine(url=url, ttl=3600)
+    amounts = [i / 1000 for i in range(1, 51)]
+
+    return {
+        "quote_50": measure(
+            repeat(lambda: engine.quote(amounts), 200), rounds=rounds
+        ),
+    }
+
+
+def bench_follow_order(rounds):
+    """Polls per second, following orders that time out after a second."""
+
+    server, url = start_simulator(
+        SimulatorConfig(create_delay=0, order_timeout=1, pay_probability=0)
+    )
+    session = XmrtoConnection(url=url).get_connection()
+    polling_policy = PollingPolicy(interval=0, max_interval=0, timeout_grace=0)
+
+    def round_():
+        order_status = XmrtoOrderStatus(url=url, connection=session)
+        response, _ = order_status.xmrto_api.create_order(
+            out_address="3EktnHQD7RiAE6uzMj2ZifT9YgRrkSgzQX", out_amount=0.01
+        )
+        order_status.get_order_status(uuid=response.uuid)
+        polls = server.simulator.get_stats().get("requests_status", 0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            follow_order(
+                order=order_status, follow=True, polling_policy=polling_policy
+            )
+        return server.simulator.get_stats()["requests_status"] - polls
+
+    try:
+        return {"follow_order": measure(round_, rounds=rounds, warmup=0)}
+    finally:
+        server.shutdown()
+
+
+def bench_startup(rounds):
+    return {
+        "import": measure(
+            run_process("-c", "import xmrto_wrapper.xmrto_wrapper"),
+            rounds=rounds,
+        ),
+        "cli_help": measure(
+            run_process("bin/xmrto_wrapper", "--help"), rounds=rounds
+        ),
+    }
+
+
+def run(rounds: int = ROUNDS):
+    server, url = start_simulator()
+    try:
+        benchmarks = bench_connection(url=url, rounds=rounds)
+        benchmarks.update(bench_quote(url=url, rounds=rounds))
+    finally:
+        server.shutdown()
+    benchmarks.update(bench_decoders(rounds=rounds))
+    benchmarks.update(bench_serialization(url=url, rounds=rounds))
+    benchmarks.update(bench_follow_order(rounds=rounds))
+    benchmarks.update(bench_startup(rounds=rounds))
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(results, baseline, threshold: float = THRESHOLD):
+    """Median time per operation relative to the baseline.
+
+    :return: '{name: (baseline, current, ratio, regressed)}'
+    """
+
+    comparison = {}
+    for name, current in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name, None)
+        if previous is None:
+            continue
+        ratio = current["median"] / previous["median"]
+        comparison[name] = (
+            previous["median"],
+            current["median"],
+            ratio,
+            ratio > 1 + threshold,
+        )
+    return comparison
+
+
+def format_seconds(seconds):
+    for unit, factor in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * factor >= 1:
+            return f"{seconds * factor:.2f} {unit}"
+    return f"{seconds * 1e9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the xmrto_wrapper hot paths.",
+        allow_abbrev=False,
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=ROUNDS, help="Samples per benchmark."
+    )
+    parser.add_argument("--output", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Results to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="Slowdown reported as regression, 0.2 is 20%%.",
+    )
+    args = parser.parse_args()
+
+    results = run(rounds=args.rounds)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    comparison = {}
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            comparison = compare(
+                results, json.load(baseline), threshold=args.threshold
+            )
+
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        line = f"{name:<24}{format_seconds(result['median']):>12}/op"
+        if name in comparison:
+            _, _, ratio, regressed = comparison[name]
+            line += f"{ratio:>8.2f}x"
+            if regressed:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,9 +14,10 @@ setup(
     url="https://github.com/monero-ecosystem/xmrto_wrapper",
     download_url=f"https://github.com/monero-ecosystem/xmrto_wrapper/archive/{__version__}.tar.gz",
     install_requires=["requests>=2.23.0"],
+    extras_require={"async": ["aiohttp>=3.6.0"]},
     # py_modules=["xmrto_wrapper"],
     packages=["xmrto_wrapper"],
-    scripts=["bin/xmrto_wrapper"],
+    scripts=["bin/xmrto_wrapper", "bin/xmrto_simulator"],
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
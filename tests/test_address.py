@@ -0,0 +1,256 @@
+import pytest
+
+from xmrto_wrapper.xmrto_address import (
+    BECH32,
+    BECH32M,
+    MAINNET,
+    TESTNET,
+    P2PKH,
+    P2SH,
+    P2WPKH,
+    P2WSH,
+    P2TR,
+    WITNESS_UNKNOWN,
+    decode_base58check,
+    decode_bech32,
+    decode_segwit,
+    parse_address,
+    network_for_url,
+    check_address,
+)
+
+# BIP173, valid bech32 strings.
+VALID_BECH32 = (
+    "A12UEL5L",
+    "a12uel5l",
+    "an83characterlonghumanreadablepartthatcontainsthenumber1andtheexcludedcharactersbio1tt5tgs",
+    "abcdef1qpzry9x8gf2tvdw0s3jn54khce6mua7lmqqqxw",
+    "11qqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqc8247j",
+    "split1checkupstagehandshakeupstreamerranterredcaperred2y9e3w",
+    "?1ezyfcl",
+)
+
+# BIP350, valid bech32m strings.
+VALID_BECH32M = (
+    "A1LQFN3A",
+    "a1lqfn3a",
+    "an83characterlonghumanreadablepartthatcontainsthetheexcludedcharactersbioandnumber11sg7hg6",
+    "abcdef1l7aum6echk45nj3s0wdvt2fg8x9yrzpqzd3ryx",
+    "11llllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllllludsr8",
+    "split1checkupstagehandshakeupstreamerranterredcaperredlc445v",
+    "?1v759aa",
+)
+
+# BIP173 and BIP350, invalid bech32 and bech32m strings.
+INVALID_BECH32 = (
+    "\x201nwldj5",
+    "\x7f1axkwrx",
+    "\x801eym55h",
+    "an84characterslonghumanreadablepartthatcontainsthenumber1andtheexcludedcharactersbio1569pvx",
+    "pzry9x0s0muk",
+    "1pzry9x0s0muk",
+    "x1b4n0q5v",
+    "li1dgmt3",
+    "de1lg7wt\xff",
+    "A1G7SGD8",
+    "10a06t8",
+    "1qzzfhee",
+    "\x201xj0phk",
+    "\x7f1g6xzxy",
+    "\x801vctc34",
+    "an84characterslonghumanreadablepartthatcontainsthetheexcludedcharactersbioandnumber11d6pts4",
+    "qyrz8wqd2c9m",
+    "1qyrz8wqd2c9m",
+    "y1b0jsk6g",
+    "lt1igcx5c0",
+    "in1muywd",
+    "mm1crxm3i",
+    "au1s5cgom",
+    "M1VUXWEZ",
+    "16plkw9",
+    "1p2gdwpf",
+)
+
+# BIP350, valid segwit addresses: network, kind, witness version, program.
+VALID_SEGWIT = {
+    "BC1QW508D6QEJXTDG4Y5R3ZARVARY0C5XW7KV8F3T4": (
+        MAINNET,
+        P2WPKH,
+        0,
+        "751e76e8199196d454941c45d1b3a323f1433bd6",
+    ),
+    "tb1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3q0sl5k7": (
+        TESTNET,
+        P2WSH,
+        0,
+        "1863143c14c5166804bd19203356da136c985678cd4d27a1b8c6329604903262",
+    ),
+    "bc1pw508d6qejxtdg4y5r3zarvary0c5xw7kw508d6qejxtdg4y5r3zarvary0c5xw7kt5nd6y": (
+        MAINNET,
+        WITNESS_UNKNOWN,
+        1,
+        "751e76e8199196d454941c45d1b3a323f1433bd6"
+        "751e76e8199196d454941c45d1b3a323f1433bd6",
+    ),
+    "BC1SW50QGDZ25J": (MAINNET, WITNESS_UNKNOWN, 16, "751e"),
+    "bc1zw508d6qejxtdg4y5r3zarvaryvaxxpcs": (
+        MAINNET,
+        WITNESS_UNKNOWN,
+        2,
+        "751e76e8199196d454941c45d1b3a323",
+    ),
+    "tb1qqqqqp399et2xygdj5xreqhjjvcmzhxw4aywxecjdzew6hylgvsesrxh6hy": (
+        TESTNET,
+        P2WSH,
+        0,
+        "000000c4a5cad46221b2a187905e5266362b99d5e91c6ce24d165dab93e86433",
+    ),
+    "tb1pqqqqp399et2xygdj5xreqhjjvcmzhxw4aywxecjdzew6hylgvsesf3hn0c": (
+        TESTNET,
+        P2TR,
+        1,
+        "000000c4a5cad46221b2a187905e5266362b99d5e91c6ce24d165dab93e86433",
+    ),
+    "bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqzk5jj0": (
+        MAINNET,
+        P2TR,
+        1,
+        "79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798",
+    ),
+}
+
+# BIP173 and BIP350, invalid segwit addresses.
+INVALID_SEGWIT = (
+    # bech32 instead of bech32m and the other way round.
+    "bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqh2y7hd",
+    "tb1z0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vqglt7rf",
+    "BC1S0XLXVLHEMJA6C4DQV22UAPCTQUPFHLXM9H8Z3K2E72Q4K9HCZ7VQ54WELL",
+    "bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kemeawh",
+    "tb1q0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vq24jc47",
+    "bc1zw508d6qejxtdg4y5r3zarvaryvg6kdaj",
+    # Invalid character, witness version, program length, case, padding.
+    "bc1p38j9r5y49hruaue7wxjce0updqjuyyx0kh56v8s25huc6995vvpql3jow4",
+    "BC130XLXVLHEMJA6C4DQV22UAPCTQUPFHLXM9H8Z3K2E72Q4K9HCZ7VQ7ZWS8R",
+    "bc1pw5dgrnzv",
+    "bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7v8n0nx0muaewav253zgeav",
+    "BC1QR508D6QEJXTDG4Y5R3ZARVARYV98GJ9P",
+    "tb1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vq47Zagq",
+    "bc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7v07qwwzcrf",
+    "tb1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vpggkg4j",
+    "bc1gmk9yu",
+)
+
+VALID_BASE58 = {
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa": (MAINNET, P2PKH),
+    "1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2": (MAINNET, P2PKH),
+    "3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy": (MAINNET, P2SH),
+    "mipcBbFg9gMiCh81Kj8tqqdgoZub1ZJRfn": (TESTNET, P2PKH),
+    "2MzQwSSnBHWHqSAqtTVQ6v47XtaisrJa1Vc": (TESTNET, P2SH),
+    "2NBaUzuYqJvbThw77QVqq8NEXmkmDmSooy9": (TESTNET, P2SH),
+}
+
+INVALID_BASE58 = (
+    # Checksum.
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNb",
+    "3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLz",
+    # Invalid characters.
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7Divf0a",
+    "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfIa",
+    # Too short.
+    "1111",
+)
+
+
+@pytest.mark.parametrize("string", VALID_BECH32)
+def test_valid_bech32(string):
+    hrp, _, encoding = decode_bech32(string)
+    assert encoding == BECH32
+    assert hrp == string[: string.rfind("1")].lower()
+
+
+@pytest.mark.parametrize("string", VALID_BECH32M)
+def test_valid_bech32m(string):
+    _, _, encoding = decode_bech32(string)
+    assert encoding == BECH32M
+
+
+@pytest.mark.parametrize("string", INVALID_BECH32)
+def test_invalid_bech32(string):
+    with pytest.raises(ValueError):
+        decode_bech32(string)
+
+
+def test_bech32_without_length_limit():
+    string = "lnbc1" + "q" * 100
+    with pytest.raises(ValueError, match="Too long."):
+        decode_bech32(string)
+    with pytest.raises(ValueError, match="Invalid checksum."):
+        decode_bech32(string, max_length=None)
+
+
+@pytest.mark.parametrize("address", sorted(VALID_SEGWIT))
+def test_valid_segwit(address):
+    network, kind, version, program = VALID_SEGWIT[address]
+    _, decoded_version, decoded_program = decode_segwit(address)
+    assert decoded_version == version
+    assert decoded_program.hex() == program
+    btc_address = parse_address(address)
+    assert (btc_address.network, btc_address.kind) == (network, kind)
+    assert check_address(address, network=network) is None
+
+
+@pytest.mark.parametrize("address", INVALID_SEGWIT)
+def test_invalid_segwit(address):
+    with pytest.raises(ValueError):
+        decode_segwit(address)
+    with pytest.raises(ValueError):
+        parse_address(address)
+    assert check_address(address).startswith(f"'{address}' is not a valid")
+
+
+def test_unknown_hrp():
+    address = "tc1p0xlxvlhemja6c4dqv22uapctqupfhlxm9h8z3k2e72q4k9hcz7vq5zuyut"
+    decode_segwit(address)
+    with pytest.raises(ValueError):
+        parse_address(address)
+
+
+@pytest.mark.parametrize("address", sorted(VALID_BASE58))
+def test_valid_base58(address):
+    network, kind = VALID_BASE58[address]
+    btc_address = parse_address(address)
+    assert (btc_address.network, btc_address.kind) == (network, kind)
+    assert len(decode_base58check(address)) == 21
+
+
+@pytest.mark.parametrize("address", INVALID_BASE58)
+def test_invalid_base58(address):
+    with pytest.raises(ValueError):
+        parse_address(address)
+
+
+def test_unknown_base58_version():
+    # A valid base58check string, version 0x80 (a private key, WIF).
+    wif = "5HueCGU8rMjxEXxiPuD5BDku4MkFqeZyd4dZ1jvhTVqvbTLvyTJ"
+    assert len(decode_base58check(wif)) == 33
+    with pytest.raises(ValueError, match="Unknown address version."):
+        parse_address(wif)
+
+
+def test_network():
+    assert network_for_url("https://test.xmr.to") == TESTNET
+    assert network_for_url("https://xmr.to/") == MAINNET
+    assert network_for_url("http://localhost:8000") is None
+
+    mainnet = "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"
+    testnet = "2NBaUzuYqJvbThw77QVqq8NEXmkmDmSooy9"
+    assert check_address(mainnet) is None
+    assert check_address(testnet) is None
+    assert check_address(mainnet, network=MAINNET) is None
+    assert check_address(mainnet, network=TESTNET) == (
+        f"'{mainnet}' is a mainnet address, expected a testnet address."
+    )
+    assert check_address(testnet, network=MAINNET) == (
+        f"'{testnet}' is a testnet address, expected a mainnet address."
+    )
+    assert check_address("").endswith("No address.")
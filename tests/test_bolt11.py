@@ -0,0 +1,172 @@
+from decimal import Decimal
+
+import pytest
+
+from xmrto_wrapper.xmrto_address import (
+    BECH32_CHARSET,
+    BECH32_CONSTANTS,
+    BECH32,
+    BECH32M,
+    MAINNET,
+    TESTNET,
+    _bech32_hrp_expand,
+    _bech32_polymod,
+    decode_bech32,
+)
+from xmrto_wrapper.xmrto_bolt11 import (
+    decode_invoice,
+    check_invoice,
+    invoice_hash,
+)
+
+# BOLT11 test vectors.
+DONATION = (
+    "lnbc1pvjluezsp5zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zygspp5qqqsyqcyq5rqwzqfqqqsyqcyq5rqwzqfqqqsyqcyq5rqwzqfqypq"
+    "dpl2pkx2ctnv5sxxmmwwd5kgetjypeh2ursdae8g6twvus8g6rfwvs8qun0dfjkxaq9qrsgq357wnc5r2ueh7ck6q93dj32dlqnls087fxdwk8qakdyafkq3y"
+    "ap9us6v52vjjsrvywa6rt52cm9r9zqt8r2t7mlcwspyetp5h2tztugp9lfyql"
+)
+COFFEE = (
+    "lnbc2500u1pvjluezsp5zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zygspp5qqqsyqcyq5rqwzqfqqqsyqcyq5rqwzqfqqqsyqcyq5rqwzq"
+    "fqypqdq5xysxxatsyp3k7enxv4jsxqzpu9qrsgquk0rl77nj30yxdy8j9vdx85fkpmdla2087ne0xh8nhedh8w27kyke0lp53ut353s06fv3qfegext0eh0y"
+    "mjpf39tuven09sam30g4vgpfna3rh"
+)
+TESTNET_FALLBACK = (
+    "lntb20m1pvjluezsp5zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zyg3zygshp58yjmdan79s6qqdhdzgynm4zwqd5d7xmw5fk98klysy043l2a"
+    "hrqspp5qqqsyqcyq5rqwzqfqqqsyqcyq5rqwzqfqqqsyqcyq5rqwzqfqypqfpp3x9et2e20v6pu37c5d9vax37wxq72un989qrsgqdj545axuxtnfemtpwkc4"
+    "5hx9d2ft7x04mt8q7y6t0k2dge9e7h8kpy9p34ytyslj3yu569aalz2xdk8xkd7ltxqld94u8h2esmsmacgpghe9k8"
+)
+# Before payment secrets were added to the examples.
+COFFEE_WITHOUT_SECRET = (
+    "lnbc2500u1pvjluezpp5qqqsyqcyq5rqwzqfqqqsyqcyq5rqwzqfqqqsyqcyq5rqwzqfqypqdq5xysxxatsyp3k7enxv4jsxqzpuaztrnwngzn3kdzw5hyd"
+    "lzf03qdgm2hdq27cqv3agm2awhz5se903vruatfhq77w3ls4evs3ch9zw97j25emudupq63nyw24cg27h2rspfj9srp"
+)
+TIMESTAMP = 1496314658
+PAYMENT_HASH = (
+    "0001020304050607080900010203040506070809000102030405060708090102"
+)
+
+
+def encode_bech32(hrp, data, encoding=BECH32):
+    """'hrp' and 5 bit 'data' with a valid checksum."""
+
+    constant = {name: value for value, name in BECH32_CONSTANTS.items()}
+    values = _bech32_hrp_expand(hrp) + data
+    polymod = _bech32_polymod(values + [0] * 6) ^ constant[encoding]
+    checksum = [(polymod >> 5 * (5 - index)) & 31 for index in range(6)]
+    return hrp + "1" + "".join(BECH32_CHARSET[d] for d in data + checksum)
+
+
+def reencode(invoice, hrp=None, data=None, encoding=BECH32):
+    """'invoice' with another human readable part or data."""
+
+    decoded_hrp, decoded_data, _ = decode_bech32(invoice, max_length=None)
+    return encode_bech32(
+        hrp or decoded_hrp,
+        decoded_data if data is None else data,
+        encoding=encoding,
+    )
+
+
+def test_donation():
+    invoice = decode_invoice(DONATION)
+    assert invoice.network == MAINNET
+    assert invoice.amount is None
+    assert invoice.timestamp == TIMESTAMP
+    assert invoice.expiry == 3600
+    assert invoice.payment_hash == PAYMENT_HASH
+    assert invoice.description == "Please consider supporting this project"
+
+
+def test_coffee():
+    for ln_invoice in (COFFEE, COFFEE_WITHOUT_SECRET):
+        invoice = decode_invoice(ln_invoice)
+        assert invoice.network == MAINNET
+        assert invoice.amount == Decimal("0.0025")
+        assert invoice.timestamp == TIMESTAMP
+        assert invoice.expiry == 60
+        assert invoice.expires_at() == TIMESTAMP + 60
+        assert invoice.payment_hash == PAYMENT_HASH
+        assert invoice.description == "1 cup coffee"
+
+
+def test_testnet():
+    invoice = decode_invoice(TESTNET_FALLBACK)
+    assert invoice.network == TESTNET
+    assert invoice.amount == Decimal("0.02")
+    assert invoice.payment_hash == PAYMENT_HASH
+    assert invoice.description is None
+
+
+def test_prefix_and_case():
+    assert decode_invoice("lightning:" + COFFEE).invoice == COFFEE
+    assert decode_invoice(COFFEE.upper()).payment_hash == PAYMENT_HASH
+    assert invoice_hash(COFFEE) == invoice_hash(f" {COFFEE.upper()}\n")
+    assert invoice_hash(COFFEE) != invoice_hash(DONATION)
+
+
+def test_amounts():
+    for hrp, amount in (
+        ("lnbc1", Decimal(1)),
+        ("lnbc20m", Decimal("0.02")),
+        ("lnbc2500u", Decimal("0.0025")),
+        ("lnbc1000n", Decimal("0.000001")),
+        ("lnbc10p", Decimal("0.00000000001")),
+    ):
+        invoice = decode_invoice(reencode(COFFEE, hrp=hrp))
+        assert invoice.amount == amount
+
+
+@pytest.mark.parametrize(
+    "ln_invoice",
+    (
+        "",
+        # Invalid checksum.
+        COFFEE[:-1] + ("q" if COFFEE[-1] != "q" else "p"),
+        # Mixed case.
+        COFFEE[:10] + COFFEE[10:].upper(),
+        # Unknown currency and multiplier.
+        reencode(COFFEE, hrp="lnxy2500u"),
+        reencode(COFFEE, hrp="lnbc2500x"),
+        # Sub millisatoshi amount.
+        reencode(COFFEE, hrp="lnbc2500000001p"),
+        # bech32m instead of bech32.
+        reencode(COFFEE, encoding=BECH32M),
+        # Too short for timestamp and signature.
+        reencode(COFFEE, data=[0] * 100),
+        # Timestamp and signature only, no payment hash.
+        reencode(COFFEE, data=[0] * (7 + 104)),
+        # Truncated field, a description of 31 values, 2 given.
+        reencode(COFFEE, data=[0] * 7 + [13, 0, 31, 1, 1] + [0] * 104),
+    ),
+)
+def test_invalid(ln_invoice):
+    with pytest.raises(ValueError):
+        decode_invoice(ln_invoice)
+    invoice, error = check_invoice(ln_invoice)
+    assert invoice is None
+    assert error.startswith("Not a valid lightning invoice: ")
+
+
+def test_check_invoice_expiry():
+    invoice, error = check_invoice(COFFEE, now=TIMESTAMP + 59)
+    assert error is None
+    assert invoice.seconds_till_expiry(now=TIMESTAMP + 59) == 1
+
+    invoice, error = check_invoice(COFFEE, now=TIMESTAMP + 60)
+    assert invoice is None
+    assert error.startswith("The invoice expired ")
+    # The spec invoices expired long ago.
+    assert check_invoice(DONATION)[0] is None
+
+
+def test_check_invoice_network():
+    now = TIMESTAMP + 1
+    assert check_invoice(COFFEE, network=MAINNET, now=now)[1] is None
+    assert check_invoice(TESTNET_FALLBACK, network=TESTNET, now=now)[1] is None
+    assert check_invoice(COFFEE, network=None, now=now)[1] is None
+
+    invoice, error = check_invoice(COFFEE, network=TESTNET, now=now)
+    assert invoice is None
+    assert error == "A mainnet invoice, expected a testnet invoice."
+    invoice, error = check_invoice(TESTNET_FALLBACK, network=MAINNET, now=now)
+    assert error == "A testnet invoice, expected a mainnet invoice."
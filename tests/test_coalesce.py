@@ -0,0 +1,183 @@
+import asyncio
+from concurrent import futures
+
+import pytest
+
+from xmrto_wrapper.xmrto_async import AsyncXmrtoApi, AsyncXmrtoConnection
+from xmrto_wrapper.xmrto_simulator import SimulatorConfig, start_simulator
+from xmrto_wrapper.xmrto_wrapper import XmrtoApi, XmrtoConnection
+
+OUT_ADDRESS = "3EktnHQD7RiAE6uzMj2ZifT9YgRrkSgzQX"
+CALLS = 8
+
+
+@pytest.fixture
+def simulator():
+    server, url = start_simulator(SimulatorConfig(create_delay=0, latency=0.5))
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def create_order(server):
+    _, order = server.simulator.create_order(
+        {"btc_dest_address": OUT_ADDRESS, "btc_amount": "0.01"}
+    )
+    return order["uuid"]
+
+
+def endpoint(url, name):
+    return url + getattr(XmrtoApi, name).format(api_version="v3")
+
+
+def requests_made(server, endpoint_name):
+    return server.simulator.get_stats().get(f"requests_{endpoint_name}", 0)
+
+
+def concurrently(func, calls=CALLS):
+    with futures.ThreadPoolExecutor(max_workers=calls) as executor:
+        return list(executor.map(lambda _: func(), range(calls)))
+
+
+def test_identical_requests_are_coalesced(simulator):
+    server, url = simulator
+    uuid = create_order(server)
+    connection = XmrtoConnection(url=url)
+    status_url = endpoint(url, "ORDER_STATUS_ENDPOINT")
+
+    results = concurrently(
+        lambda: connection.post(
+            url=status_url, postdata={"uuid": uuid}, coalesce=True
+        )
+    )
+
+    assert requests_made(server, "status") == 1
+    assert all(result["uuid"] == uuid for result in results)
+    # Every caller gets its own copy.
+    assert len({id(result) for result in results}) == CALLS
+    results[0]["state"] = "CHANGED"
+    assert results[1]["state"] == "UNPAID"
+
+
+def test_requests_are_not_coalesced_by_default(simulator):
+    server, url = simulator
+    uuid = create_order(server)
+    connection = XmrtoConnection(url=url)
+    status_url = endpoint(url, "ORDER_STATUS_ENDPOINT")
+
+    concurrently(
+        lambda: connection.post(url=status_url, postdata={"uuid": uuid})
+    )
+
+    assert requests_made(server, "status") == CALLS
+
+
+def test_orders_are_not_coalesced(simulator):
+    server, url = simulator
+    xmrto_api = XmrtoApi(url=url)
+    create = xmrto_api._create_order_request(
+        out_address=OUT_ADDRESS, out_amount="0.01"
+    )[0]
+
+    results = concurrently(lambda: xmrto_api._send(create), calls=4)
+
+    assert requests_made(server, "create") == 4
+    assert len({result["uuid"] for result in results}) == 4
+
+
+def test_different_requests_are_not_coalesced(simulator):
+    server, url = simulator
+    uuids = [create_order(server) for _ in range(CALLS)]
+    connection = XmrtoConnection(url=url)
+    status_url = endpoint(url, "ORDER_STATUS_ENDPOINT")
+
+    with futures.ThreadPoolExecutor(max_workers=CALLS) as executor:
+        results = list(
+            executor.map(
+                lambda uuid: connection.post(
+                    url=status_url, postdata={"uuid": uuid}, coalesce=True
+                ),
+                uuids,
+            )
+        )
+
+    assert requests_made(server, "status") == CALLS
+    assert [result["uuid"] for result in results] == uuids
+
+
+def test_sequential_requests_are_not_coalesced(simulator):
+    server, url = simulator
+    server.simulator.config.latency = 0
+    uuid = create_order(server)
+    connection = XmrtoConnection(url=url)
+    status_url = endpoint(url, "ORDER_STATUS_ENDPOINT")
+
+    for _ in range(3):
+        connection.post(url=status_url, postdata={"uuid": uuid}, coalesce=True)
+
+    assert requests_made(server, "status") == 3
+
+
+def test_async_identical_requests_are_coalesced(simulator):
+    server, url = simulator
+    uuid = create_order(server)
+    status_url = endpoint(url, "ORDER_STATUS_ENDPOINT")
+
+    async def run():
+        async with AsyncXmrtoConnection(url=url) as connection:
+            return await asyncio.gather(
+                *(
+                    connection.post(
+                        url=status_url, postdata={"uuid": uuid}, coalesce=True
+                    )
+                    for _ in range(CALLS)
+                )
+            )
+
+    results = asyncio.run(run())
+
+    assert requests_made(server, "status") == 1
+    assert all(result["uuid"] == uuid for result in results)
+    assert len({id(result) for result in results}) == CALLS
+    results[0]["state"] = "CHANGED"
+    assert results[1]["state"] == "UNPAID"
+
+
+def test_async_orders_are_not_coalesced(simulator):
+    server, url = simulator
+
+    async def run():
+        async with AsyncXmrtoApi(url=url) as xmrto_api:
+            create = xmrto_api._create_order_request(
+                out_address=OUT_ADDRESS, out_amount="0.01"
+            )[0]
+            return await asyncio.gather(
+                *(xmrto_api._send(create) for _ in range(4))
+            )
+
+    results = asyncio.run(run())
+
+    assert requests_made(server, "create") == 4
+    assert len({result["uuid"] for result in results}) == 4
+
+
+def test_async_cancelled_leader_does_not_cancel_followers(simulator):
+    server, url = simulator
+    uuid = create_order(server)
+
+    async def run():
+        async with AsyncXmrtoApi(url=url) as api:
+            leader = asyncio.ensure_future(api.order_status(uuid=uuid))
+            await asyncio.sleep(0.1)
+            follower = asyncio.ensure_future(api.order_status(uuid=uuid))
+            await asyncio.sleep(0.1)
+            leader.cancel()
+            result = await follower
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return result
+
+    order_status, error = asyncio.run(run())
+    assert error is None
+    assert order_status.state == "UNPAID"
+    assert server.simulator.get_stats()["requests_status"] == 1
@@ -0,0 +1,63 @@
+from xmrto_wrapper.xmrto_wrapper import check_order_row, read_order_rows
+
+DESTINATION = "3EktnHQD7RiAE6uzMj2ZifT9YgRrkSgzQX"
+
+
+def test_csv_rows():
+    rows = list(
+        read_order_rows(
+            [
+                "\n",
+                "destination,btc_amount\n",
+                f"{DESTINATION},0.01\n",
+                "\n",
+                ",0.02\n",
+                f"{DESTINATION},,\n",
+            ]
+        )
+    )
+    assert [row["line"] for row in rows] == [3, 5, 6]
+    assert rows[0]["destination"] == DESTINATION
+    assert rows[0]["amount"] == "0.01"
+    assert rows[0]["currency"] == "BTC"
+    assert check_order_row(rows[0]) is None
+    assert "Line 5" in check_order_row(rows[1])["error_msg"]
+    assert "Line 6" in check_order_row(rows[2])["error_msg"]
+
+
+def test_csv_amount_and_currency():
+    rows = list(
+        read_order_rows(
+            ["destination,amount,currency\n", f"{DESTINATION},1.5,xmr\n"]
+        )
+    )
+    assert rows[0]["amount"] == "1.5"
+    assert rows[0]["currency"] == "XMR"
+
+
+def test_ndjson_rows():
+    rows = list(
+        read_order_rows(
+            [
+                "\n",
+                f'{{"destination": "{DESTINATION}", "xmr_amount": 2}}\n',
+                "\n",
+                "\n",
+                '{"btc_amount": "0.01"}\n',
+                "{invalid\n",
+                "[]\n",
+            ]
+        )
+    )
+    assert [row["line"] for row in rows] == [2, 5, 6, 7]
+    assert rows[0]["amount"] == "2"
+    assert rows[0]["currency"] == "XMR"
+    assert "Line 5" in check_order_row(rows[1])["error_msg"]
+    assert check_order_row(rows[2])["error"] == "Invalid JSON."
+    assert "Line 6" in check_order_row(rows[2])["error_msg"]
+    assert "Line 7" in check_order_row(rows[3])["error_msg"]
+
+
+def test_no_rows():
+    assert list(read_order_rows([])) == []
+    assert list(read_order_rows(["\n", "  \n"])) == []
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from xmrto_wrapper.xmrto_wrapper import OrderValidator, ParametersV3
+
+
+def parameters(**kwargs):
+    # As parsed from the API, JSON numbers are floats.
+    values = dict(
+        price=0.0075,
+        lower_limit=0.002,
+        upper_limit=0.5,
+        ln_lower_limit=0.0001,
+        ln_upper_limit=0.04,
+        zero_conf_enabled=True,
+        zero_conf_max_amount=0.1,
+    )
+    values.update(kwargs)
+    result = ParametersV3()
+    for name, value in values.items():
+        setattr(result, name, value)
+    return result
+
+
+def test_to_decimal():
+    assert OrderValidator.to_decimal(0.002) == Decimal("0.002")
+    assert OrderValidator.to_decimal("0.002") == Decimal("0.002")
+    assert OrderValidator.to_decimal(None) is None
+    assert OrderValidator.to_decimal("nan") is None
+    assert OrderValidator.to_decimal("no number") is None
+
+
+def test_limits_are_inclusive():
+    validator = OrderValidator()
+    for amount in (0.002, "0.002", 0.5, "0.5", 0.25):
+        assert validator.check_amount(parameters(), amount) is None
+
+
+def test_outside_limits():
+    validator = OrderValidator()
+    for amount in ("0.00199999", "0.50000001"):
+        error = validator.check_amount(parameters(), amount)
+        assert error["error"] == "Amount out of range."
+        assert error["error_code"] == OrderValidator.ERROR_CODE
+
+
+def test_invalid_amount():
+    validator = OrderValidator()
+    for amount in ("abc", "-1", 0, "inf"):
+        error = validator.check_amount(parameters(), amount)
+        assert error["error"] == "Invalid amount."
+
+
+def test_xmr_amount():
+    validator = OrderValidator()
+    # 0.002 BTC at 0.0075 BTC per XMR.
+    assert validator.check_amount(parameters(), "0.26666667", "XMR") is None
+    error = validator.check_amount(parameters(), "0.26666666", "XMR")
+    assert error["error"] == "Amount out of range."
+
+
+def test_lightning_limits():
+    validator = OrderValidator()
+    assert validator.check_amount(parameters(), 0.0001, lightning=True) is None
+    assert validator.check_amount(parameters(), 0.04, lightning=True) is None
+    error = validator.check_amount(parameters(), 0.05, lightning=True)
+    assert error["error"] == "Amount out of range."
+
+
+def test_missing_limits_are_not_checked():
+    validator = OrderValidator()
+    missing = parameters(ln_lower_limit=None, ln_upper_limit=None)
+    assert validator.check_amount(missing, 5, lightning=True) is None
+    missing = parameters(lower_limit=None)
+    assert validator.check_amount(missing, "0.00000001") is None
+    error = validator.check_amount(missing, 1)
+    assert error["error"] == "Amount out of range."
+    # No rate, XMR amounts cannot be converted.
+    assert validator.check_amount(parameters(price=None), 1, "XMR") is None
+
+
+def test_zero_conf():
+    validator = OrderValidator(zero_conf=True)
+    assert validator.check_amount(parameters(), 0.1) is None
+    error = validator.check_amount(parameters(), "0.10000001")
+    assert error["error"] == "No zero confirmation order."
+    error = validator.check_amount(parameters(zero_conf_enabled=False), 0.1)
+    assert error["error"] == "No zero confirmation order."
+    no_maximum = parameters(zero_conf_max_amount=None)
+    assert validator.check_amount(no_maximum, 0.4) is None
@@ -0,0 +1,27 @@
+import pytest
+
+from xmrto_wrapper.xmrto_price_history import PriceHistory
+from xmrto_wrapper.xmrto_wrapper import PriceV3
+
+
+def price(rate, amount="0.01"):
+    price = PriceV3()
+    price.in_out_rate = rate
+    price.out_amount = amount
+    return price
+
+
+def test_add_price():
+    history = PriceHistory(capacity=4)
+    assert history.add_price(price("0.0075"), timestamp=1.0)
+    assert history.add_price(price(0.008, amount=None), timestamp=2.0)
+    assert history.samples() == [(1.0, 0.0075, 0.01), (2.0, 0.008, 0.0)]
+
+
+@pytest.mark.parametrize("rate", [None, "", "no rate", "nan", "inf"])
+def test_price_without_rate_is_skipped(rate):
+    history = PriceHistory(capacity=4)
+    history.add_price(price("0.0075"), timestamp=1.0)
+    assert not history.add_price(price(rate), timestamp=2.0)
+    assert len(history) == 1
+    assert history.ohlc().close == 0.0075
@@ -0,0 +1,187 @@
+import pytest
+
+from xmrto_wrapper import xmrto_qrcode
+from xmrto_wrapper.xmrto_qrcode import LOW, MEDIUM, QUARTILE, HIGH
+
+LEVELS = (LOW, MEDIUM, QUARTILE, HIGH)
+
+# Format information per level and mask, ISO/IEC 18004 table C.1.
+FORMAT_INFORMATION = {
+    LOW: (
+        "111011111000100",
+        "111001011110011",
+        "111110110101010",
+        "111100010011101",
+        "110011000101111",
+        "110001100011000",
+        "110110001000001",
+        "110100101110110",
+    ),
+    MEDIUM: (
+        "101010000010010",
+        "101000100100101",
+        "101111001111100",
+        "101101101001011",
+        "100010111111001",
+        "100000011001110",
+        "100111110010111",
+        "100101010100000",
+    ),
+    QUARTILE: (
+        "011010101011111",
+        "011000001101000",
+        "011111100110001",
+        "011101000000110",
+        "010010010110100",
+        "010000110000011",
+        "010111011011010",
+        "010101111101101",
+    ),
+    HIGH: (
+        "001011010001001",
+        "001001110111110",
+        "001110011100111",
+        "001100111010000",
+        "000011101100010",
+        "000001001010101",
+        "000110100001100",
+        "000100000111011",
+    ),
+}
+
+# Version information, ISO/IEC 18004 table D.1.
+VERSION_INFORMATION = {
+    7: "000111110010010100",
+    8: "001000010110111100",
+    9: "001001101010011001",
+    10: "001010010011010011",
+    40: "101000110001101001",
+}
+
+# Byte mode capacity per version, ISO/IEC 18004 table 7.
+BYTE_CAPACITY = {
+    1: {LOW: 17, MEDIUM: 14, QUARTILE: 11, HIGH: 7},
+    2: {LOW: 32, MEDIUM: 26, QUARTILE: 20, HIGH: 14},
+    10: {LOW: 271, MEDIUM: 213, QUARTILE: 151, HIGH: 119},
+    27: {LOW: 1465, MEDIUM: 1125, QUARTILE: 805, HIGH: 625},
+    40: {LOW: 2953, MEDIUM: 2331, QUARTILE: 1663, HIGH: 1273},
+}
+
+
+def test_tables_have_a_value_per_version():
+    for table in (
+        xmrto_qrcode.ECC_CODEWORDS_PER_BLOCK,
+        xmrto_qrcode.ECC_BLOCKS,
+    ):
+        for level in LEVELS:
+            assert len(table[level]) == xmrto_qrcode.MAX_VERSION + 1
+
+
+def test_reed_solomon():
+    divisor = xmrto_qrcode._rs_divisor(10)
+    # "01234567", 1-M, ISO/IEC 18004 annex I.
+    data = [0x10, 0x20, 0x0C, 0x56, 0x61, 0x80] + [0xEC, 0x11] * 5
+    assert xmrto_qrcode._rs_remainder(data, divisor) == [
+        0xA5,
+        0x24,
+        0xD4,
+        0xC1,
+        0xED,
+        0x36,
+        0xC7,
+        0x87,
+        0x2C,
+        0x55,
+    ]
+    # "HELLO WORLD", 1-M, thonky.com QR code tutorial.
+    data = [32, 91, 11, 120, 209, 114, 220, 77, 67, 64]
+    data += [236, 17, 236, 17, 236, 17]
+    assert xmrto_qrcode._rs_remainder(data, divisor) == [
+        196,
+        35,
+        39,
+        119,
+        235,
+        215,
+        231,
+        226,
+        93,
+        23,
+    ]
+
+
+def read_format(rows):
+    """Both copies of the format information, most significant bit first."""
+
+    size = len(rows)
+    first = [rows[index][8] for index in range(6)]
+    first += [rows[7][8], rows[8][8], rows[8][7]]
+    first += [rows[8][14 - index] for index in range(9, 15)]
+    second = [rows[8][size - 1 - index] for index in range(8)]
+    second += [rows[size - 15 + index][8] for index in range(8, 15)]
+    return [
+        "".join("1" if dark else "0" for dark in reversed(bits))
+        for bits in (first, second)
+    ]
+
+
+@pytest.mark.parametrize("level", LEVELS)
+def test_format_information(level):
+    for mask, expected in enumerate(FORMAT_INFORMATION[level]):
+        rows = xmrto_qrcode.encode(b"xmr.to", level=level, mask=mask)
+        assert read_format(rows) == [expected, expected]
+
+
+def test_version_information():
+    for version, expected in VERSION_INFORMATION.items():
+        capacity = BYTE_CAPACITY.get(version, {}).get(LOW, None)
+        if capacity is None:
+            # Just too much for the version before.
+            capacity = xmrto_qrcode.data_capacity(version - 1, LOW)
+        rows = xmrto_qrcode.encode(b"a" * capacity, level=LOW)
+        assert len(rows) == version * 4 + 17
+        size = len(rows)
+        bits = [rows[index // 3][size - 11 + index % 3] for index in range(18)]
+        mirrored = [
+            rows[size - 11 + index % 3][index // 3] for index in range(18)
+        ]
+        for read in (bits, mirrored):
+            assert "".join(
+                "1" if dark else "0" for dark in reversed(read)
+            ) == (expected)
+
+
+@pytest.mark.parametrize("version", sorted(BYTE_CAPACITY))
+def test_byte_capacity(version):
+    for level, capacity in BYTE_CAPACITY[version].items():
+        assert xmrto_qrcode.version_for(b"a" * capacity, level) == version
+        if version < xmrto_qrcode.MAX_VERSION:
+            assert (
+                xmrto_qrcode.version_for(b"a" * (capacity + 1), level)
+                > version
+            )
+
+
+def test_too_much_data():
+    with pytest.raises(ValueError):
+        xmrto_qrcode.encode(b"a" * 2954, level=LOW)
+
+
+@pytest.mark.parametrize("level", LEVELS)
+def test_function_patterns(level):
+    for data in (b"", b"xmr.to", bytes(range(256))):
+        rows = xmrto_qrcode.encode(data, level=level)
+        size = len(rows)
+        finder = ["1111111", "1000001", "1011101", "1011101", "1011101"]
+        finder += ["1000001", "1111111"]
+        for x, y in ((0, 0), (size - 7, 0), (0, size - 7)):
+            assert [
+                "".join(
+                    "1" if rows[y + dy][x + dx] else "0" for dx in range(7)
+                )
+                for dy in range(7)
+            ] == finder
+        timing = [rows[6][x] for x in range(8, size - 8)]
+        assert timing == [index % 2 == 0 for index in range(8, size - 8)]
+        # The dark module.
+        assert rows[size - 8][8]
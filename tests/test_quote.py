@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+import pytest
+
+from xmrto_wrapper.xmrto_quote import QuoteEngine
+from xmrto_wrapper.xmrto_wrapper import PriceV3
+
+from .test_order_validator import parameters
+
+
+def quote(amounts, currency="BTC", **kwargs):
+    engine = QuoteEngine(url="http://localhost")
+    return engine._quote(
+        amounts=amounts,
+        currency=currency,
+        rate=Decimal("0.0075"),
+        parameters=parameters(**kwargs),
+        fetched_at=0.0,
+    )
+
+
+def test_zero_conf_maximum_is_inclusive():
+    quotes = quote(["0.1", "0.10000001"])
+    assert quotes.zero_conf == [True, False]
+    assert quotes.errors == [None, None]
+
+
+def test_missing_zero_conf_maximum():
+    quotes = quote(["0.1"], zero_conf_max_amount=None)
+    assert quotes.zero_conf == [False]
+
+
+def test_amounts():
+    quotes = quote(["0.002", "0.001"])
+    assert quotes.out_amounts == [Decimal("0.002"), None]
+    assert quotes.in_amounts == [Decimal("0.2667"), None]
+    assert quotes.errors[1]["error"] == "Amount out of range."
+
+
+class FixedRateApi:
+    """Answers the order parameters and a price at 'rate'."""
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def order_check_parameters(self):
+        return parameters(), None
+
+    def order_check_price(self, btc_amount=None, xmr_amount=None):
+        price = PriceV3()
+        price.in_out_rate = self.rate
+        return price, None
+
+
+def engine(rate):
+    engine = QuoteEngine(url="http://localhost")
+    engine.xmrto_api = FixedRateApi(rate)
+    return engine
+
+
+@pytest.mark.parametrize("rate", [None, 0, "0", "-0.0075", "nan", "no number"])
+def test_invalid_rate(rate):
+    quotes, error = engine(rate).quote(["0.01"])
+    assert quotes is None
+    assert error["error"] == "No rate."
+
+
+def test_rate():
+    quotes, error = engine("0.0075").quote(["0.01"])
+    assert error is None
+    assert quotes.in_out_rate == Decimal("0.0075")
+    assert quotes.in_amounts == [Decimal("1.3334")]
@@ -0,0 +1,189 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from xmrto_wrapper import xmrto_rate_limit
+from xmrto_wrapper.xmrto_rate_limit import (
+    RateLimiter,
+    SharedTokenBucket,
+    TokenBucket,
+    get_shared_rate_limiter,
+)
+
+# 2015-10-21 07:28:00 UTC.
+EPOCH = 1445412480.0
+
+
+class FakeTime:
+    """Stands in for the 'time' module, only 'sleep()' moves it."""
+
+    def __init__(self, now: float = EPOCH):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(xmrto_rate_limit, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "shared"])
+def bucket(request, clock, tmp_path):
+    if request.param == "memory":
+        return TokenBucket(rate=2, burst=3, caller="test")
+    return SharedTokenBucket(
+        path=str(tmp_path / "rate_limit.sqlite"),
+        rate=2,
+        burst=3,
+        caller="test",
+    )
+
+
+def test_burst_then_rate(bucket):
+    assert [bucket.reserve("host") for _ in range(3)] == [0, 0, 0]
+    # Reserved ahead, one token every 0.5 seconds.
+    assert bucket.reserve("host") == pytest.approx(0.5)
+    assert bucket.reserve("host") == pytest.approx(1.0)
+
+
+def test_refill_up_to_burst(bucket, clock):
+    for _ in range(5):
+        bucket.reserve("host")
+    clock.now += 1
+    # 2 tokens owed, 2 refilled.
+    assert bucket.reserve("host") == pytest.approx(0.5)
+    clock.now += 60
+    assert [bucket.reserve("host") for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve("host") == pytest.approx(0.5)
+
+
+def test_keys_are_independent(bucket):
+    for _ in range(3):
+        bucket.reserve("host")
+    assert bucket.reserve("other") == 0
+
+
+def test_block(bucket, clock):
+    bucket.block("host", 5)
+    assert bucket.reserve("host") == pytest.approx(5)
+    clock.now += 2
+    assert bucket.reserve("host") == pytest.approx(3)
+    # A shorter block does not shorten the longer one.
+    bucket.block("host", 1)
+    assert bucket.reserve("host") == pytest.approx(3)
+    assert bucket.reserve("other") == 0
+    clock.now += 3
+    assert bucket.reserve("host") == 0
+
+
+def test_stats(bucket):
+    for _ in range(4):
+        bucket.reserve("host")
+    bucket.block("host", 2)
+    stats = bucket.get_stats()["test"]["host"]
+    assert stats["requests"] == 4
+    assert stats["waited"] == pytest.approx(0.5)
+    assert stats["rate_limited"] == 1
+
+
+def test_shared_bucket_between_instances(clock, tmp_path):
+    path = str(tmp_path / "rate_limit.sqlite")
+    first = SharedTokenBucket(path=path, rate=2, burst=3, caller="first")
+    second = SharedTokenBucket(path=path, rate=2, burst=3, caller="second")
+
+    assert [first.reserve("host") for _ in range(3)] == [0, 0, 0]
+    assert second.reserve("host") == pytest.approx(0.5)
+    first.block("host", 10)
+    assert second.reserve("host") == pytest.approx(10)
+
+    stats = second.get_stats()
+    assert stats["first"]["host"]["requests"] == 3
+    assert stats["first"]["host"]["rate_limited"] == 1
+    assert stats["second"]["host"]["requests"] == 2
+
+
+def test_shared_rate_limiter_per_settings(tmp_path):
+    path = str(tmp_path / "rate_limit.sqlite")
+    rate_limiter = get_shared_rate_limiter(path=path, rate=2, burst=3)
+    assert get_shared_rate_limiter(path=path, rate=2, burst=3) is rate_limiter
+
+    other = get_shared_rate_limiter(path=path, rate=0.5, burst=1)
+    assert other is not rate_limiter
+    assert (other.bucket.rate, other.bucket.burst) == (0.5, 1)
+    assert (rate_limiter.bucket.rate, rate_limiter.bucket.burst) == (2, 3)
+    assert other.bucket.path == rate_limiter.bucket.path == path
+
+
+def test_acquire_sleeps(clock):
+    rate_limiter = RateLimiter(rate=1, burst=1)
+    assert rate_limiter.acquire("host") == 0
+    assert rate_limiter.acquire("host") == pytest.approx(1)
+    assert clock.slept == [pytest.approx(1)]
+
+
+@pytest.mark.parametrize(
+    "attempt, maximum", [(0, 1), (1, 2), (3, 8), (5, 32), (6, 60), (20, 60)]
+)
+def test_backoff_bounds(clock, monkeypatch, attempt, maximum):
+    rate_limiter = RateLimiter(backoff=1, max_backoff=60)
+    for _ in range(100):
+        delay = rate_limiter.rate_limited("host", attempt=attempt)
+        assert 0 <= delay <= maximum
+
+    monkeypatch.setattr(
+        xmrto_rate_limit.random, "uniform", lambda low, high: high
+    )
+    assert rate_limiter.rate_limited("host", attempt=attempt) == maximum
+    assert rate_limiter.reserve("host") == pytest.approx(maximum)
+
+
+def test_retry_after(clock, monkeypatch):
+    monkeypatch.setattr(
+        xmrto_rate_limit.random, "uniform", lambda low, high: high
+    )
+    rate_limiter = RateLimiter(backoff=1, max_backoff=60)
+
+    # 'Retry-After' is a lower bound for the backoff.
+    assert rate_limiter.rate_limited("host", 0, retry_after="30") == 30
+    assert rate_limiter.rate_limited("other", 3, retry_after="2") == 8
+    assert rate_limiter.rate_limited("new", 0, retry_after="invalid") == 1
+    assert rate_limiter.reserve("host") == pytest.approx(30)
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [
+        ("120", 120),
+        ("1.5", 1.5),
+        ("-5", 0),
+        ("0", 0),
+        (None, None),
+        ("", None),
+        ("soon", None),
+        # HTTP dates, relative to 'EPOCH'.
+        ("Wed, 21 Oct 2015 07:30:00 GMT", 120),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0),
+        ("Wed, 21 Oct 2015 07:00:00 GMT", 0),
+    ],
+)
+def test_parse_retry_after(clock, value, seconds):
+    assert RateLimiter.parse_retry_after(value) == seconds
+
+
+def test_parse_retry_after_date(clock):
+    retry_at = datetime.fromtimestamp(EPOCH + 42, tz=timezone.utc)
+    value = format_datetime(retry_at, usegmt=True)
+    assert RateLimiter.parse_retry_after(value) == pytest.approx(42)
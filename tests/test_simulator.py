@@ -0,0 +1,100 @@
+import pytest
+import requests
+
+from xmrto_wrapper.xmrto_simulator import (
+    SimulatorClock,
+    SimulatorConfig,
+    XmrtoSimulator,
+    start_simulator,
+)
+from xmrto_wrapper.xmrto_wrapper import XmrtoOrder
+
+OUT_ADDRESS = "3EktnHQD7RiAE6uzMj2ZifT9YgRrkSgzQX"
+
+
+def simulator(**kwargs):
+    config = SimulatorConfig(**kwargs)
+    # Stopped, only 'advance()' moves it.
+    return XmrtoSimulator(config=config, clock=SimulatorClock(speed=0))
+
+
+def states(simulator, seconds):
+    """The state of a new order after each of 'seconds'."""
+
+    _, order = simulator.create_order(
+        {"btc_dest_address": OUT_ADDRESS, "btc_amount": "0.01"}
+    )
+    result = []
+    for second in seconds:
+        simulator.clock.advance(second)
+        _, status = simulator.order_status({"uuid": order["uuid"]})
+        result.append(status["state"])
+    return result
+
+
+def test_paid_order():
+    states_ = states(simulator(confirmations=0), [0, 2, 30, 5])
+    assert states_ == [
+        XmrtoOrder.TO_BE_CREATED,
+        XmrtoOrder.UNPAID,
+        XmrtoOrder.PAID_UNCONFIRMED,
+        XmrtoOrder.BTC_SENT,
+    ]
+
+
+def test_unpaid_order():
+    states_ = states(simulator(pay_probability=0), [2, 2700])
+    assert states_ == [XmrtoOrder.UNPAID, XmrtoOrder.TIMED_OUT]
+
+
+@pytest.mark.parametrize(
+    "probability, state",
+    [
+        ("flag_probability", XmrtoOrder.FLAGGED_DESTINATION_ADDRESS),
+        ("reject_probability", XmrtoOrder.REJECTED),
+    ],
+)
+def test_rejected_order(probability, state):
+    states_ = states(simulator(**{probability: 1}), [0, 2, 3600])
+    assert states_ == [XmrtoOrder.TO_BE_CREATED, state, state]
+
+
+def test_failed_payment():
+    states_ = states(
+        simulator(confirmations=0, payment_failure_probability=1),
+        [2, 30, 5],
+    )
+    assert states_ == [
+        XmrtoOrder.UNPAID,
+        XmrtoOrder.PAID_UNCONFIRMED,
+        XmrtoOrder.PAYMENT_FAILED,
+    ]
+
+
+def test_purged_order():
+    states_ = states(
+        simulator(pay_probability=0, purge_probability=1), [2, 2700]
+    )
+    assert states_ == [XmrtoOrder.UNPAID, XmrtoOrder.PURGED]
+
+
+@pytest.mark.parametrize("status_code", [403, 429])
+def test_rate_limit_status(status_code):
+    server, url = start_simulator(
+        SimulatorConfig(
+            rate_limit=0.1,
+            rate_burst=1,
+            rate_limit_status=status_code,
+            retry_after=7,
+        )
+    )
+    try:
+        parameters_url = f"{url}/api/v3/xmr2btc/order_parameter_query/"
+        assert requests.get(parameters_url).status_code == 200
+        response = requests.get(parameters_url)
+        assert response.status_code == status_code
+        assert response.headers["Retry-After"] == "7"
+        assert response.json()["error"] == "XMRTO-ERROR-012"
+    finally:
+        server.shutdown()
+        server.server_close()
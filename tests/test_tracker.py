@@ -0,0 +1,229 @@
+import collections
+import threading
+import time
+
+import pytest
+
+from xmrto_wrapper import xmrto_tracker
+from xmrto_wrapper.xmrto_simulator import SimulatorConfig, start_simulator
+from xmrto_wrapper.xmrto_tracker import OrderTracker
+from xmrto_wrapper.xmrto_wrapper import PollingPolicy, XmrtoOrder
+
+OUT_ADDRESS = "3EktnHQD7RiAE6uzMj2ZifT9YgRrkSgzQX"
+# Real seconds between polls, so the tests finish quickly.
+POLLING_POLICY = PollingPolicy(
+    interval=0.01, max_interval=0.05, backoff=2, block_time=0.01
+)
+
+
+@pytest.fixture
+def simulator():
+    """A simulator running 100 times faster than real time."""
+
+    server, url = start_simulator(
+        SimulatorConfig(
+            speed=100,
+            create_delay=0,
+            pay_delay=30,
+            block_time=10,
+            confirmations=2,
+            zero_conf_enabled=False,
+            send_delay=5,
+            order_timeout=100,
+        )
+    )
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def create_order(server, **config):
+    """A new order, created with 'config' changed for it."""
+
+    defaults = {
+        name: getattr(server.simulator.config, name) for name in config
+    }
+    for name, value in config.items():
+        setattr(server.simulator.config, name, value)
+    _, order = server.simulator.create_order(
+        {"btc_dest_address": OUT_ADDRESS, "btc_amount": "0.01"}
+    )
+    for name, value in defaults.items():
+        setattr(server.simulator.config, name, value)
+    return order["uuid"]
+
+
+def count_polls(server):
+    """Times of the status queries received, by uuid."""
+
+    polls = collections.defaultdict(list)
+    order_status = server.simulator.order_status
+
+    def counted(postdata):
+        polls[postdata.get("uuid", None)].append(time.monotonic())
+        return order_status(postdata)
+
+    server.simulator.order_status = counted
+    return polls
+
+
+def stop_after(tracker, seconds):
+    timer = threading.Timer(seconds, tracker.stop)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def test_final_states_leave_the_queue(simulator):
+    server, url = simulator
+    uuids = {
+        XmrtoOrder.BTC_SENT: create_order(server),
+        XmrtoOrder.FLAGGED_DESTINATION_ADDRESS: create_order(
+            server, flag_probability=1
+        ),
+        XmrtoOrder.REJECTED: create_order(server, reject_probability=1),
+        XmrtoOrder.PAYMENT_FAILED: create_order(
+            server, payment_failure_probability=1
+        ),
+        XmrtoOrder.PURGED: create_order(
+            server, pay_probability=0, purge_probability=1
+        ),
+        XmrtoOrder.TIMED_OUT: create_order(server, pay_probability=0),
+    }
+    tracker = OrderTracker(
+        url=url, uuids=uuids.values(), polling_policy=POLLING_POLICY
+    )
+    timer = stop_after(tracker, 10)
+
+    states = collections.defaultdict(list)
+    for transition in tracker:
+        assert transition.error is None
+        states[transition.uuid].append(transition.state)
+    timer.cancel()
+
+    assert len(tracker) == 0
+    assert tracker.get_orders() == {}
+    for state, uuid in uuids.items():
+        assert states[uuid][-1] == state
+    assert states[uuids[XmrtoOrder.BTC_SENT]] == [
+        XmrtoOrder.UNPAID,
+        XmrtoOrder.PAID_UNCONFIRMED,
+        XmrtoOrder.BTC_SENT,
+    ]
+
+
+def test_final_order_is_not_polled_again(simulator):
+    server, url = simulator
+    polls = count_polls(server)
+    flagged = create_order(server, flag_probability=1)
+    unpaid = create_order(server, pay_probability=0)
+    server.simulator.config.order_timeout = 10**6
+
+    tracker = OrderTracker(
+        url=url, uuids=[flagged, unpaid], polling_policy=POLLING_POLICY
+    )
+    stop_after(tracker, 0.5)
+    transitions = list(tracker)
+
+    assert {
+        transition.uuid: transition.state for transition in transitions
+    } == {
+        flagged: XmrtoOrder.FLAGGED_DESTINATION_ADDRESS,
+        unpaid: XmrtoOrder.UNPAID,
+    }
+    assert len(transitions) == 2
+    assert len(polls[flagged]) == 1
+    assert len(polls[unpaid]) > 3
+    assert list(tracker.get_orders()) == [unpaid]
+
+
+def test_removed_order_is_not_polled(simulator):
+    server, url = simulator
+    polls = count_polls(server)
+    first = create_order(server)
+    second = create_order(server)
+
+    tracker = OrderTracker(
+        url=url, uuids=[first, second], polling_policy=POLLING_POLICY
+    )
+    tracker.remove(first)
+    states = [transition.state for transition in tracker]
+
+    assert states[-1] == XmrtoOrder.BTC_SENT
+    assert first not in polls
+    assert len(polls[second]) >= 3
+
+
+def test_errors_back_off_and_stop_tracking(simulator):
+    server, url = simulator
+    polls = count_polls(server)
+
+    tracker = OrderTracker(
+        url=url,
+        uuids=["xmrto-unknown"],
+        polling_policy=POLLING_POLICY,
+        max_errors=3,
+    )
+    transitions = list(tracker)
+
+    assert len(transitions) == 3
+    assert all(transition.error for transition in transitions)
+    assert len(tracker) == 0
+    times = polls["xmrto-unknown"]
+    assert len(times) == 3
+    # 'error_interval()': 0.01 * 2 and 0.01 * 4 seconds.
+    assert times[1] - times[0] >= 0.02
+    assert times[2] - times[1] >= 0.04
+
+
+def test_max_rate(simulator):
+    server, url = simulator
+    polls = count_polls(server)
+    server.simulator.config.order_timeout = 10**6
+    uuids = [create_order(server, pay_probability=0) for _ in range(20)]
+
+    # Without 'max_rate', these would be polled every 0.01 seconds.
+    tracker = OrderTracker(
+        url=url,
+        uuids=uuids,
+        polling_policy=PollingPolicy(interval=0, max_interval=0),
+        max_rate=20,
+    )
+    stop_after(tracker, 1)
+    start = time.monotonic()
+    list(tracker)
+    elapsed = time.monotonic() - start
+
+    count = sum(len(times) for times in polls.values())
+    assert count <= 20 * elapsed + 1
+    assert count >= 10
+
+
+def test_blocks_while_all_workers_are_busy(simulator, monkeypatch):
+    server, url = simulator
+    server.simulator.config.latency = 0.2
+    server.simulator.config.order_timeout = 10**6
+    uuids = [create_order(server, pay_probability=0) for _ in range(4)]
+
+    waits = []
+    wait = xmrto_tracker.futures.wait
+
+    def counted(*args, **kwargs):
+        waits.append(kwargs.get("timeout", None))
+        return wait(*args, **kwargs)
+
+    monkeypatch.setattr(xmrto_tracker.futures, "wait", counted)
+
+    # All orders are overdue all the time, only the workers limit polling.
+    tracker = OrderTracker(
+        url=url,
+        uuids=uuids,
+        max_workers=2,
+        polling_policy=PollingPolicy(interval=0, max_interval=0),
+    )
+    stop_after(tracker, 1)
+    list(tracker)
+
+    # About two polls per 0.2 seconds, a wait for each.
+    assert len(waits) < 30
+    assert all(timeout > 0 for timeout in waits)
@@ -0,0 +1,49 @@
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+BLACK = b"\x00"
+WHITE = b"\xff"
+
+
+def _chunk(chunk_type: bytes, data: bytes):
+    return (
+        struct.pack(">I", len(data))
+        + chunk_type
+        + data
+        + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(rows, scale: int = 1, border: int = 0):
+    """Black and white 8 bit grayscale PNG from rows of booleans.
+
+    :param rows: Rows of modules, True is black.
+    :param scale: Pixels per module.
+    :param border: Modules of white border around the image.
+    """
+
+    rows = [list(row) for row in rows]
+    modules = len(rows[0]) if rows else 0
+    width = (modules + 2 * border) * scale
+    height = (len(rows) + 2 * border) * scale
+
+    # Every scanline starts with its filter type, 0 is 'None'.
+    white_line = b"\x00" + WHITE * width
+    scanlines = [white_line] * (border * scale)
+    for row in rows:
+        line = (
+            WHITE * (border * scale)
+            + b"".join((BLACK if module else WHITE) * scale for module in row)
+            + WHITE * (border * scale)
+        )
+        scanlines += [b"\x00" + line] * scale
+    scanlines += [white_line] * (border * scale)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (
+        PNG_SIGNATURE
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(b"".join(scanlines), 9))
+        + _chunk(b"IEND", b"")
+    )
@@ -0,0 +1,254 @@
+"""
+Goal:
+  * Catch mistyped BTC destinations locally,
+    instead of paying an order request to learn about them.
+
+How to:
+  * Base58check (P2PKH, P2SH) and bech32/bech32m (segwit, BIP173, BIP350)
+    addresses are decoded and their checksums verified.
+  * The network of an address has to match the network of the XMR.to
+    instance, `network_for_url()`: testnet for test.xmr.to,
+    mainnet for xmr.to, any for other hosts.
+
+    error = check_address(address, network=network_for_url(url))
+    if error:
+        print(error)
+"""
+
+import collections
+import hashlib
+import urllib.parse as urlparse
+
+MAINNET = "mainnet"
+TESTNET = "testnet"
+NETWORKS = (MAINNET, TESTNET)
+
+P2PKH = "p2pkh"
+P2SH = "p2sh"
+P2WPKH = "p2wpkh"
+P2WSH = "p2wsh"
+P2TR = "p2tr"
+WITNESS_UNKNOWN = "witness_unknown"
+
+# Version byte of base58check addresses.
+BASE58_VERSIONS = {
+    0x00: (MAINNET, P2PKH),
+    0x05: (MAINNET, P2SH),
+    0x6F: (TESTNET, P2PKH),
+    0xC4: (TESTNET, P2SH),
+}
+# Human readable part of bech32 addresses.
+BECH32_HRPS = {
+    "bc": MAINNET,
+    "tb": TESTNET,
+}
+TESTNET_HOSTS = ("test.xmr.to",)
+MAINNET_HOSTS = ("xmr.to",)
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE58_INDEX = {char: index for index, char in enumerate(BASE58_ALPHABET)}
+
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32_INDEX = {char: index for index, char in enumerate(BECH32_CHARSET)}
+BECH32_GENERATOR = (
+    0x3B6A57B2,
+    0x26508E6D,
+    0x1EA119FA,
+    0x3D4233DD,
+    0x2A1462B3,
+)
+BECH32 = "bech32"
+BECH32M = "bech32m"
+BECH32_CONSTANTS = {1: BECH32, 0x2BC830A3: BECH32M}
+BECH32_MAX_LENGTH = 90
+
+ADDRESS_FIELDS = ("address", "network", "kind")
+BtcAddress = collections.namedtuple("BtcAddress", ADDRESS_FIELDS)
+
+
+def decode_base58check(address: str):
+    """Payload (version byte included) of a base58check string.
+
+    :raises ValueError: Invalid character or checksum.
+    """
+
+    number = 0
+    for char in address:
+        if char not in BASE58_INDEX:
+            raise ValueError(f"Invalid base58 character '{char}'.")
+        number = number * 58 + BASE58_INDEX[char]
+
+    data = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    # Leading '1's stand for leading zero bytes.
+    zeros = len(address) - len(address.lstrip(BASE58_ALPHABET[0]))
+    data = bytes(zeros) + data
+    if len(data) < 5:
+        raise ValueError("Too short.")
+
+    payload, checksum = data[:-4], data[-4:]
+    digest = hashlib.sha256(hashlib.sha256(payload).digest()).digest()
+    if digest[:4] != checksum:
+        raise ValueError("Invalid checksum.")
+    return payload
+
+
+def _bech32_polymod(values):
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1FFFFFF) << 5 ^ value
+        for bit, generator in enumerate(BECH32_GENERATOR):
+            if (top >> bit) & 1:
+                checksum ^= generator
+    return checksum
+
+
+def _bech32_hrp_expand(hrp):
+    return (
+        [ord(char) >> 5 for char in hrp]
+        + [0]
+        + [ord(char) & 31 for char in hrp]
+    )
+
+
+def decode_bech32(address: str, max_length: int = BECH32_MAX_LENGTH):
+    """'(hrp, data, encoding)' of a bech32 or bech32m string.
+
+    'data' are the 5 bit values without the checksum,
+    'encoding' is `BECH32` or `BECH32M`.
+
+    :param max_length: None for no limit, e.g. for lightning invoices.
+    :raises ValueError: Invalid character, case, length or checksum.
+    """
+
+    if address.lower() != address and address.upper() != address:
+        raise ValueError("Mixed case.")
+    if max_length is not None and len(address) > max_length:
+        raise ValueError("Too long.")
+    address = address.lower()
+
+    separator = address.rfind("1")
+    if separator < 1 or separator + 7 > len(address):
+        raise ValueError("No separator or too short.")
+    hrp = address[:separator]
+    if any(not 33 <= ord(char) <= 126 for char in hrp):
+        raise ValueError("Invalid human readable part.")
+
+    data = []
+    start = separator + 1
+    for char in address[start:]:
+        if char not in BECH32_INDEX:
+            raise ValueError(f"Invalid bech32 character '{char}'.")
+        data.append(BECH32_INDEX[char])
+
+    encoding = BECH32_CONSTANTS.get(
+        _bech32_polymod(_bech32_hrp_expand(hrp) + data), None
+    )
+    if encoding is None:
+        raise ValueError("Invalid checksum.")
+    return hrp, data[:-6], encoding
+
+
+def _convert_bits(data, from_bits, to_bits):
+    """Regroup bits, without padding (as segwit programs require)."""
+
+    accumulator = 0
+    bits = 0
+    result = []
+    max_value = (1 << to_bits) - 1
+    for value in data:
+        accumulator = accumulator << from_bits | value
+        bits += from_bits
+        while bits >= to_bits:
+            bits -= to_bits
+            result.append((accumulator >> bits) & max_value)
+    if bits >= from_bits or (accumulator << (to_bits - bits)) & max_value:
+        raise ValueError("Invalid padding.")
+    return bytes(result)
+
+
+def decode_segwit(address: str):
+    """'(hrp, witness version, witness program)' of a segwit address.
+
+    :raises ValueError: Not a valid segwit address.
+    """
+
+    hrp, data, encoding = decode_bech32(address)
+    if not data:
+        raise ValueError("No witness version.")
+
+    version = data[0]
+    if version > 16:
+        raise ValueError(f"Invalid witness version {version}.")
+    program = _convert_bits(data[1:], 5, 8)
+    if not 2 <= len(program) <= 40:
+        raise ValueError("Invalid witness program length.")
+    if version == 0 and len(program) not in (20, 32):
+        raise ValueError("Invalid witness version 0 program length.")
+    if (version == 0) != (encoding == BECH32):
+        raise ValueError(
+            f"Witness version {version} requires "
+            f"{BECH32 if version == 0 else BECH32M}."
+        )
+    return hrp, version, program
+
+
+def _segwit_kind(version, program):
+    if version == 0:
+        return P2WPKH if len(program) == 20 else P2WSH
+    if version == 1 and len(program) == 32:
+        return P2TR
+    return WITNESS_UNKNOWN
+
+
+def parse_address(address: str):
+    """Network and kind of a BTC address, as `BtcAddress`.
+
+    :raises ValueError: Not a valid BTC address.
+    """
+
+    if not address:
+        raise ValueError("No address.")
+
+    separator = address.lower().rfind("1")
+    hrp = address[:separator].lower() if separator > 0 else None
+    if hrp in BECH32_HRPS:
+        hrp, version, program = decode_segwit(address)
+        return BtcAddress(
+            address=address,
+            network=BECH32_HRPS[hrp],
+            kind=_segwit_kind(version, program),
+        )
+
+    payload = decode_base58check(address)
+    if len(payload) != 21 or payload[0] not in BASE58_VERSIONS:
+        raise ValueError("Unknown address version.")
+    network, kind = BASE58_VERSIONS[payload[0]]
+    return BtcAddress(address=address, network=network, kind=kind)
+
+
+def network_for_url(url: str):
+    """Network of the XMR.to instance at 'url', None if unknown."""
+
+    hostname = urlparse.urlparse(url).hostname or ""
+    if hostname in TESTNET_HOSTS:
+        return TESTNET
+    if hostname in MAINNET_HOSTS:
+        return MAINNET
+    return None
+
+
+def check_address(address: str, network: str = None):
+    """Why 'address' is no valid BTC address on 'network', or None.
+
+    :param network: `MAINNET`, `TESTNET` or None for either.
+    """
+
+    try:
+        btc_address = parse_address(address)
+    except (ValueError) as e:
+        return f"'{address}' is not a valid BTC address: {e}"
+
+    if network is not None and btc_address.network != network:
+        return f"'{address}' is a {btc_address.network} address, expected a {network} address."
+    return None
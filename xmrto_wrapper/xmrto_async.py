@@ -0,0 +1,669 @@
+"""
+Goal:
+  * Interact with XMR.to from asyncio code, without blocking the event loop.
+
+How to:
+  * `AsyncXmrtoApi` offers the same methods as `XmrtoApi`, as coroutines.
+  * Responses are decoded by the same classes (`CreateOrder`, `OrderStatus`,
+    ...) and errors are reported using the same error dicts.
+  * With `XMRTO_RATE_LIMIT_DB`, the rate limit budget is shared with
+    all other processes, as for `XmrtoConnection`. The shared bucket
+    is asked in a thread, its SQLite transactions would block the loop.
+  * Requires `aiohttp`: `pip install xmrto_wrapper[async]`.
+
+    async with AsyncXmrtoApi(url="https://test.xmr.to") as xmrto_api:
+        results = await asyncio.gather(
+            *(xmrto_api.order_status(uuid=uuid) for uuid in uuids)
+        )
+"""
+
+import asyncio
+import copy
+import functools
+import json
+import ssl
+import time
+from types import SimpleNamespace
+from typing import Dict
+import urllib.parse as urlparse
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from . import xmrto_wrapper
+from .xmrto_wrapper import (
+    logger,
+    XmrtoConnection,
+    BufferSink,
+    XmrtoApi,
+    CreateOrder,
+    OrderStatus,
+    CheckPrice,
+    CheckRoutes,
+    CheckParameters,
+    CheckQrCode,
+    ResponseCache,
+    RateLimiter,
+    MetricsRegistry,
+    METRICS,
+    OrderValidator,
+    QrCodeCache,
+    XMRTO_URL_DEFAULT,
+    API_VERSION_DEFAULT,
+)
+from .xmrto_rate_limit import TokenBucket, get_shared_rate_limiter
+from .rand_ip import get_random_ip_address
+
+
+class AsyncResponse:
+    """Buffered `aiohttp` response.
+
+    Provides the parts of `requests.Response`
+    `XmrtoConnection._evaluate_response()` relies on.
+    'streamed' is the number of bytes written to a sink, if streamed.
+    """
+
+    def __init__(
+        self, status_code, headers, content, encoding="utf-8", streamed=None
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.streamed = streamed
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncXmrtoConnection:
+    USER_AGENT = XmrtoConnection.USER_AGENT
+    HTTP_TIMEOUT = XmrtoConnection.HTTP_TIMEOUT
+    MAX_CONNECTIONS = 100
+
+    def __init__(
+        self,
+        url="",
+        connection=None,
+        timeout: int = HTTP_TIMEOUT,
+        limit: int = MAX_CONNECTIONS,
+        rate_limiter: RateLimiter = None,
+        metrics: MetricsRegistry = None,
+        pool_maxsize: int = None,
+        keep_alive: bool = XmrtoConnection.KEEP_ALIVE,
+    ):
+        """
+        :param limit: Connections open at once, to all hosts.
+        :param pool_maxsize: Connections open at once per host,
+            only 'limit' applies if None. Further requests wait,
+            as with `XmrtoConnection(pool_block=True)`.
+        :param keep_alive: If False, every request closes its connection.
+        """
+
+        if aiohttp is None:
+            raise ImportError(
+                "'aiohttp' is required, install 'xmrto_wrapper[async]'."
+            )
+
+        self.__url = urlparse.urlparse(url)
+        self.__timeout = timeout
+        self.__limit = limit
+        self.__pool_maxsize = pool_maxsize
+        self.__keep_alive = keep_alive
+        if rate_limiter is None and xmrto_wrapper.RATE_LIMIT_DB:
+            rate_limiter = get_shared_rate_limiter(
+                path=xmrto_wrapper.RATE_LIMIT_DB,
+                rate=xmrto_wrapper.RATE_LIMIT,
+            )
+        self.__rate_limiter = rate_limiter
+        self.__metrics = metrics or METRICS
+
+        if connection:
+            logger.debug("Use existing session.")
+        self.__conn = connection
+        self.__owns_connection = connection is None
+        self.__in_flight = {}
+
+    def get_connection(self):
+        # The session is bound to the running event loop,
+        # so it is created on first use.
+        if self.__conn is None:
+            logger.debug("Create new session.")
+            headers = {
+                "Content-Type": "application/json",
+                "User-Agent": self.USER_AGENT,
+            }
+            if self.__url.hostname:
+                headers["Host"] = self.__url.hostname
+
+            self.__conn = aiohttp.ClientSession(
+                headers=headers,
+                connector=aiohttp.TCPConnector(
+                    limit=self.__limit,
+                    limit_per_host=self.__pool_maxsize or 0,
+                    force_close=not self.__keep_alive,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.__timeout),
+            )
+        return self.__conn
+
+    def get_hostname(self):
+        return self.__url.hostname
+
+    def get_rate_limiter(self):
+        return self.__rate_limiter
+
+    def get_metrics(self):
+        return self.__metrics
+
+    async def _limit(self, func, *args, **kwargs):
+        """Call the rate limiter without blocking the event loop.
+
+        Only the in memory `TokenBucket` is called directly,
+        others (`SharedTokenBucket`) may wait for a lock.
+        """
+
+        if type(self.__rate_limiter.bucket) is TokenBucket:
+            return func(*args, **kwargs)
+        return await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(func, *args, **kwargs)
+        )
+
+    async def _acquire(self, host):
+        if self.__rate_limiter:
+            wait = await self._limit(self.__rate_limiter.reserve, host)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def close(self):
+        if self.__owns_connection and self.__conn is not None:
+            await self.__conn.close()
+            self.__conn = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def get(self, url: str, expect_json=True, coalesce=True):
+        return await self._coalesce(
+            url=url, method="GET", expect_json=expect_json, coalesce=coalesce
+        )
+
+    async def download(self, url: str, sink):
+        """See `XmrtoConnection.download()`."""
+
+        if not hasattr(sink, "write"):
+            sink = BufferSink(sink)
+        return await self._request(url=url, method="GET", sink=sink)
+
+    async def post(
+        self,
+        url: str,
+        postdata: Dict[str, str],
+        expect_json=True,
+        expect_response=True,
+        coalesce=False,
+    ):
+        logger.debug(f"--> POSTDATA: {postdata}.")
+        return await self._coalesce(
+            url=url,
+            method="POST",
+            postdata=postdata,
+            expect_json=expect_json,
+            expect_response=expect_response,
+            coalesce=coalesce,
+        )
+
+    async def _coalesce(self, coalesce=False, **kwargs):
+        """Same as 'XmrtoConnection._request()' with 'coalesce'."""
+
+        if not coalesce:
+            return await self._request(**kwargs)
+
+        key = XmrtoConnection._in_flight_key(
+            kwargs["method"],
+            kwargs["url"],
+            kwargs.get("postdata", None),
+            kwargs.get("expect_json", True),
+            kwargs.get("expect_response", True),
+        )
+        in_flight = self.__in_flight.get(key, None)
+        if in_flight is not None:
+            logger.debug(f"Waiting for identical request: '{key}'.")
+            return copy.deepcopy(await asyncio.shield(in_flight))
+
+        # The request runs as its own task, so cancelling one caller,
+        # the first one included, does not cancel the others.
+        in_flight = asyncio.ensure_future(self._request(**kwargs))
+        self.__in_flight[key] = in_flight
+
+        def done(task):
+            del self.__in_flight[key]
+            # Nobody may be waiting, avoid 'exception never retrieved'.
+            if not task.cancelled():
+                task.exception()
+
+        in_flight.add_done_callback(done)
+        return await asyncio.shield(in_flight)
+
+    async def _fetch(self, method: str, url: str, sink=None, **kwargs):
+        async with self.get_connection().request(
+            method, url, **kwargs
+        ) as response:
+            if sink is not None and XmrtoConnection._streamable(
+                response.status, response.headers
+            ):
+                size = 0
+                async for chunk in response.content.iter_chunked(
+                    XmrtoConnection.CHUNK_SIZE
+                ):
+                    sink.write(chunk)
+                    size += len(chunk)
+                return AsyncResponse(
+                    status_code=response.status,
+                    headers=response.headers,
+                    content=b"",
+                    streamed=size,
+                )
+
+            content = await response.read()
+            return AsyncResponse(
+                status_code=response.status,
+                headers=response.headers,
+                content=content,
+                encoding=response.charset or "utf-8",
+            )
+
+    @classmethod
+    def _ssl_context(cls):
+        ssl_context = ssl.create_default_context()
+        if xmrto_wrapper.CERTIFICATE:
+            ssl_context.load_cert_chain(xmrto_wrapper.CERTIFICATE)
+        return ssl_context
+
+    async def _request(
+        self,
+        url: str,
+        method: str,
+        postdata: Dict[str, str] = None,
+        expect_json=True,
+        expect_response=True,
+        sink=None,
+    ):
+        """Makes the HTTP request and records it in the metrics."""
+
+        counts = SimpleNamespace(attempts=0, rate_limited=0)
+        start = time.perf_counter()
+        response = await self._send(
+            url=url,
+            method=method,
+            postdata=postdata,
+            expect_json=expect_json,
+            expect_response=expect_response,
+            counts=counts,
+            sink=sink,
+        )
+        self.__metrics.observe_response(
+            url=url,
+            latency=time.perf_counter() - start,
+            response=response,
+            retries=max(counts.attempts - 1, 0),
+            rate_limited=counts.rate_limited,
+        )
+        return response
+
+    async def _send(
+        self,
+        url: str,
+        method: str,
+        postdata: Dict[str, str] = None,
+        expect_json=True,
+        expect_response=True,
+        counts=None,
+        sink=None,
+    ):
+        """Makes the HTTP request"""
+
+        url = XmrtoConnection._normalize_url(url)
+
+        logger.debug(f"--> URL: {url}")
+
+        host = urlparse.urlparse(url).netloc
+        response = None
+        retries = 10
+        if self.__rate_limiter:
+            retries = self.__rate_limiter.max_retries
+        attempt = 0
+        try:
+            try:
+                data = {"sink": sink}
+                if postdata:
+                    data["data"] = json.dumps(postdata)
+
+                while retries > 0:
+                    # Same rate limit handling as
+                    # 'XmrtoConnection._request()'.
+                    if (
+                        response is not None
+                        and response.status_code
+                        in XmrtoConnection.RATE_LIMIT_CODES
+                    ):
+                        retries -= 1
+                        if self.__rate_limiter:
+                            delay = await self._limit(
+                                self.__rate_limiter.rate_limited,
+                                host=host,
+                                attempt=attempt,
+                                retry_after=response.headers.get(
+                                    "Retry-After", None
+                                ),
+                            )
+                            logger.info(
+                                f"[{retries}] Rate limited, trying again in {delay:.2f} seconds."
+                            )
+                        else:
+                            logger.info(
+                                f"[{retries}] Rate limited, trying again."
+                            )
+                            random_ip = get_random_ip_address()
+                            data["headers"] = {"X-Forwarded-For": random_ip}
+                        attempt += 1
+                    await self._acquire(host)
+                    counts.attempts += 1
+                    response = await self._fetch(method, url, **data)
+                    logger.debug(f"--> METHOD: {method}.")
+                    logger.debug(f"<-- STATUS CODE: {response.status_code}.")
+                    logger.debug(f"<-- RESPONE HEADERS: {response.headers}.")
+                    if (
+                        response.status_code
+                        not in XmrtoConnection.RATE_LIMIT_CODES
+                    ):
+                        retries = 0
+                    else:
+                        counts.rate_limited += 1
+
+            except (aiohttp.ClientSSLError) as e:
+                logger.debug(
+                    f"Trying certificate: '{xmrto_wrapper.CERTIFICATE}'. SSL certificate error '{str(e)}'."
+                )
+                data["ssl"] = self._ssl_context()
+
+                await self._acquire(host)
+                counts.attempts += 1
+                response = await self._fetch(method, url, **data)
+        except (aiohttp.ClientConnectionError) as e:
+            logger.debug(f"Connection error: {str(e)}.")
+            return XmrtoConnection._request_error(
+                url=url, error=e, error_code=102
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Request error: {str(e)}.")
+            return XmrtoConnection._request_error(
+                url=url, error=e, error_code=104
+            )
+        except (Exception) as e:
+            logger.debug(f"Error: {str(e)}.")
+            return XmrtoConnection._request_error(
+                url=url, error=e, error_code=103
+            )
+
+        if response.streamed is not None:
+            logger.debug(f"<-- {response.streamed} bytes.")
+            return response.streamed
+
+        return XmrtoConnection._evaluate_response(
+            url=url,
+            response=response,
+            expect_json=expect_json,
+            expect_response=expect_response,
+        )
+
+
+class AsyncXmrtoApi(XmrtoApi):
+    def __init__(
+        self,
+        url=XMRTO_URL_DEFAULT,
+        api=API_VERSION_DEFAULT,
+        connection=None,
+        limit: int = AsyncXmrtoConnection.MAX_CONNECTIONS,
+        cache: ResponseCache = None,
+        rate_limiter: RateLimiter = None,
+        metrics: MetricsRegistry = None,
+        validator: OrderValidator = None,
+        qrcode_cache: QrCodeCache = None,
+        pool_maxsize: int = None,
+        keep_alive: bool = XmrtoConnection.KEEP_ALIVE,
+    ):
+        """
+        'limit', 'pool_maxsize' and 'keep_alive' as for
+        `AsyncXmrtoConnection`. aiohttp has no separate pool per host
+        ('pool_connections'), and always waits for a free connection
+        ('pool_block').
+        """
+
+        self.limit = limit
+        super().__init__(
+            url=url,
+            api=api,
+            connection=connection,
+            cache=cache,
+            rate_limiter=rate_limiter,
+            metrics=metrics,
+            validator=validator,
+            qrcode_cache=qrcode_cache,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            keep_alive=keep_alive,
+        )
+        self.__refresh_tasks = set()
+
+    def _create_connection(self, connection=None):
+        return AsyncXmrtoConnection(
+            url=self.url,
+            connection=connection,
+            limit=self.limit,
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            pool_maxsize=self.pool_maxsize,
+            keep_alive=self.keep_alive,
+        )
+
+    async def close(self):
+        await self.get_connection().close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def __refresh(self, key, request, ttl=None):
+        try:
+            response = await self._send(request)
+            if self._cacheable(response):
+                self.cache.set(key, response, ttl=ttl)
+        finally:
+            self.cache.finish_refresh(key)
+
+    async def _send_cached(self, key, request, ttl=None):
+        if key is None:
+            return await self._send(request)
+
+        response, fresh = self.cache.get(key)
+        if response is not None:
+            if not fresh and self.cache.start_refresh(key):
+                task = asyncio.ensure_future(self.__refresh(key, request, ttl))
+                # Keep a reference until the task is done.
+                self.__refresh_tasks.add(task)
+                task.add_done_callback(self.__refresh_tasks.discard)
+            return response
+
+        response = await self._send(request)
+        if self._cacheable(response):
+            self.cache.set(key, response, ttl=ttl)
+        return response
+
+    async def validation_parameters(self):
+        """See `XmrtoApi.validation_parameters()`."""
+
+        if self.validator is None:
+            return None
+        parameters = self.validator.get_parameters()
+        if parameters is None:
+            parameters, error = await self.order_check_parameters()
+            if error:
+                logger.warning("No order parameters, not validating.")
+                return None
+            self.validator.set_parameters(parameters)
+        return parameters
+
+    async def create_order(
+        self, out_address=None, out_amount=None, currency="BTC"
+    ):
+        request, error = self._create_order_request(
+            out_address=out_address, out_amount=out_amount, currency=currency
+        )
+        if error:
+            return None, error
+
+        if self.validator is not None:
+            error = self._validate_order(
+                request=request,
+                parameters=await self.validation_parameters(),
+                out_amount=out_amount,
+                currency=currency,
+            )
+            if error:
+                logger.error(f"Rejected order: {json.dumps(error)}.")
+                return None, error
+
+        response = await self._send(request)
+
+        return CreateOrder.get(data=response, api=self.api)
+
+    async def create_ln_order(self, ln_invoice=None):
+        request, error = self._create_ln_order_request(ln_invoice=ln_invoice)
+        if error:
+            return None, error
+
+        invoice, error = self._check_invoice(
+            request=request, ln_invoice=ln_invoice
+        )
+        if error:
+            return None, error
+
+        if self.validator is not None:
+            error = self._validate_ln_order(
+                request=request,
+                parameters=await self.validation_parameters(),
+                invoice=invoice,
+            )
+            if error:
+                logger.error(f"Rejected order: {json.dumps(error)}.")
+                return None, error
+
+        response = await self._send(request)
+
+        return CreateOrder.get(data=response, api=self.api)
+
+    async def order_status(self, uuid=None):
+        request, error = self._order_status_request(uuid=uuid)
+        if error:
+            return None, error
+
+        response = await self._send(request)
+
+        return OrderStatus.get(data=response, api=self.api)
+
+    async def confirm_partial_payment(self, uuid=None):
+        request, error = self._confirm_partial_payment_request(uuid=uuid)
+        if error:
+            return False, error
+
+        response = await self._send(request)
+
+        return self._confirm_partial_payment_result(response)
+
+    async def order_check_price(
+        self, btc_amount=None, xmr_amount=None, currency="BTC"
+    ):
+        request, error = self._order_check_price_request(
+            btc_amount=btc_amount, xmr_amount=xmr_amount, currency=currency
+        )
+        if error:
+            return None, error
+
+        response = await self._send_cached(
+            key=self._cache_key(ResponseCache.PRICE, request), request=request
+        )
+
+        return CheckPrice.get(data=response, api=self.api)
+
+    async def order_check_ln_routes(self, ln_invoice=None):
+        request, error = self._order_check_ln_routes_request(
+            ln_invoice=ln_invoice
+        )
+        if error:
+            return None, error
+
+        invoice, error = self._check_invoice(
+            request=request, ln_invoice=ln_invoice
+        )
+        if error:
+            return None, error
+
+        response = await self._send_cached(
+            key=self._routes_cache_key(invoice),
+            request=request,
+            ttl=invoice.seconds_till_expiry(),
+        )
+
+        return CheckRoutes.get(data=response, api=self.api)
+
+    async def order_check_parameters(self):
+        request, error = self._order_check_parameters_request()
+
+        response = await self._send_cached(
+            key=self._cache_key(ResponseCache.PARAMETERS, request),
+            request=request,
+        )
+
+        return CheckParameters.get(data=response, api=self.api)
+
+    async def download_qrcode(self, data=None, sink=None, path=None):
+        """See `XmrtoApi.download_qrcode()`."""
+
+        request, target, result = self._qrcode_download(
+            data=data, sink=sink, path=path
+        )
+        if result is not None:
+            return result
+
+        response = await self.get_connection().download(
+            url=request["url"], sink=target
+        )
+
+        return self._qrcode_downloaded(
+            data=data,
+            request=request,
+            target=target,
+            response=response,
+            sink=sink,
+            path=path,
+        )
+
+    async def generate_qrcode(self, data=None):
+        if data is None:
+            return None
+
+        qrcode, error = await self.download_qrcode(data=data)
+
+        return CheckQrCode.get(data=error or qrcode, api=self.api)
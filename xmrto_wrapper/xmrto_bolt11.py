@@ -0,0 +1,193 @@
+"""
+Goal:
+  * Reject malformed, expired or wrong network lightning invoices locally,
+    instead of sending them to XMR.to.
+
+How to:
+  * `decode_invoice()` decodes a BOLT11 invoice: network, amount,
+    creation time, expiry and payment hash.
+    The checksum is verified, the signature is not.
+  * `check_invoice()` also rejects expired and wrong network invoices.
+  * `invoice_hash()` identifies an invoice, e.g. as cache key.
+
+    invoice = decode_invoice(ln_invoice)
+    print(invoice.amount, invoice.seconds_till_expiry())
+"""
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from .xmrto_address import decode_bech32, BECH32, MAINNET, TESTNET
+
+SIGNET = "signet"
+REGTEST = "regtest"
+
+# Currency prefix of the human readable part, longest first.
+CURRENCIES = {
+    "bcrt": REGTEST,
+    "tbs": SIGNET,
+    "bc": MAINNET,
+    "tb": TESTNET,
+}
+HRP = re.compile(
+    f"^ln({'|'.join(CURRENCIES)})(?:([0-9]+)([munp]?))?$", re.IGNORECASE
+)
+MULTIPLIERS = {
+    "": Decimal(1),
+    "m": Decimal("0.001"),
+    "u": Decimal("0.000001"),
+    "n": Decimal("0.000000001"),
+    "p": Decimal("0.000000000001"),
+}
+
+# Expiry of invoices without expiry field, in seconds.
+DEFAULT_EXPIRY = 3600
+# Number of 5 bit values.
+TIMESTAMP_LENGTH = 7
+SIGNATURE_LENGTH = 104
+PAYMENT_HASH_LENGTH = 52
+
+# Tagged fields, by their 5 bit type.
+PAYMENT_HASH = 1
+DESCRIPTION = 13
+EXPIRY = 6
+
+
+@dataclass
+class Invoice:
+    invoice: str = ""
+    network: str = None
+    # BTC, None for invoices without amount.
+    amount: Decimal = None
+    timestamp: int = 0
+    expiry: int = DEFAULT_EXPIRY
+    payment_hash: str = None
+    description: str = None
+
+    def expires_at(self):
+        return self.timestamp + self.expiry
+
+    def seconds_till_expiry(self, now: float = None):
+        if now is None:
+            now = time.time()
+        return self.expires_at() - now
+
+    def is_expired(self, now: float = None):
+        return self.seconds_till_expiry(now=now) <= 0
+
+
+def _to_int(values):
+    number = 0
+    for value in values:
+        number = number << 5 | value
+    return number
+
+
+def _to_bytes(values):
+    """5 bit values as bytes, dropping the padding bits."""
+
+    bits = len(values) * 5
+    number = _to_int(values) >> (bits % 8)
+    return number.to_bytes(bits // 8, "big")
+
+
+def decode_amount(amount: str, multiplier: str = ""):
+    """The amount of the human readable part in BTC.
+
+    :raises ValueError: A pico BTC amount that is no full milli satoshi.
+    """
+
+    if multiplier.lower() == "p" and not amount.endswith("0"):
+        raise ValueError("Amount is not a multiple of 10 pico BTC.")
+    return Decimal(amount) * MULTIPLIERS[multiplier.lower()]
+
+
+def decode_invoice(ln_invoice: str):
+    """Decode a BOLT11 invoice into an `Invoice`.
+
+    :raises ValueError: Not a valid BOLT11 invoice.
+    """
+
+    if not ln_invoice:
+        raise ValueError("No invoice.")
+
+    invoice = ln_invoice.strip()
+    if invoice.lower().startswith("lightning:"):
+        start = len("lightning:")
+        invoice = invoice[start:]
+
+    hrp, data, encoding = decode_bech32(invoice, max_length=None)
+    if encoding != BECH32:
+        raise ValueError("Invoices are bech32, not bech32m encoded.")
+
+    match = HRP.match(hrp)
+    if match is None:
+        raise ValueError(f"Unknown prefix '{hrp}'.")
+    currency, amount, multiplier = match.groups()
+
+    if len(data) < TIMESTAMP_LENGTH + SIGNATURE_LENGTH:
+        raise ValueError("Too short.")
+
+    decoded = Invoice(
+        invoice=invoice,
+        network=CURRENCIES[currency.lower()],
+        amount=None if amount is None else decode_amount(amount, multiplier),
+        timestamp=_to_int(data[:TIMESTAMP_LENGTH]),
+    )
+
+    offset = TIMESTAMP_LENGTH
+    end = len(data) - SIGNATURE_LENGTH
+    while offset < end:
+        if offset + 3 > end:
+            raise ValueError("Truncated field.")
+        field_type = data[offset]
+        first = offset + 1
+        start = offset + 3
+        length = _to_int(data[first:start])
+        offset = start + length
+        if offset > end:
+            raise ValueError("Truncated field.")
+        values = data[start:offset]
+
+        # Fields of unexpected length are skipped, as BOLT11 requires.
+        if field_type == PAYMENT_HASH and length == PAYMENT_HASH_LENGTH:
+            decoded.payment_hash = _to_bytes(values).hex()
+        elif field_type == EXPIRY:
+            decoded.expiry = _to_int(values)
+        elif field_type == DESCRIPTION:
+            decoded.description = _to_bytes(values).decode(errors="replace")
+
+    if decoded.payment_hash is None:
+        raise ValueError("No payment hash.")
+    return decoded
+
+
+def invoice_hash(ln_invoice: str):
+    """SHA256 of an invoice, independent of its case."""
+
+    return hashlib.sha256(ln_invoice.strip().lower().encode()).digest()
+
+
+def check_invoice(ln_invoice: str, network: str = None, now: float = None):
+    """The decoded `Invoice`, or why it can not be paid on 'network'.
+
+    :param network: `MAINNET`, `TESTNET` or None for any.
+    :return: '(invoice, error_msg)'
+    """
+
+    try:
+        invoice = decode_invoice(ln_invoice)
+    except (ValueError) as e:
+        return None, f"Not a valid lightning invoice: {e}"
+
+    if network is not None and invoice.network != network:
+        return (
+            None,
+            f"A {invoice.network} invoice, expected a {network} invoice.",
+        )
+    if invoice.is_expired(now=now):
+        return None, f"The invoice expired {time.ctime(invoice.expires_at())}."
+    return invoice, None
@@ -0,0 +1,142 @@
+"""
+Goal:
+  * Avoid round trips for responses that do not change often,
+    like the order parameters and prices.
+
+How to:
+  * Pass a `ResponseCache` to `XmrtoApi(cache=...)`.
+  * Every endpoint has its own time to live (TTL), in seconds.
+    Lightning route checks are also kept no longer than their invoice is valid.
+  * The least recently used entries are evicted once `max_entries` is reached.
+  * Expired entries are still served for `stale` seconds,
+    while the response is fetched again in the background
+    (stale-while-revalidate).
+  * Any object implementing `get()`, `set()`, `start_refresh()`
+    and `finish_refresh()` can be used instead.
+"""
+
+import collections
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+
+class ResponseCache:
+    PARAMETERS = "parameters"
+    PRICE = "price"
+    ROUTES = "routes"
+
+    TTL = {PARAMETERS: 60, PRICE: 5, ROUTES: 30}
+    STALE = 10
+    MAX_ENTRIES = 1024
+
+    def __init__(
+        self,
+        ttl: dict = None,
+        stale: float = STALE,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        self.ttl = dict(self.TTL)
+        if ttl:
+            self.ttl.update(ttl)
+        self.stale = stale
+        self.max_entries = max_entries
+
+        self.__lock = threading.Lock()
+        self.__entries = collections.OrderedDict()
+        self.__refreshing = set()
+        self.__stats = collections.Counter()
+
+    @classmethod
+    def key(cls, endpoint, *args):
+        """Cache key for an endpoint, with amounts normalized.
+
+        '0.010' and 0.01 end up with the same key.
+        """
+
+        normalized = []
+        for arg in args:
+            if isinstance(arg, str):
+                try:
+                    arg = Decimal(arg)
+                except (InvalidOperation):
+                    pass
+            if isinstance(arg, (int, float)) and not isinstance(arg, bool):
+                arg = Decimal(str(arg))
+            if isinstance(arg, Decimal):
+                arg = str(arg.normalize())
+            normalized.append(arg)
+        return (endpoint,) + tuple(normalized)
+
+    def get(self, key):
+        """Return '(value, fresh)', '(None, False)' if nothing is cached."""
+
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key, None)
+            if entry is None:
+                self.__stats["misses"] += 1
+                return None, False
+
+            value, expires = entry
+            if now < expires:
+                self.__entries.move_to_end(key)
+                self.__stats["hits"] += 1
+                return value, True
+            if now < expires + self.stale:
+                self.__entries.move_to_end(key)
+                self.__stats["stale_hits"] += 1
+                return value, False
+
+            del self.__entries[key]
+            self.__stats["misses"] += 1
+            return None, False
+
+    def set(self, key, value, ttl: float = None):
+        """Cache 'value' for the TTL of the endpoint.
+
+        :param ttl: Shorter TTL, e.g. the time till an invoice expires.
+        """
+
+        endpoint_ttl = self.ttl.get(key[0], 0)
+        ttl = endpoint_ttl if ttl is None else min(ttl, endpoint_ttl)
+        if ttl <= 0:
+            return
+
+        with self.__lock:
+            self.__entries[key] = (value, time.monotonic() + ttl)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.__stats["evictions"] += 1
+
+    def start_refresh(self, key):
+        """True if the caller should refresh 'key', only one caller does."""
+
+        with self.__lock:
+            if key in self.__refreshing:
+                return False
+            self.__refreshing.add(key)
+            self.__stats["refreshes"] += 1
+            return True
+
+    def finish_refresh(self, key):
+        with self.__lock:
+            self.__refreshing.discard(key)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def get_stats(self):
+        with self.__lock:
+            stats = {
+                "hits": 0,
+                "stale_hits": 0,
+                "misses": 0,
+                "evictions": 0,
+                "refreshes": 0,
+            }
+            stats.update(self.__stats)
+            stats["entries"] = len(self.__entries)
+        return stats
@@ -0,0 +1,327 @@
+"""
+Goal:
+  * An audit trail of every state change of every order.
+
+How to:
+  * Pass a `TransitionJournal` to `XmrtoOrderStatus(journal=...)`,
+    `XmrtoOrder(journal=...)` or `OrderTracker(journal=...)`.
+    Every order status is handed to the journal,
+    which appends a record only if the state actually changed.
+  * The journal is an append-only file of length prefixed,
+    checksummed binary records.
+    A record torn by a crash is ignored (and overwritten) on reopening.
+  * Records are synced to disk (fsync) in batches, after `sync_every`
+    records, or by a timer thread `sync_interval` seconds after the first
+    record not synced yet, even if nothing else is recorded meanwhile.
+  * `compact()` squashes the transitions of every order in a final state
+    into one summary record, keeping the file bounded.
+
+    journal = TransitionJournal(path="transitions.journal")
+    for record in journal:
+        print(record.uuid, record.previous_state, record.state)
+    print(journal.get_history(uuid))
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from .xmrto_wrapper import logger, XmrtoOrder
+
+# Record length and CRC32 of the record.
+FRAME = struct.Struct(">II")
+# Record type and timestamp.
+RECORD = struct.Struct(">Bd")
+STRING_LENGTH = struct.Struct(">H")
+COUNT = struct.Struct(">H")
+TIMESTAMP = struct.Struct(">d")
+
+TRANSITION = 1
+SUMMARY = 2
+
+
+@dataclass
+class JournalRecord:
+    kind: int = TRANSITION
+    uuid: str = ""
+    timestamp: float = 0.0
+    previous_state: str = None
+    state: str = None
+    # Summaries only: '(timestamp, state)' for every state, oldest first.
+    history: List[Tuple[float, str]] = field(default_factory=list)
+
+
+def _pack_string(value):
+    data = (value or "").encode()
+    return STRING_LENGTH.pack(len(data)) + data
+
+
+def _unpack_string(payload, offset):
+    (length,) = STRING_LENGTH.unpack_from(payload, offset)
+    start = offset + STRING_LENGTH.size
+    end = start + length
+    return payload[start:end].decode() or None, end
+
+
+def encode_record(record: JournalRecord):
+    payload = RECORD.pack(record.kind, record.timestamp) + _pack_string(
+        record.uuid
+    )
+    if record.kind == TRANSITION:
+        payload += _pack_string(record.previous_state)
+        payload += _pack_string(record.state)
+    else:
+        payload += COUNT.pack(len(record.history))
+        for timestamp, state in record.history:
+            payload += TIMESTAMP.pack(timestamp) + _pack_string(state)
+
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_record(payload):
+    kind, timestamp = RECORD.unpack_from(payload, 0)
+    uuid, offset = _unpack_string(payload, RECORD.size)
+    record = JournalRecord(kind=kind, uuid=uuid, timestamp=timestamp)
+
+    if kind == TRANSITION:
+        record.previous_state, offset = _unpack_string(payload, offset)
+        record.state, offset = _unpack_string(payload, offset)
+        return record
+
+    (count,) = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        (state_timestamp,) = TIMESTAMP.unpack_from(payload, offset)
+        state, offset = _unpack_string(payload, offset + TIMESTAMP.size)
+        record.history.append((state_timestamp, state))
+    record.state = record.history[-1][1] if record.history else None
+    if len(record.history) > 1:
+        record.previous_state = record.history[-2][1]
+    return record
+
+
+def read_records(path):
+    """Records of a journal file and the length of its intact part."""
+
+    records = []
+    valid_length = 0
+    if not os.path.exists(path):
+        return records, valid_length
+
+    with open(path, "rb") as journal_file:
+        data = journal_file.read()
+
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        end = start + length
+        payload = data[start:end]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            logger.warning(
+                f"Ignoring the journal after byte {offset}, torn record."
+            )
+            break
+        records.append(decode_record(payload))
+        offset = valid_length = end
+
+    return records, valid_length
+
+
+class TransitionJournal:
+    SYNC_EVERY = 100
+    SYNC_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        path: str,
+        sync_every: int = SYNC_EVERY,
+        sync_interval: float = SYNC_INTERVAL,
+    ):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self.__lock = threading.Lock()
+        self.__states = {}
+        self.__unsynced = 0
+        self.__last_sync = time.monotonic()
+        self.__timer = None
+
+        records, valid_length = read_records(path)
+        for record in records:
+            self.__states[record.uuid] = record.state
+        self.__file = self.__open(valid_length)
+
+    def __open(self, valid_length=None):
+        journal_file = open(self.path, "ab")
+        if valid_length is not None and journal_file.tell() > valid_length:
+            # Drop a torn record at the end.
+            journal_file.truncate(valid_length)
+        return journal_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.get_records())
+
+    def get_state(self, uuid):
+        with self.__lock:
+            return self.__states.get(uuid, None)
+
+    def record(self, uuid, state, timestamp: float = None):
+        """Append a transition, if 'state' differs from the last one.
+
+        :return: The `JournalRecord` written, None if nothing changed.
+        """
+
+        if not uuid or not state:
+            return None
+
+        with self.__lock:
+            previous_state = self.__states.get(uuid, None)
+            if state == previous_state:
+                return None
+
+            record = JournalRecord(
+                kind=TRANSITION,
+                uuid=uuid,
+                timestamp=time.time() if timestamp is None else timestamp,
+                previous_state=previous_state,
+                state=state,
+            )
+            self.__file.write(encode_record(record))
+            self.__states[uuid] = state
+            self.__unsynced += 1
+            if (
+                self.__unsynced >= self.sync_every
+                or time.monotonic() - self.__last_sync >= self.sync_interval
+            ):
+                self.__sync()
+            else:
+                self.__schedule_sync()
+        return record
+
+    def __schedule_sync(self):
+        # Not restarted by later records, so none waits longer.
+        if self.__timer is not None and self.__timer.is_alive():
+            return
+        self.__timer = threading.Timer(self.sync_interval, self.__timed_sync)
+        self.__timer.daemon = True
+        self.__timer.start()
+
+    def __timed_sync(self):
+        try:
+            with self.__lock:
+                if not self.__file.closed and self.__unsynced:
+                    self.__sync()
+        except (OSError) as e:
+            logger.error(f"Could not sync the journal: {e}.")
+
+    def record_status(self, order):
+        """Append the state of an `XmrtoOrder` or `XmrtoOrderStatus`."""
+
+        return self.record(uuid=order.uuid, state=order.state)
+
+    def __sync(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__unsynced = 0
+        self.__last_sync = time.monotonic()
+
+    def sync(self):
+        with self.__lock:
+            self.__sync()
+
+    def close(self):
+        with self.__lock:
+            if self.__file.closed:
+                return
+            self.__sync()
+            self.__file.close()
+
+    def get_records(self):
+        with self.__lock:
+            self.__file.flush()
+            records, _ = read_records(self.path)
+        return records
+
+    def get_history(self, uuid):
+        """'(timestamp, state)' for every state of an order, oldest first."""
+
+        history = []
+        for record in self.get_records():
+            if record.uuid != uuid:
+                continue
+            if record.kind == SUMMARY:
+                history.extend(record.history)
+            else:
+                history.append((record.timestamp, record.state))
+        return history
+
+    def compact(self):
+        """Squash the transitions of finished orders into one summary each.
+
+        The compacted journal is written next to the journal
+        and replaces it atomically.
+        """
+
+        with self.__lock:
+            self.__sync()
+            records, _ = read_records(self.path)
+
+            histories = {}
+            for record in records:
+                history = histories.setdefault(record.uuid, [])
+                if record.kind == SUMMARY:
+                    history.extend(record.history)
+                else:
+                    history.append((record.timestamp, record.state))
+
+            compacted = []
+            summarized = set()
+            for record in records:
+                uuid = record.uuid
+                if (
+                    self.__states.get(uuid, None)
+                    not in XmrtoOrder.FINAL_STATES
+                ):
+                    compacted.append(record)
+                elif uuid not in summarized:
+                    summarized.add(uuid)
+                    history = histories[uuid]
+                    compacted.append(
+                        JournalRecord(
+                            kind=SUMMARY,
+                            uuid=uuid,
+                            timestamp=history[-1][0],
+                            history=history,
+                        )
+                    )
+
+            temporary_path = self.path + ".compact"
+            with open(temporary_path, "wb") as compacted_file:
+                for record in compacted:
+                    compacted_file.write(encode_record(record))
+                compacted_file.flush()
+                os.fsync(compacted_file.fileno())
+
+            self.__file.close()
+            os.replace(temporary_path, self.path)
+            self.__file = self.__open()
+
+        logger.debug(
+            f"Compacted {len(records)} journal records to {len(compacted)}."
+        )
+        return len(records), len(compacted)
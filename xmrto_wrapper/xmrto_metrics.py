@@ -0,0 +1,262 @@
+"""
+Goal:
+  * Visibility into the requests made to XMR.to.
+
+How to:
+  * Every connection records its requests in `REGISTRY`,
+    unless it is given another `MetricsRegistry` (`metrics=...`).
+  * Recorded per endpoint (create, status, price, parameters, routes,
+    partial, qrcode): requests, latency histogram, retries,
+    rate limited responses and errors by error code
+    (100-104 as assigned by `XmrtoConnection`, 'api' for API errors).
+  * `snapshot()` returns everything as dict,
+    `render_prometheus()` in the Prometheus text format.
+
+    from xmrto_wrapper.xmrto_metrics import REGISTRY
+    print(REGISTRY.quantile(endpoint="status", q=0.99))
+    print(REGISTRY.render_prometheus())
+"""
+
+import collections
+import math
+import threading
+import urllib.parse as urlparse
+
+ENDPOINT_NAMES = {
+    "order_create": "create",
+    "order_create_ln": "create_ln",
+    "order_status_query": "status",
+    "order_check_price": "price",
+    "order_parameter_query": "parameters",
+    "order_ln_check_route": "routes",
+    "order_partial_payment": "partial",
+    "gen_qrcode": "qrcode",
+}
+OTHER_ENDPOINT = "other"
+
+# Seconds.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, math.inf)
+
+
+def endpoint_name(url: str):
+    """Short endpoint name for an API URL."""
+
+    path = urlparse.urlparse(url).path.rstrip("/")
+    return ENDPOINT_NAMES.get(path.rsplit("/", 1)[-1], OTHER_ENDPOINT)
+
+
+class EndpointMetrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.errors = collections.Counter()
+        self.latency_counts = [0] * len(buckets)
+        self.latency_sum = 0.0
+
+    def observe(
+        self, latency: float, retries=0, rate_limited=0, error_code=None
+    ):
+        self.requests += 1
+        self.retries += retries
+        self.rate_limited += rate_limited
+        if error_code is not None:
+            self.errors[str(error_code)] += 1
+        self.latency_sum += latency
+        for index, bound in enumerate(self.buckets):
+            if latency <= bound:
+                self.latency_counts[index] += 1
+                break
+
+    def cumulative_counts(self):
+        counts = []
+        total = 0
+        for count in self.latency_counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, q: float):
+        """Estimate the 'q' quantile by interpolating within the buckets."""
+
+        if not self.requests:
+            return None
+
+        rank = q * self.requests
+        lower_bound = 0.0
+        previous = 0
+        for bound, count in zip(self.buckets, self.cumulative_counts()):
+            if count >= rank:
+                if math.isinf(bound):
+                    # Like Prometheus: the highest finite bucket bound.
+                    return lower_bound
+                in_bucket = count - previous
+                if not in_bucket:
+                    return bound
+                return lower_bound + (bound - lower_bound) * (
+                    (rank - previous) / in_bucket
+                )
+            lower_bound = bound
+            previous = count
+        return lower_bound
+
+    def to_json(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "errors": dict(self.errors),
+            "latency": {
+                "count": self.requests,
+                "sum": self.latency_sum,
+                "buckets": {
+                    format_bound(bound): count
+                    for bound, count in zip(
+                        self.buckets, self.cumulative_counts()
+                    )
+                },
+                "p50": self.quantile(0.5),
+                "p99": self.quantile(0.99),
+            },
+        }
+
+
+def format_bound(bound):
+    if math.isinf(bound):
+        return "+Inf"
+    return repr(float(bound))
+
+
+class MetricsRegistry:
+    PREFIX = "xmrto"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        if not math.isinf(self.buckets[-1]):
+            self.buckets += (math.inf,)
+
+        self.__lock = threading.Lock()
+        self.__endpoints = {}
+
+    def observe(
+        self,
+        endpoint: str,
+        latency: float,
+        retries=0,
+        rate_limited=0,
+        error_code=None,
+    ):
+        with self.__lock:
+            metrics = self.__endpoints.get(endpoint, None)
+            if metrics is None:
+                metrics = EndpointMetrics(buckets=self.buckets)
+                self.__endpoints[endpoint] = metrics
+            metrics.observe(
+                latency=latency,
+                retries=retries,
+                rate_limited=rate_limited,
+                error_code=error_code,
+            )
+
+    def observe_response(
+        self, url: str, latency: float, response, retries=0, rate_limited=0
+    ):
+        """Record a request made by a connection, given its result."""
+
+        error_code = None
+        if isinstance(response, dict) and "error" in response:
+            error_code = response.get("error_code", "api")
+        self.observe(
+            endpoint=endpoint_name(url),
+            latency=latency,
+            retries=retries,
+            rate_limited=rate_limited,
+            error_code=error_code,
+        )
+
+    def quantile(self, endpoint: str, q: float):
+        with self.__lock:
+            metrics = self.__endpoints.get(endpoint, None)
+            if metrics is None:
+                return None
+            return metrics.quantile(q)
+
+    def reset(self):
+        with self.__lock:
+            self.__endpoints.clear()
+
+    def snapshot(self):
+        with self.__lock:
+            return {
+                endpoint: metrics.to_json()
+                for endpoint, metrics in sorted(self.__endpoints.items())
+            }
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+
+        prefix = self.PREFIX
+        with self.__lock:
+            endpoints = sorted(self.__endpoints.items())
+
+            lines = [
+                f"# HELP {prefix}_requests_total Requests made.",
+                f"# TYPE {prefix}_requests_total counter",
+            ]
+            for endpoint, metrics in endpoints:
+                lines.append(
+                    f'{prefix}_requests_total{{endpoint="{endpoint}"}} {metrics.requests}'
+                )
+
+            lines += [
+                f"# HELP {prefix}_retries_total Requests sent again.",
+                f"# TYPE {prefix}_retries_total counter",
+            ]
+            for endpoint, metrics in endpoints:
+                lines.append(
+                    f'{prefix}_retries_total{{endpoint="{endpoint}"}} {metrics.retries}'
+                )
+
+            lines += [
+                f"# HELP {prefix}_rate_limited_total Rate limited responses (403, 429).",
+                f"# TYPE {prefix}_rate_limited_total counter",
+            ]
+            for endpoint, metrics in endpoints:
+                lines.append(
+                    f'{prefix}_rate_limited_total{{endpoint="{endpoint}"}} {metrics.rate_limited}'
+                )
+
+            lines += [
+                f"# HELP {prefix}_errors_total Failed requests by error code.",
+                f"# TYPE {prefix}_errors_total counter",
+            ]
+            for endpoint, metrics in endpoints:
+                for error_code, count in sorted(metrics.errors.items()):
+                    lines.append(
+                        f'{prefix}_errors_total{{endpoint="{endpoint}",error_code="{error_code}"}} {count}'
+                    )
+
+            name = f"{prefix}_request_duration_seconds"
+            lines += [
+                f"# HELP {name} Request latency, including retries.",
+                f"# TYPE {name} histogram",
+            ]
+            for endpoint, metrics in endpoints:
+                for bound, count in zip(
+                    metrics.buckets, metrics.cumulative_counts()
+                ):
+                    lines.append(
+                        f'{name}_bucket{{endpoint="{endpoint}",le="{format_bound(bound)}"}} {count}'
+                    )
+                lines.append(
+                    f'{name}_sum{{endpoint="{endpoint}"}} {metrics.latency_sum}'
+                )
+                lines.append(
+                    f'{name}_count{{endpoint="{endpoint}"}} {metrics.requests}'
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
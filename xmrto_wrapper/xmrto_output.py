@@ -0,0 +1,123 @@
+"""
+Goal:
+  * Output for log pipelines: one line per change, not per poll.
+
+How to:
+  * `--output ndjson` writes every order, price or parameters
+    as one compact JSON line.
+  * `--changes-only` skips snapshots equal to the previous one.
+    Fields changing on every poll (`seconds_till_timeout`)
+    are not considered a change.
+  * `--diff` adds the changed fields, as `{"diff": {field: [old, new]}}`.
+
+    writer = OutputWriter(output="ndjson", changes_only=True, diff=True)
+    writer.write(order)
+"""
+
+import dataclasses
+import json
+import sys
+import threading
+
+TEXT = "text"
+NDJSON = "ndjson"
+OUTPUT_FORMATS = (TEXT, NDJSON)
+
+
+def to_json(value):
+    """The JSON representation of an order, price, parameters, ..."""
+
+    if hasattr(value, "_to_json"):
+        return value._to_json()
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    return value
+
+
+def diff(previous, current):
+    """'{field: [old, new]}' for every field that differs."""
+
+    changes = {}
+    for key in sorted(previous.keys() | current.keys()):
+        old = previous.get(key, None)
+        new = current.get(key, None)
+        if old != new:
+            changes[key] = [old, new]
+    return changes
+
+
+class OutputWriter:
+    # Change on every poll, without anything happening to the order.
+    VOLATILE_FIELDS = ("seconds_till_timeout",)
+
+    def __init__(
+        self,
+        output: str = TEXT,
+        changes_only: bool = False,
+        diff: bool = False,
+        stream=None,
+    ):
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output}'.")
+        self.output = output
+        self.changes_only = changes_only
+        self.diff = diff
+        self.stream = stream
+
+        self.__lock = threading.Lock()
+        self.__previous = {}
+
+    def is_text(self):
+        return self.output == TEXT
+
+    def __significant(self, data):
+        if not isinstance(data, dict):
+            return data
+        return {
+            key: value
+            for key, value in data.items()
+            if key not in self.VOLATILE_FIELDS
+        }
+
+    def write(self, value, key=None, extra=None):
+        """Write 'value', unless nothing changed since the last one.
+
+        :param key: Keeps snapshots apart, e.g. the uuid of an order.
+        :param extra: Fields added to the NDJSON line, e.g. '{"uuid": ...}'.
+        :return: True if written.
+        """
+
+        data = to_json(value)
+        stream = self.stream or sys.stdout
+
+        with self.__lock:
+            previous = self.__previous.get(key, None)
+            significant = self.__significant(data)
+            if (
+                self.changes_only
+                and previous is not None
+                and previous[1] == significant
+            ):
+                return False
+            self.__previous[key] = (data, significant)
+
+            if self.output == TEXT:
+                print(value, file=stream)
+            else:
+                line = dict(extra or {})
+                if isinstance(data, dict):
+                    line.update(data)
+                else:
+                    line["data"] = data
+                if (
+                    self.diff
+                    and previous is not None
+                    and isinstance(data, dict)
+                    and isinstance(previous[0], dict)
+                ):
+                    line["diff"] = diff(previous[0], data)
+                stream.write(
+                    json.dumps(line, separators=(",", ":"), default=str) + "\n"
+                )
+            stream.flush()
+        return True
@@ -0,0 +1,268 @@
+"""
+Goal:
+  * Keep a price monitor running for days in constant memory,
+    and answer "what was the rate over the last N minutes".
+
+How to:
+  * A `PriceHistory` is a ring buffer of `capacity` samples
+    (timestamp, rate, amount), kept in three arrays of doubles.
+    Once full, every new sample replaces the oldest one.
+  * `add_price()` appends a `PriceV3` as returned by
+    `XmrtoApi.order_check_price()`, `append()` any rate and amount.
+  * `ohlc(seconds)` aggregates the samples of the last 'seconds':
+    open, high, low, close and the volume weighted average rate (VWAP).
+    `bars(interval)` does so per interval.
+  * `dump()` writes the buffer to a compact binary file, `load()` reads it.
+  * `xmrto_wrapper check-price --follow --window 300 --history-file history.bin`
+
+    history = PriceHistory(capacity=3600)
+    history.add_price(price)
+    print(history.ohlc(seconds=300))
+"""
+
+import array
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict
+
+# Magic, format version, capacity, number of samples.
+HEADER = struct.Struct(">4sHII")
+MAGIC = b"XPH1"
+VERSION = 1
+
+
+@dataclass
+class Ohlc:
+    start: float = 0.0
+    end: float = 0.0
+    open: float = 0.0
+    high: float = 0.0
+    low: float = 0.0
+    close: float = 0.0
+    vwap: float = 0.0
+    volume: float = 0.0
+    count: int = 0
+
+    def _to_json(self):
+        return asdict(self)
+
+    def __str__(self):
+        return json.dumps(self._to_json())
+
+
+class PriceHistory:
+    # A day of 'check-price --follow'.
+    CAPACITY = 86400
+
+    def __init__(self, capacity: int = CAPACITY):
+        if capacity <= 0:
+            raise ValueError("The capacity has to be positive.")
+        self.capacity = capacity
+
+        self.__lock = threading.Lock()
+        self.__timestamps = array.array("d", bytes(8 * capacity))
+        self.__rates = array.array("d", bytes(8 * capacity))
+        self.__amounts = array.array("d", bytes(8 * capacity))
+        # Position of the oldest sample, number of samples.
+        self.__start = 0
+        self.__count = 0
+
+    def __len__(self):
+        with self.__lock:
+            return self.__count
+
+    def append(self, rate, amount=0.0, timestamp: float = None):
+        """Add a sample, replacing the oldest one if full.
+
+        Samples are expected in time order.
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+        with self.__lock:
+            if self.__count < self.capacity:
+                position = (self.__start + self.__count) % self.capacity
+                self.__count += 1
+            else:
+                position = self.__start
+                self.__start = (self.__start + 1) % self.capacity
+            self.__timestamps[position] = timestamp
+            self.__rates[position] = float(rate)
+            self.__amounts[position] = float(amount or 0)
+
+    def add_price(self, price, timestamp: float = None):
+        """Add a `PriceV3`: its rate, weighted by its BTC amount.
+
+        :return: False if the price has no (valid) rate and was skipped.
+        """
+
+        try:
+            rate = float(price.in_out_rate)
+        except (TypeError, ValueError):
+            return False
+        if not math.isfinite(rate):
+            return False
+
+        self.append(
+            rate=rate,
+            amount=price.out_amount,
+            timestamp=timestamp,
+        )
+        return True
+
+    def __position(self, index):
+        return (self.__start + index) % self.capacity
+
+    def __first_index(self, since):
+        """Index of the first sample not older than 'since'."""
+
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__timestamps[self.__position(middle)] < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def samples(self, seconds: float = None, now: float = None):
+        """'(timestamp, rate, amount)' of the last 'seconds', oldest first."""
+
+        with self.__lock:
+            first = 0
+            if seconds is not None:
+                if now is None:
+                    now = time.time()
+                first = self.__first_index(since=now - seconds)
+            positions = [
+                self.__position(index) for index in range(first, self.__count)
+            ]
+            return [
+                (
+                    self.__timestamps[position],
+                    self.__rates[position],
+                    self.__amounts[position],
+                )
+                for position in positions
+            ]
+
+    @classmethod
+    def _aggregate(cls, samples):
+        if not samples:
+            return None
+
+        rates = [rate for _, rate, _ in samples]
+        volume = sum(amount for _, _, amount in samples)
+        if volume:
+            vwap = sum(rate * amount for _, rate, amount in samples) / volume
+        else:
+            vwap = sum(rates) / len(rates)
+        return Ohlc(
+            start=samples[0][0],
+            end=samples[-1][0],
+            open=rates[0],
+            high=max(rates),
+            low=min(rates),
+            close=rates[-1],
+            vwap=vwap,
+            volume=volume,
+            count=len(samples),
+        )
+
+    def ohlc(self, seconds: float = None, now: float = None):
+        """`Ohlc` of the last 'seconds' (all samples if None).
+
+        :return: None without samples in that window.
+        """
+
+        return self._aggregate(self.samples(seconds=seconds, now=now))
+
+    def bars(self, interval: float, seconds: float = None, now: float = None):
+        """An `Ohlc` per 'interval' seconds with samples, oldest first."""
+
+        bars = []
+        bucket = None
+        bucket_samples = []
+        for sample in self.samples(seconds=seconds, now=now):
+            sample_bucket = sample[0] // interval
+            if sample_bucket != bucket and bucket_samples:
+                bars.append(self._aggregate(bucket_samples))
+                bucket_samples = []
+            bucket = sample_bucket
+            bucket_samples.append(sample)
+        if bucket_samples:
+            bars.append(self._aggregate(bucket_samples))
+        return bars
+
+    def dumps(self):
+        """The samples, oldest first, as big endian doubles."""
+
+        with self.__lock:
+            header = HEADER.pack(MAGIC, VERSION, self.capacity, self.__count)
+            start = self.__start
+            end = start + self.__count
+            columns = []
+            for values in (self.__timestamps, self.__rates, self.__amounts):
+                column = values[start:end]
+                if end > self.capacity:
+                    # Wrapped around, the newest samples are at the front.
+                    wrapped = end - self.capacity
+                    column.extend(values[:wrapped])
+                columns.append(column)
+
+        data = header
+        for column in columns:
+            if sys.byteorder == "little":
+                column.byteswap()
+            data += column.tobytes()
+        return data
+
+    @classmethod
+    def loads(cls, data, capacity: int = None):
+        """A `PriceHistory` from 'dumps()'.
+
+        :param capacity: Defaults to the capacity dumped.
+            With a smaller one, only the newest samples are kept.
+        :raises ValueError: Not a dumped price history.
+        """
+
+        if len(data) < HEADER.size:
+            raise ValueError("Not a price history, too short.")
+        magic, version, dumped_capacity, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a price history.")
+        size = 8 * count
+        if len(data) != HEADER.size + 3 * size:
+            raise ValueError("Truncated price history.")
+
+        columns = []
+        for start in range(HEADER.size, len(data), size or 1):
+            end = start + size
+            column = array.array("d")
+            column.frombytes(data[start:end])
+            if sys.byteorder == "little":
+                column.byteswap()
+            columns.append(column)
+
+        history = cls(capacity=capacity or dumped_capacity)
+        for timestamp, rate, amount in zip(*columns):
+            history.append(rate=rate, amount=amount, timestamp=timestamp)
+        return history
+
+    def dump(self, path: str):
+        """Write 'dumps()' to 'path', replacing it atomically."""
+
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as history_file:
+            history_file.write(self.dumps())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str, capacity: int = None):
+        with open(path, "rb") as history_file:
+            return cls.loads(history_file.read(), capacity=capacity)
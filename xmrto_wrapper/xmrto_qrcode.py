@@ -0,0 +1,519 @@
+"""
+Goal:
+  * Show payment QR codes without asking XMR.to for them,
+    no rate limit budget and no round trip per QR code.
+
+How to:
+  * `encode()` encodes data as QR code (ISO/IEC 18004, byte mode,
+    versions 1 to 40), `render()` as PNG or SVG image,
+    sized like the images of XMR.to's `gen_qrcode`.
+  * `monero_uri()` builds the `monero:` URI to pay an order,
+    from its `payment_subaddress` and `in_amount_remaining`.
+  * `xmrto_wrapper qrcode --backend local --data "monero:..." --format svg`
+
+    uri = monero_uri(address=order.payment_subaddress, amount=order.in_amount_remaining)
+    with open("qrcode.png", "wb") as qrcode_file:
+        qrcode_file.write(render(uri))
+"""
+
+import urllib.parse as urlparse
+from decimal import Decimal
+
+from ._png import encode_png
+
+LOCAL = "local"
+REMOTE = "remote"
+BACKENDS = (LOCAL, REMOTE)
+
+PNG = "png"
+SVG = "svg"
+IMAGE_FORMATS = (PNG, SVG)
+
+# Error correction levels, recovering 7%, 15%, 25% and 30% of the data.
+LOW = "L"
+MEDIUM = "M"
+QUARTILE = "Q"
+HIGH = "H"
+FORMAT_BITS = {LOW: 1, MEDIUM: 0, QUARTILE: 3, HIGH: 2}
+
+# Pixels per module and modules of quiet zone, as 'gen_qrcode'.
+SCALE = 8
+BORDER = 4
+
+MIN_VERSION = 1
+MAX_VERSION = 40
+
+# Per version (index 0 unused).
+ECC_CODEWORDS_PER_BLOCK = {
+    LOW: (
+        (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24)
+        + (28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30)
+        + (30, 30, 30, 30, 30, 30, 30, 30)
+    ),
+    MEDIUM: (
+        (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24)
+        + (28, 28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28)
+        + (28, 28, 28, 28, 28, 28, 28, 28, 28)
+    ),
+    QUARTILE: (
+        (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30)
+        + (24, 28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30)
+        + (30, 30, 30, 30, 30, 30, 30, 30, 30)
+    ),
+    HIGH: (
+        (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24)
+        + (30, 28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30)
+        + (30, 30, 30, 30, 30, 30, 30, 30, 30)
+    ),
+}
+ECC_BLOCKS = {
+    LOW: (
+        (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8)
+        + (8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20)
+        + (21, 22, 24, 25)
+    ),
+    MEDIUM: (
+        (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14)
+        + (16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38)
+        + (40, 43, 45, 47, 49)
+    ),
+    QUARTILE: (
+        (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18)
+        + (21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51)
+        + (53, 56, 59, 62, 65, 68)
+    ),
+    HIGH: (
+        (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21)
+        + (25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60)
+        + (63, 66, 70, 74, 77, 81)
+    ),
+}
+
+# Byte mode indicator and padding codewords.
+BYTE_MODE = 0b0100
+PAD_CODEWORDS = (0xEC, 0x11)
+
+# Penalty weights of the mask evaluation.
+PENALTY_RUN = 3
+PENALTY_BLOCK = 3
+PENALTY_FINDER_LIKE = 40
+PENALTY_BALANCE = 10
+FINDER_LIKE = ("10111010000", "00001011101")
+
+# GF(256) with the QR code polynomial, for Reed-Solomon.
+GF_EXP = [0] * 512
+GF_LOG = [0] * 256
+_value = 1
+for _exponent in range(255):
+    GF_EXP[_exponent] = _value
+    GF_LOG[_value] = _exponent
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+for _exponent in range(255, 512):
+    GF_EXP[_exponent] = GF_EXP[_exponent - 255]
+
+
+def _multiply(x, y):
+    if x == 0 or y == 0:
+        return 0
+    return GF_EXP[GF_LOG[x] + GF_LOG[y]]
+
+
+def _rs_divisor(degree):
+    """Coefficients of the Reed-Solomon generator, highest first."""
+
+    divisor = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for index in range(degree):
+            divisor[index] = _multiply(divisor[index], root)
+            if index + 1 < degree:
+                divisor[index] ^= divisor[index + 1]
+        root = _multiply(root, 0x02)
+    return divisor
+
+
+def _rs_remainder(data, divisor):
+    remainder = [0] * len(divisor)
+    for byte in data:
+        factor = byte ^ remainder.pop(0)
+        remainder.append(0)
+        for index, coefficient in enumerate(divisor):
+            remainder[index] ^= _multiply(coefficient, factor)
+    return remainder
+
+
+def _raw_modules(version):
+    """Modules available for data and error correction."""
+
+    modules = (16 * version + 128) * version + 64
+    if version >= 2:
+        alignments = version // 7 + 2
+        modules -= (25 * alignments - 10) * alignments - 55
+        if version >= 7:
+            modules -= 36
+    return modules
+
+
+def data_capacity(version, level=MEDIUM):
+    """Data codewords (bytes) of a version and error correction level."""
+
+    return (
+        _raw_modules(version) // 8
+        - ECC_CODEWORDS_PER_BLOCK[level][version] * ECC_BLOCKS[level][version]
+    )
+
+
+def _alignment_positions(version):
+    if version == 1:
+        return []
+    size = version * 4 + 17
+    alignments = version // 7 + 2
+    if version == 32:
+        step = 26
+    else:
+        step = (version * 4 + alignments * 2 + 1) // (alignments * 2 - 2) * 2
+    positions = [size - 7 - index * step for index in range(alignments - 1)]
+    return [6] + sorted(positions)
+
+
+def _to_bits(value, length):
+    return [(value >> bit) & 1 for bit in reversed(range(length))]
+
+
+def _codewords(data: bytes, version, level):
+    """Data codewords, padded to the capacity of 'version'."""
+
+    count_length = 8 if version < 10 else 16
+    bits = _to_bits(BYTE_MODE, 4) + _to_bits(len(data), count_length)
+    for byte in data:
+        bits += _to_bits(byte, 8)
+
+    capacity = data_capacity(version, level) * 8
+    bits += [0] * min(4, capacity - len(bits))
+    bits += [0] * (-len(bits) % 8)
+
+    codewords = []
+    for start in range(0, len(bits), 8):
+        end = start + 8
+        codewords.append(int("".join(map(str, bits[start:end])), 2))
+    pad = 0
+    while len(codewords) < capacity // 8:
+        codewords.append(PAD_CODEWORDS[pad % 2])
+        pad += 1
+    return codewords
+
+
+def _interleave(codewords, version, level):
+    """Split into blocks, add error correction, interleave the blocks."""
+
+    blocks_count = ECC_BLOCKS[level][version]
+    ecc_length = ECC_CODEWORDS_PER_BLOCK[level][version]
+    raw_codewords = _raw_modules(version) // 8
+    short_blocks = blocks_count - raw_codewords % blocks_count
+    short_length = raw_codewords // blocks_count
+
+    divisor = _rs_divisor(ecc_length)
+    blocks = []
+    start = 0
+    for index in range(blocks_count):
+        end = start + short_length - ecc_length + (index >= short_blocks)
+        block = codewords[start:end]
+        start = end
+        ecc = _rs_remainder(block, divisor)
+        if index < short_blocks:
+            # Placeholder, so all blocks have the same length.
+            block.append(0)
+        blocks.append(block + ecc)
+
+    result = []
+    for position in range(len(blocks[0])):
+        for index, block in enumerate(blocks):
+            if position != short_length - ecc_length or index >= short_blocks:
+                result.append(block[position])
+    return result
+
+
+class _Matrix:
+    def __init__(self, version):
+        self.version = version
+        self.size = version * 4 + 17
+        self.modules = [[False] * self.size for _ in range(self.size)]
+        self.function = [[False] * self.size for _ in range(self.size)]
+
+    def set_function(self, x, y, dark):
+        self.modules[y][x] = bool(dark)
+        self.function[y][x] = True
+
+    def draw_function_patterns(self):
+        size = self.size
+        for index in range(size):
+            self.set_function(6, index, index % 2 == 0)
+            self.set_function(index, 6, index % 2 == 0)
+
+        for x, y in ((3, 3), (size - 4, 3), (3, size - 4)):
+            self.draw_finder(x, y)
+
+        positions = _alignment_positions(self.version)
+        last = len(positions) - 1
+        for i, x in enumerate(positions):
+            for j, y in enumerate(positions):
+                # Not on top of the finder patterns.
+                if (i, j) not in ((0, 0), (0, last), (last, 0)):
+                    self.draw_alignment(x, y)
+
+        # Reserved, drawn once the mask is chosen.
+        self.draw_format(0)
+        self.draw_version()
+
+    def draw_finder(self, x, y):
+        for dy in range(-4, 5):
+            for dx in range(-4, 5):
+                if 0 <= x + dx < self.size and 0 <= y + dy < self.size:
+                    distance = max(abs(dx), abs(dy))
+                    self.set_function(x + dx, y + dy, distance not in (2, 4))
+
+    def draw_alignment(self, x, y):
+        for dy in range(-2, 3):
+            for dx in range(-2, 3):
+                self.set_function(x + dx, y + dy, max(abs(dx), abs(dy)) != 1)
+
+    def draw_format(self, format_bits):
+        remainder = format_bits
+        for _ in range(10):
+            remainder = (remainder << 1) ^ ((remainder >> 9) * 0x537)
+        bits = (format_bits << 10 | remainder) ^ 0x5412
+
+        def bit(index):
+            return (bits >> index) & 1
+
+        size = self.size
+        for index in range(6):
+            self.set_function(8, index, bit(index))
+        self.set_function(8, 7, bit(6))
+        self.set_function(8, 8, bit(7))
+        self.set_function(7, 8, bit(8))
+        for index in range(9, 15):
+            self.set_function(14 - index, 8, bit(index))
+
+        for index in range(8):
+            self.set_function(size - 1 - index, 8, bit(index))
+        for index in range(8, 15):
+            self.set_function(8, size - 15 + index, bit(index))
+        # Always dark.
+        self.set_function(8, size - 8, True)
+
+    def draw_version(self):
+        if self.version < 7:
+            return
+        remainder = self.version
+        for _ in range(12):
+            remainder = (remainder << 1) ^ ((remainder >> 11) * 0x1F25)
+        bits = self.version << 12 | remainder
+
+        for index in range(18):
+            dark = (bits >> index) & 1
+            a = self.size - 11 + index % 3
+            b = index // 3
+            self.set_function(a, b, dark)
+            self.set_function(b, a, dark)
+
+    def draw_codewords(self, codewords):
+        bits = len(codewords) * 8
+        index = 0
+        right = self.size - 1
+        while right >= 1:
+            if right == 6:
+                # Skip the vertical timing pattern.
+                right = 5
+            upward = (right + 1) & 2 == 0
+            for vertical in range(self.size):
+                y = self.size - 1 - vertical if upward else vertical
+                for x in (right, right - 1):
+                    if not self.function[y][x] and index < bits:
+                        byte = codewords[index >> 3]
+                        self.modules[y][x] = bool(byte >> (7 - index % 8) & 1)
+                        index += 1
+            right -= 2
+
+    def masked(self, mask):
+        condition = MASKS[mask]
+        return [
+            [
+                module != (not self.function[y][x] and condition(x, y))
+                for x, module in enumerate(row)
+            ]
+            for y, row in enumerate(self.modules)
+        ]
+
+
+MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+
+def _penalty(rows):
+    """Penalty of a masked matrix, the lowest one is used."""
+
+    size = len(rows)
+    columns = [list(column) for column in zip(*rows)]
+    penalty = 0
+
+    for line in rows + columns:
+        run = 1
+        for previous, module in zip(line, line[1:]):
+            if module == previous:
+                run += 1
+                continue
+            if run >= 5:
+                penalty += PENALTY_RUN + run - 5
+            run = 1
+        if run >= 5:
+            penalty += PENALTY_RUN + run - 5
+
+        text = "".join("1" if module else "0" for module in line)
+        for pattern in FINDER_LIKE:
+            start = text.find(pattern)
+            while start >= 0:
+                penalty += PENALTY_FINDER_LIKE
+                start = text.find(pattern, start + 1)
+
+    for y in range(size - 1):
+        for x in range(size - 1):
+            module = rows[y][x]
+            if (
+                module == rows[y][x + 1]
+                and module == rows[y + 1][x]
+                and module == rows[y + 1][x + 1]
+            ):
+                penalty += PENALTY_BLOCK
+
+    dark = sum(sum(row) for row in rows)
+    total = size * size
+    deviation = (abs(dark * 20 - total * 10) + total - 1) // total - 1
+    penalty += deviation * PENALTY_BALANCE
+    return penalty
+
+
+def version_for(data: bytes, level=MEDIUM):
+    """The smallest version 'data' fits in.
+
+    :raises ValueError: Too much data for a QR code.
+    """
+
+    for version in range(MIN_VERSION, MAX_VERSION + 1):
+        count_length = 8 if version < 10 else 16
+        bits = 4 + count_length + 8 * len(data)
+        if len(data) < 1 << count_length and (
+            bits <= data_capacity(version, level) * 8
+        ):
+            return version
+    raise ValueError(f"{len(data)} bytes are too much for a QR code.")
+
+
+def encode(data, level=MEDIUM, mask: int = None):
+    """The modules of the QR code for 'data', rows of booleans.
+
+    :param level: Error correction level, `LOW`, `MEDIUM`,
+        `QUARTILE` or `HIGH`.
+    :param mask: 0 to 7, by default the mask with the lowest penalty.
+    :raises ValueError: Too much data for a QR code.
+    """
+
+    if isinstance(data, str):
+        data = data.encode()
+    if level not in FORMAT_BITS:
+        raise ValueError(f"Unknown error correction level '{level}'.")
+
+    version = version_for(data, level=level)
+    matrix = _Matrix(version)
+    matrix.draw_function_patterns()
+    matrix.draw_codewords(
+        _interleave(_codewords(data, version, level), version, level)
+    )
+
+    masks = range(len(MASKS)) if mask is None else [mask]
+    best = None
+    for mask_ in masks:
+        matrix.draw_format(FORMAT_BITS[level] << 3 | mask_)
+        rows = matrix.masked(mask_)
+        penalty = _penalty(rows) if mask is None else 0
+        if best is None or penalty < best[0]:
+            best = (penalty, rows)
+    return best[1]
+
+
+def encode_svg(rows, scale: int = SCALE, border: int = BORDER):
+    """SVG image of rows of modules, one path for all dark modules."""
+
+    size = (len(rows) + 2 * border) * scale
+    path = []
+    for y, row in enumerate(rows):
+        x = 0
+        while x < len(row):
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < len(row) and row[x]:
+                x += 1
+            # A rectangle per run of dark modules.
+            width = x - start
+            path.append(f"M{start + border},{y + border}h{width}v1h-{width}z")
+
+    modules = len(rows) + 2 * border
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<svg xmlns="http://www.w3.org/2000/svg"'
+        f' width="{size}" height="{size}"'
+        f' viewBox="0 0 {modules} {modules}" shape-rendering="crispEdges">'
+        f'<rect width="{modules}" height="{modules}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(path)}"/>'
+        "</svg>\n"
+    )
+
+
+def render(
+    data,
+    image_format=PNG,
+    scale: int = SCALE,
+    border: int = BORDER,
+    level=MEDIUM,
+):
+    """The QR code for 'data' as PNG or SVG image, as bytes.
+
+    :raises ValueError: Unknown format or too much data for a QR code.
+    """
+
+    rows = encode(data, level=level)
+    if image_format == PNG:
+        return encode_png(rows, scale=scale, border=border)
+    if image_format == SVG:
+        return encode_svg(rows, scale=scale, border=border).encode()
+    raise ValueError(f"Unknown image format '{image_format}'.")
+
+
+def monero_uri(address: str, amount=None, description: str = None):
+    """'monero:' URI to pay 'amount' XMR to 'address'.
+
+    Without amount (or amount 0), the wallet asks for it.
+    """
+
+    parameters = {}
+    if amount is not None and Decimal(str(amount)) > 0:
+        parameters["tx_amount"] = f"{Decimal(str(amount)).normalize():f}"
+    if description:
+        parameters["tx_description"] = description
+
+    uri = f"monero:{address}"
+    if parameters:
+        uri += "?" + urlparse.urlencode(parameters, quote_via=urlparse.quote)
+    return uri
@@ -0,0 +1,161 @@
+"""
+Goal:
+  * Serve QR codes that were generated before from disk,
+    instead of asking XMR.to again for the same data.
+
+How to:
+  * Pass a `QrCodeCache` to `XmrtoApi(qrcode_cache=...)`,
+    `generate_qrcode(cache=...)` or `generate_qrcodes(cache=...)`.
+  * Images are stored by the SHA256 of their data (content addressed),
+    in 256 shard directories: `<directory>/<first 2 hex digits>/<hash>.png`.
+  * Once the images take more than `max_size` bytes,
+    the least recently used ones are deleted.
+    Their use is remembered by the file modification time,
+    so a restarted process evicts in the same order.
+  * `xmrto_wrapper qrcode --file data.txt --cache-dir ~/.cache/xmrto_qrcodes`
+
+    cache = QrCodeCache(directory="qrcodes")
+    xmrto_api = XmrtoApi(url="https://test.xmr.to", qrcode_cache=cache)
+    qrcode, error = xmrto_api.download_qrcode(data=address)
+"""
+
+import collections
+import hashlib
+import os
+import threading
+
+
+class QrCodeCache:
+    # 64 MiB, some ten thousand QR codes.
+    MAX_SIZE = 64 * 1024 * 1024
+    SUFFIX = ".png"
+
+    def __init__(self, directory: str, max_size: int = MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+        self.__lock = threading.Lock()
+        # Hash -> size, least recently used first.
+        self.__entries = collections.OrderedDict()
+        self.__size = 0
+        self.__stats = collections.Counter()
+        self.__scan()
+
+    @classmethod
+    def key(cls, data):
+        """Hex SHA256 of the QR code data."""
+
+        if isinstance(data, str):
+            data = data.encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+
+    def path(self, data):
+        """Where the QR code for 'data' is (or would be) stored."""
+
+        return self._path(self.key(data))
+
+    def __scan(self):
+        """Index the stored QR codes, oldest modification first."""
+
+        entries = []
+        os.makedirs(self.directory, exist_ok=True)
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                stat = entry.stat()
+                key = os.path.splitext(entry.name)[0]
+                entries.append((stat.st_mtime, key, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self.__entries[key] = size
+            self.__size += size
+        self.__evict()
+
+    def __contains__(self, data):
+        with self.__lock:
+            return self.key(data) in self.__entries
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__entries)
+
+    def get(self, data):
+        """The stored QR code image as bytes, None if not stored."""
+
+        key = self.key(data)
+        with self.__lock:
+            if key not in self.__entries:
+                self.__stats["misses"] += 1
+                return None
+            self.__entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as qrcode_file:
+                qrcode = qrcode_file.read()
+            os.utime(path)
+        except (FileNotFoundError):
+            # Evicted by another process.
+            with self.__lock:
+                size = self.__entries.pop(key, None)
+                if size is not None:
+                    self.__size -= size
+                self.__stats["misses"] += 1
+            return None
+
+        with self.__lock:
+            self.__stats["hits"] += 1
+        return qrcode
+
+    def put(self, data, qrcode: bytes):
+        """Store the QR code image for 'data', evicting if too big."""
+
+        key = self.key(data)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per thread, so concurrent writers do not clash.
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as qrcode_file:
+            qrcode_file.write(qrcode)
+        os.replace(temporary_path, path)
+
+        with self.__lock:
+            self.__size -= self.__entries.pop(key, 0)
+            self.__entries[key] = len(qrcode)
+            self.__size += len(qrcode)
+            self.__evict()
+
+    def __evict(self):
+        # The newest entry is kept, even if bigger than 'max_size'.
+        while self.__size > self.max_size and len(self.__entries) > 1:
+            key, size = self.__entries.popitem(last=False)
+            self.__size -= size
+            self.__stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except (FileNotFoundError):
+                pass
+
+    def clear(self):
+        with self.__lock:
+            for key in self.__entries:
+                try:
+                    os.remove(self._path(key))
+                except (FileNotFoundError):
+                    pass
+            self.__entries.clear()
+            self.__size = 0
+
+    def get_stats(self):
+        with self.__lock:
+            stats = {"hits": 0, "misses": 0, "evictions": 0}
+            stats.update(self.__stats)
+            stats["entries"] = len(self.__entries)
+            stats["size"] = self.__size
+        return stats
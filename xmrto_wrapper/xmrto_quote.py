@@ -0,0 +1,271 @@
+"""
+Goal:
+  * Quote many amounts at once, without one price request per amount.
+
+How to:
+  * A `QuoteEngine` fetches the order parameters and the rate
+    (`incoming_price_btc`) once, and keeps them for `ttl` seconds.
+  * `quote()` derives the BTC and XMR amounts for a whole list
+    (or array, anything iterable) of amounts locally.
+    The result is column oriented and carries the time the rate was fetched.
+  * Amounts outside the order limits get an error, as `OrderValidator`
+    would report it, instead of an amount.
+  * With `verify=True`, every refresh also asks XMR.to for one amount
+    and compares the result with the derived one.
+
+    engine = QuoteEngine(url="https://test.xmr.to")
+    quotes = engine.quote([0.001, 0.005, 0.01], currency="BTC")
+    for price in quotes.prices():
+        print(price)
+    print(quotes.age())
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation, ROUND_UP
+from typing import List
+
+from .xmrto_wrapper import (
+    logger,
+    XmrtoApi,
+    OrderValidator,
+    PriceV3,
+    XMRTO_URL_DEFAULT,
+    API_VERSION_DEFAULT,
+)
+
+# XMR.to quotes BTC to the satoshi, XMR rounded up to 4 decimals.
+BTC = Decimal("0.00000001")
+XMR = Decimal("0.0001")
+
+
+@dataclass
+class Quotes:
+    currency: str = "BTC"
+    in_out_rate: Decimal = None
+    # Time (time.time()) the rate was fetched.
+    fetched_at: float = 0.0
+    amounts: List[Decimal] = field(default_factory=list)
+    # BTC, None for amounts outside the limits.
+    out_amounts: List[Decimal] = field(default_factory=list)
+    # XMR, None for amounts outside the limits.
+    in_amounts: List[Decimal] = field(default_factory=list)
+    zero_conf: List[bool] = field(default_factory=list)
+    errors: List[dict] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def age(self, now: float = None):
+        """Seconds since the rate was fetched."""
+
+        if now is None:
+            now = time.time()
+        return now - self.fetched_at
+
+    def prices(self):
+        """A `PriceV3` per amount, as `XmrtoApi.order_check_price()`.
+
+        None for amounts outside the limits.
+        The number of confirmations is only known for zero conf amounts.
+        """
+
+        for out_amount, in_amount, zero_conf in zip(
+            self.out_amounts, self.in_amounts, self.zero_conf
+        ):
+            if out_amount is None:
+                yield None
+                continue
+            price = PriceV3()
+            price.out_amount = str(out_amount)
+            price.in_amount = str(in_amount)
+            price.in_out_rate = str(self.in_out_rate)
+            price.in_num_confirmations_remaining = 0 if zero_conf else None
+            yield price
+
+
+class QuoteEngine:
+    TTL = 5
+    # Derived and actual XMR amount may differ by rounding.
+    TOLERANCE = XMR
+
+    def __init__(
+        self,
+        url=XMRTO_URL_DEFAULT,
+        api=API_VERSION_DEFAULT,
+        connection=None,
+        ttl: float = TTL,
+        verify: bool = False,
+        validator: OrderValidator = None,
+    ):
+        self.xmrto_api = XmrtoApi(url=url, api=api, connection=connection)
+        self.ttl = ttl
+        self.verify = verify
+        self.validator = validator or OrderValidator()
+
+        self.__lock = threading.Lock()
+        self.__parameters = None
+        self.__rate = None
+        self.__fetched_at = 0.0
+        self.__updated = 0.0
+
+    def get_rate(self):
+        """'(rate, parameters, fetched_at)', refreshed if older than 'ttl'.
+
+        :return: '(None, None, 0.0)' if they could not be fetched.
+        """
+
+        with self.__lock:
+            if (
+                self.__rate is None
+                or time.monotonic() - self.__updated >= self.ttl
+            ):
+                self.__refresh()
+            return self.__rate, self.__parameters, self.__fetched_at
+
+    def __refresh(self):
+        parameters, error = self.xmrto_api.order_check_parameters()
+        if error:
+            logger.error(f"No order parameters, no quotes: {error}.")
+            return
+        # An amount within the limits, to learn the rate.
+        price, error = self.xmrto_api.order_check_price(
+            btc_amount=parameters.lower_limit
+        )
+        if error:
+            logger.error(f"No price, no quotes: {error}.")
+            return
+
+        rate = self.validator.to_decimal(price.in_out_rate)
+        if rate is None or rate <= 0:
+            logger.error(f"Invalid rate '{price.in_out_rate}', no quotes.")
+            return
+
+        self.__parameters = parameters
+        self.__rate = rate
+        self.__fetched_at = time.time()
+        self.__updated = time.monotonic()
+        self.validator.set_parameters(parameters)
+        logger.debug(f"Quoting at {self.__rate} BTC per XMR.")
+
+        if self.verify:
+            self.__verify(parameters=parameters)
+
+    def __verify(self, parameters):
+        upper_limit = self.validator.to_decimal(parameters.upper_limit)
+        if upper_limit is None:
+            return
+        amount = upper_limit / 2
+        quotes = self._quote(
+            amounts=[amount],
+            currency="BTC",
+            rate=self.__rate,
+            parameters=parameters,
+            fetched_at=self.__fetched_at,
+        )
+        matches, price = self.verify_sample(quotes=quotes)
+        if not matches:
+            logger.warning(
+                f"Derived quote {quotes.in_amounts[0]} XMR for {amount} BTC,"
+                f" XMR.to quotes {price and price.in_amount} XMR."
+            )
+
+    def verify_sample(self, quotes, index: int = 0):
+        """Ask XMR.to for one of the quoted amounts.
+
+        :return: '(matches, price)', the price as returned by XMR.to.
+        """
+
+        if quotes.out_amounts[index] is None:
+            return False, None
+        if quotes.currency == "XMR":
+            price, error = self.xmrto_api.order_check_price(
+                xmr_amount=quotes.amounts[index]
+            )
+        else:
+            price, error = self.xmrto_api.order_check_price(
+                btc_amount=quotes.amounts[index]
+            )
+        if error:
+            return False, None
+
+        to_decimal = self.validator.to_decimal
+        try:
+            matches = (
+                to_decimal(price.in_out_rate) == quotes.in_out_rate
+                and abs(to_decimal(price.in_amount) - quotes.in_amounts[index])
+                <= self.TOLERANCE
+                and abs(
+                    to_decimal(price.out_amount) - quotes.out_amounts[index]
+                )
+                <= BTC
+            )
+        except (TypeError, InvalidOperation):
+            matches = False
+        return matches, price
+
+    def _quote(self, amounts, currency, rate, parameters, fetched_at):
+        quotes = Quotes(
+            currency=currency.upper(),
+            in_out_rate=rate,
+            fetched_at=fetched_at,
+        )
+        zero_conf_max_amount = self.validator.to_decimal(
+            parameters.zero_conf_max_amount
+        )
+
+        for amount in amounts:
+            error = self.validator.check_amount(
+                parameters=parameters, amount=amount, currency=quotes.currency
+            )
+            if error:
+                quotes.amounts.append(amount)
+                quotes.out_amounts.append(None)
+                quotes.in_amounts.append(None)
+                quotes.zero_conf.append(False)
+                quotes.errors.append(error)
+                continue
+
+            amount = Decimal(str(amount))
+            if quotes.currency == "XMR":
+                out_amount = (amount * rate).quantize(BTC)
+                in_amount = amount.quantize(XMR, rounding=ROUND_UP)
+            else:
+                out_amount = amount.quantize(BTC)
+                in_amount = (amount / rate).quantize(XMR, rounding=ROUND_UP)
+
+            quotes.amounts.append(amount)
+            quotes.out_amounts.append(out_amount)
+            quotes.in_amounts.append(in_amount)
+            quotes.zero_conf.append(
+                bool(parameters.zero_conf_enabled)
+                and zero_conf_max_amount is not None
+                and out_amount <= zero_conf_max_amount
+            )
+            quotes.errors.append(None)
+
+        return quotes
+
+    def quote(self, amounts, currency="BTC"):
+        """Quotes for all 'amounts' (in 'currency'), from one rate.
+
+        :return: '(quotes, error)'
+        """
+
+        rate, parameters, fetched_at = self.get_rate()
+        if rate is None:
+            return None, {
+                "error": "No rate.",
+                "error_msg": "Could not fetch the order parameters or price.",
+            }
+        return (
+            self._quote(
+                amounts=amounts,
+                currency=currency,
+                rate=rate,
+                parameters=parameters,
+                fetched_at=fetched_at,
+            ),
+            None,
+        )
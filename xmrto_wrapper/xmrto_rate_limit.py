@@ -0,0 +1,343 @@
+"""
+Goal:
+  * Stay below the XMR.to endpoint rate limit, instead of running into it.
+
+How to:
+  * Pass a `RateLimiter` to `XmrtoConnection(rate_limiter=...)`
+    or `XmrtoApi(rate_limiter=...)`.
+  * Every host gets a token bucket: `rate` requests per second,
+    with bursts of up to `burst` requests.
+  * Rate limited responses (403, 429) are retried after an exponential
+    backoff with jitter, or after the time given by `Retry-After`.
+    The backoff applies to every request to that host.
+  * To share one budget between all processes on a machine,
+    e.g. web server workers and cron jobs, use a `SharedTokenBucket`,
+    or set `XMRTO_RATE_LIMIT_DB` to the path of its database file.
+"""
+
+import collections
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+RATE_LIMIT_DB_DEFAULT = os.path.join(
+    tempfile.gettempdir(), "xmrto_wrapper_rate_limit.sqlite"
+)
+
+
+def default_caller():
+    """Identifies the process in the wait statistics."""
+
+    return f"{os.path.basename(sys.argv[0]) or 'python'}[{os.getpid()}]"
+
+
+class TokenBucket:
+    """Token buckets per key, kept in memory.
+
+    Tokens are reserved ahead of time: a reservation that cannot be served
+    right away returns the seconds to wait until it is due.
+    """
+
+    def __init__(self, rate: float, burst: float, caller: str = None):
+        self.rate = rate
+        self.burst = burst
+        self.caller = caller or default_caller()
+
+        self.__lock = threading.Lock()
+        self.__buckets = {}
+        self.__blocked_until = {}
+        self.__stats = collections.defaultdict(collections.Counter)
+
+    def _take(self, available, updated, now, tokens):
+        """Refill, take 'tokens' and return '(available, wait)'."""
+
+        available = min(self.burst, available + (now - updated) * self.rate)
+        available -= tokens
+
+        wait = 0.0
+        if available < 0:
+            wait = -available / self.rate
+        return available, wait
+
+    def reserve(self, key, tokens: float = 1):
+        """Take 'tokens' and return the seconds to wait before using them."""
+
+        now = time.monotonic()
+        with self.__lock:
+            available, updated = self.__buckets.get(key, (self.burst, now))
+            available, wait = self._take(available, updated, now, tokens)
+            self.__buckets[key] = (available, now)
+
+            blocked_until = self.__blocked_until.get(key, 0)
+            wait = max(wait, blocked_until - now, 0.0)
+
+            self.__stats[key]["requests"] += 1
+            self.__stats[key]["waited"] += wait
+            return wait
+
+    def block(self, key, seconds: float):
+        """No tokens for 'key' during the next 'seconds'."""
+
+        with self.__lock:
+            blocked_until = time.monotonic() + seconds
+            if blocked_until > self.__blocked_until.get(key, 0):
+                self.__blocked_until[key] = blocked_until
+            self.__stats[key]["rate_limited"] += 1
+
+    def get_stats(self):
+        """Requests, seconds waited and rate limited responses.
+
+        :return: '{caller: {key: {...}}}'
+        """
+
+        with self.__lock:
+            return {
+                self.caller: {
+                    key: {
+                        "requests": stats["requests"],
+                        "waited": stats["waited"],
+                        "rate_limited": stats["rate_limited"],
+                    }
+                    for key, stats in self.__stats.items()
+                }
+            }
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token buckets per key, shared by all processes on the machine.
+
+    The buckets live in an SQLite database. Every reservation is a short
+    write transaction, which SQLite serializes using file locks.
+    The wait statistics of every process are kept in the database as well.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS buckets ("
+        " key TEXT PRIMARY KEY,"
+        " available REAL NOT NULL,"
+        " updated REAL NOT NULL,"
+        " blocked_until REAL NOT NULL DEFAULT 0)",
+        "CREATE TABLE IF NOT EXISTS waits ("
+        " caller TEXT NOT NULL,"
+        " key TEXT NOT NULL,"
+        " requests INTEGER NOT NULL DEFAULT 0,"
+        " waited REAL NOT NULL DEFAULT 0,"
+        " rate_limited INTEGER NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (caller, key))",
+    )
+    TIMEOUT = 30
+
+    def __init__(
+        self,
+        path: str = RATE_LIMIT_DB_DEFAULT,
+        rate: float = 1.0,
+        burst: float = 5,
+        caller: str = None,
+    ):
+        super().__init__(rate=rate, burst=burst, caller=caller)
+        self.path = path
+        self.__default_caller = caller is None
+
+        self.__lock = threading.Lock()
+        self.__db = None
+        self.__pid = None
+
+    def __connect(self):
+        # Connections must not be shared with forked processes.
+        if self.__db is None or self.__pid != os.getpid():
+            self.__db = sqlite3.connect(
+                self.path,
+                timeout=self.TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self.__pid = os.getpid()
+            self.__db.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                self.__db.execute(statement)
+            if self.__default_caller:
+                self.caller = default_caller()
+        return self.__db
+
+    def __transaction(self, func):
+        with self.__lock:
+            db = self.__connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+
+    def __count(self, db, key, requests=0, waited=0.0, rate_limited=0):
+        db.execute(
+            "INSERT INTO waits (caller, key, requests, waited, rate_limited)"
+            " VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (caller, key) DO UPDATE SET"
+            " requests = requests + excluded.requests,"
+            " waited = waited + excluded.waited,"
+            " rate_limited = rate_limited + excluded.rate_limited",
+            (self.caller, key, requests, waited, rate_limited),
+        )
+
+    def reserve(self, key, tokens: float = 1):
+        # Wall clock time, monotonic clocks are not comparable
+        # between processes on every platform.
+        def reserve_(db):
+            now = time.time()
+            row = db.execute(
+                "SELECT available, updated, blocked_until"
+                " FROM buckets WHERE key = ?",
+                (key,),
+            ).fetchone()
+            available, updated, blocked_until = row or (self.burst, now, 0)
+            available, wait = self._take(available, updated, now, tokens)
+            wait = max(wait, blocked_until - now, 0.0)
+            db.execute(
+                "INSERT OR REPLACE INTO buckets"
+                " (key, available, updated, blocked_until)"
+                " VALUES (?, ?, ?, ?)",
+                (key, available, now, blocked_until),
+            )
+            self.__count(db, key, requests=1, waited=wait)
+            return wait
+
+        return self.__transaction(reserve_)
+
+    def block(self, key, seconds: float):
+        def block_(db):
+            blocked_until = time.time() + seconds
+            db.execute(
+                "INSERT INTO buckets (key, available, updated, blocked_until)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET"
+                " blocked_until = MAX(blocked_until, excluded.blocked_until)",
+                (key, self.burst, time.time(), blocked_until),
+            )
+            self.__count(db, key, rate_limited=1)
+
+        self.__transaction(block_)
+
+    def get_stats(self):
+        """Same as 'TokenBucket.get_stats()', for all processes."""
+
+        def get_stats_(db):
+            stats = collections.defaultdict(dict)
+            for caller, key, requests, waited, rate_limited in db.execute(
+                "SELECT caller, key, requests, waited, rate_limited"
+                " FROM waits ORDER BY caller, key"
+            ):
+                stats[caller][key] = {
+                    "requests": requests,
+                    "waited": waited,
+                    "rate_limited": rate_limited,
+                }
+            return dict(stats)
+
+        return self.__transaction(get_stats_)
+
+
+class RateLimiter:
+    RATE = 1.0
+    BURST = 5
+    MAX_RETRIES = 10
+    BACKOFF = 1.0
+    MAX_BACKOFF = 60.0
+
+    def __init__(
+        self,
+        rate: float = RATE,
+        burst: float = BURST,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+        bucket=None,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.bucket = bucket or TokenBucket(rate=rate, burst=burst)
+
+    def reserve(self, host):
+        """Seconds to wait before the next request to 'host'."""
+
+        return self.bucket.reserve(host)
+
+    def acquire(self, host):
+        """Wait until a request to 'host' is allowed.
+
+        :return: Seconds waited.
+        """
+
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    @classmethod
+    def parse_retry_after(cls, value):
+        """'Retry-After' in seconds, either given in seconds or as date."""
+
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except (ValueError):
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(retry_at.timestamp() - time.time(), 0.0)
+
+    def rate_limited(self, host, attempt: int, retry_after=None):
+        """Back off after the 'attempt'-th rate limited response.
+
+        :return: Seconds until the next request to 'host' is allowed.
+        """
+
+        delay = min(self.backoff * 2**attempt, self.max_backoff)
+        # Full jitter, so clients do not retry in lockstep.
+        delay = random.uniform(0, delay)  # nosec
+        retry_after = self.parse_retry_after(retry_after)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        self.bucket.block(host, delay)
+        return delay
+
+    def get_stats(self):
+        return self.bucket.get_stats()
+
+
+_shared_rate_limiters = {}
+_shared_rate_limiters_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(
+    path: str = RATE_LIMIT_DB_DEFAULT,
+    rate: float = RateLimiter.RATE,
+    burst: float = RateLimiter.BURST,
+):
+    """One `RateLimiter` per database file, rate, burst and process.
+
+    Limiters with different settings share the buckets in the database,
+    each refills and caps them at its own rate and burst.
+    """
+
+    key = (path, rate, burst)
+    with _shared_rate_limiters_lock:
+        rate_limiter = _shared_rate_limiters.get(key, None)
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(
+                bucket=SharedTokenBucket(path=path, rate=rate, burst=burst)
+            )
+            _shared_rate_limiters[key] = rate_limiter
+        return rate_limiter
@@ -0,0 +1,223 @@
+"""
+Goal:
+  * Reuse warm keep-alive connections across calls of the module level
+    helpers (`order_check_price()`, `track_order()`, ...),
+    instead of a new TCP and TLS handshake per call.
+
+How to:
+  * A `SessionRegistry` keeps one `requests.Session` per
+    scheme, host, port and client certificate, shared by all threads.
+  * Every session has its own pool, `pool_connections` hosts
+    with up to `pool_maxsize` connections each.
+  * Connections of sessions not used for `idle_timeout` seconds are closed
+    ('reaped') on the next `get()` or `reap()`, the session itself is kept.
+  * `close()` closes all sessions, the helpers' registry does so at exit.
+  * After a fork, the child starts with new sessions,
+    sockets are not shared with the parent.
+  * `pool_stats(session)` shows how many connections of each pool are
+    in use, idle or were discarded, to size `pool_maxsize`
+    for a given number of threads.
+
+    registry = SessionRegistry(pool_maxsize=32)
+    session = registry.get("https://test.xmr.to")
+"""
+
+import collections
+import os
+import threading
+import time
+import urllib.parse as urlparse
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+def pool_stats(session):
+    """Connections of the pools of 'session', per host.
+
+    'in_use' are checked out by requests, 'idle' are kept open for reuse.
+    'discarded' were opened but not kept, because the pool was full
+    (or the connection broke). If it grows, 'pool_maxsize' is smaller
+    than the number of threads using the session.
+
+    :return: '{"https://test.xmr.to:443": {"maxsize": 10, ...}}'
+    """
+
+    stats = {}
+    for adapter in set(session.adapters.values()):
+        pool_manager = getattr(adapter, "poolmanager", None)
+        if pool_manager is None:
+            continue
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key, None)
+            if pool is None or pool.pool is None:
+                continue
+            queue = pool.pool
+            with queue.mutex:
+                idle = sum(1 for conn in queue.queue if conn is not None)
+                in_use = queue.maxsize - len(queue.queue)
+            opened = pool.num_connections
+            stats[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "maxsize": queue.maxsize,
+                "block": pool.block,
+                "in_use": in_use,
+                "idle": idle,
+                "opened": opened,
+                "discarded": max(opened - in_use - idle, 0),
+                "requests": pool.num_requests,
+            }
+    return stats
+
+
+class SessionRegistry:
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 10
+    # Wait for a free connection instead of opening a surplus one.
+    POOL_BLOCK = False
+    MAX_RETRIES = 3
+    IDLE_TIMEOUT = 60
+
+    def __init__(
+        self,
+        pool_connections: int = POOL_CONNECTIONS,
+        pool_maxsize: int = POOL_MAXSIZE,
+        pool_block: bool = POOL_BLOCK,
+        max_retries: int = MAX_RETRIES,
+        idle_timeout: float = IDLE_TIMEOUT,
+        session_factory=None,
+    ):
+        """
+        :param session_factory: Creates a session for a URL,
+            e.g. to set default headers. Defaults to `Session()`.
+        """
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        self.session_factory = session_factory
+
+        self.__lock = threading.Lock()
+        self.__pid = os.getpid()
+        # Key -> session, key -> time of the last response.
+        self.__sessions = {}
+        self.__last_used = {}
+        self.__idle = set()
+        self.__last_reap = time.monotonic()
+        self.__stats = collections.Counter()
+
+    @classmethod
+    def key(cls, url: str, cert=None):
+        """'(scheme, host, port, cert)', sessions are shared by key."""
+
+        url = urlparse.urlparse(url.lower())
+        port = url.port or {"http": 80, "https": 443}.get(url.scheme, None)
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        return (url.scheme, url.hostname, port, cert)
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__sessions)
+
+    def __create(self, key, url, cert):
+        scheme, hostname, port, _ = key
+        if self.session_factory is None:
+            session = Session()
+        else:
+            session = self.session_factory(url)
+        session.mount(
+            f"{scheme}://{hostname}",
+            HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+                pool_block=self.pool_block,
+                max_retries=self.max_retries,
+            ),
+        )
+        if cert:
+            session.cert = cert
+
+        def used(response, *args, **kwargs):
+            if key in self.__sessions:
+                self.__last_used[key] = time.monotonic()
+                self.__idle.discard(key)
+
+        session.hooks["response"].append(used)
+        return session
+
+    def __check_pid(self):
+        # Pooled sockets must not be shared with forked processes.
+        if self.__pid != os.getpid():
+            self.__sessions = {}
+            self.__last_used = {}
+            self.__idle = set()
+            self.__pid = os.getpid()
+
+    def get(self, url: str, cert=None):
+        """The session for the host of 'url', created on first use."""
+
+        key = self.key(url, cert=cert)
+        with self.__lock:
+            self.__check_pid()
+            session = self.__sessions.get(key, None)
+            if session is None:
+                session = self.__create(key=key, url=url, cert=cert)
+                self.__sessions[key] = session
+                self.__stats["created"] += 1
+            else:
+                self.__stats["reused"] += 1
+            self.__last_used[key] = time.monotonic()
+            self.__idle.discard(key)
+            reap = time.monotonic() - self.__last_reap >= self.idle_timeout
+        if reap:
+            self.reap()
+        return session
+
+    def reap(self, now: float = None):
+        """Close the connections of sessions idle for 'idle_timeout'.
+
+        :return: The number of sessions reaped.
+        """
+
+        if now is None:
+            now = time.monotonic()
+        with self.__lock:
+            self.__check_pid()
+            self.__last_reap = now
+            idle = [
+                key
+                for key, last_used in self.__last_used.items()
+                if now - last_used >= self.idle_timeout
+                and key not in self.__idle
+            ]
+            for key in idle:
+                # Only closes the pooled connections,
+                # the session opens new ones when used again.
+                session = self.__sessions.get(key, None)
+                if session is not None:
+                    session.close()
+                self.__idle.add(key)
+            self.__stats["reaped"] += len(idle)
+        return len(idle)
+
+    def close(self):
+        """Close and forget all sessions."""
+
+        with self.__lock:
+            if self.__pid == os.getpid():
+                for session in self.__sessions.values():
+                    session.close()
+            self.__sessions = {}
+            self.__last_used = {}
+            self.__idle = set()
+            self.__pid = os.getpid()
+
+    def get_stats(self):
+        with self.__lock:
+            stats = {"created": 0, "reused": 0, "reaped": 0}
+            stats.update(self.__stats)
+            stats["sessions"] = len(self.__sessions)
+            stats["idle"] = len(self.__idle)
+        return stats
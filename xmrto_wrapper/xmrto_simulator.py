@@ -0,0 +1,708 @@
+#!/usr/bin/env python
+
+"""
+Goal:
+  * A local stand-in for XMR.to, to load test and integration test
+    without touching xmr.to or test.xmr.to.
+
+How to:
+  * `xmrto_simulator --port 8000`, then use `--url http://localhost:8000`.
+    - Only URLs containing 'localhost' are not switched to HTTPS.
+  * Implements every endpoint used by `XmrtoApi`:
+    `order_create`, `order_create_ln`, `order_status_query`,
+    `order_check_price`, `order_ln_check_route`, `order_parameter_query`,
+    `order_partial_payment` and `gen_qrcode`.
+  * Orders walk through the order states on a clock running `--speed`
+    times faster than real time:
+    TO_BE_CREATED -> UNPAID -> PAID_UNCONFIRMED -> BTC_SENT,
+    or UNDERPAID, or TIMED_OUT if they never get paid.
+    With the `--*-probability` options, orders also end up
+    FLAGGED_DESTINATION_ADDRESS or REJECTED when created,
+    PAYMENT_FAILED instead of BTC_SENT, or PURGED instead of TIMED_OUT.
+  * `--latency`, `--error-rate` and `--rate-limit` (403 or 429 with
+    `--rate-limit-status`, per client) simulate a slow, flaky and
+    rate limited server.
+  * `GET /simulator/stats/` returns the requests and responses counted.
+
+    server, url = start_simulator(SimulatorConfig(speed=60, rate_limit=5))
+    xmrto_api = XmrtoApi(url=url)
+    ...
+    server.shutdown()
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import random
+import secrets
+import string
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation, ROUND_UP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import urllib.parse as urlparse
+
+from ._png import encode_png
+from .xmrto_metrics import endpoint_name
+from .xmrto_wrapper import XmrtoOrder, StatusAttributesV3
+
+BTC = Decimal("0.00000001")
+XMR = Decimal("0.0001")
+
+ERRORS = {
+    "malformed_address": (400, "XMRTO-ERROR-002", "malformed bitcoin address"),
+    "invalid_amount": (400, "XMRTO-ERROR-003", "invalid bitcoin amount"),
+    "not_found": (404, "XMRTO-ERROR-006", "requested order not found"),
+    "invalid_request": (400, "XMRTO-ERROR-009", "invalid request"),
+    "too_many_requests": (403, "XMRTO-ERROR-012", "too many requests"),
+    "unavailable": (503, "XMRTO-ERROR-001", "internal services not available"),
+}
+
+
+@dataclass
+class SimulatorConfig:
+    # Simulated seconds per real second.
+    speed: float = 1.0
+    # Seconds, real time.
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Share of requests answered with 503.
+    error_rate: float = 0.0
+    # Requests per second and client, 0 disables rate limiting.
+    rate_limit: float = 0.0
+    rate_burst: float = 5
+    # Status code of rate limited responses, 403 or 429.
+    rate_limit_status: int = 403
+    retry_after: int = None
+    # Key the rate limit by 'X-Forwarded-For' instead of the client address.
+    trust_forwarded_for: bool = False
+
+    price: str = "0.0075"
+    lower_limit: str = "0.001"
+    upper_limit: str = "1.0"
+    ln_lower_limit: str = "0.0001"
+    ln_upper_limit: str = "0.04"
+    zero_conf_enabled: bool = True
+    zero_conf_max_amount: str = "0.1"
+
+    # Simulated seconds.
+    create_delay: float = 2
+    pay_delay: float = 30
+    block_time: float = 120
+    send_delay: float = 5
+    order_timeout: float = 2700
+    confirmations: int = 10
+    # Share of orders that get paid (in full) or underpaid.
+    pay_probability: float = 1.0
+    underpay_probability: float = 0.0
+    # Share of orders flagged (FLAGGED_DESTINATION_ADDRESS) or REJECTED
+    # when created.
+    flag_probability: float = 0.0
+    reject_probability: float = 0.0
+    # Share of paid orders that end up PAYMENT_FAILED instead of BTC_SENT.
+    payment_failure_probability: float = 0.0
+    # Share of unpaid orders that end up PURGED instead of TIMED_OUT.
+    purge_probability: float = 0.0
+
+
+class SimulatorClock:
+    """Simulated seconds, running 'speed' times faster than real time."""
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self.__start = time.monotonic()
+        self.__offset = 0.0
+
+    def now(self):
+        return (time.monotonic() - self.__start) * self.speed + self.__offset
+
+    def advance(self, seconds: float):
+        self.__offset += seconds
+
+
+@dataclass
+class SimulatedOrder:
+    uuid: str
+    created: float
+    out_address: str
+    out_amount: Decimal
+    in_amount: Decimal
+    in_out_rate: Decimal
+    uses_lightning: bool = False
+    paid: bool = True
+    underpaid: bool = False
+    # Final state instead of UNPAID, BTC_SENT and TIMED_OUT, if any.
+    rejected_state: str = None
+    failed_state: str = None
+    timed_out_state: str = XmrtoOrder.TIMED_OUT
+    partial_payment_confirmed: float = None
+    confirmations: int = 10
+    created_at: str = ""
+    payments: list = field(default_factory=list)
+
+
+def new_uuid():
+    alphabet = string.ascii_letters + string.digits
+    return "xmrto-" + "".join(secrets.choice(alphabet) for _ in range(6))
+
+
+def new_subaddress(uuid):
+    # Looks like a subaddress, is not one.
+    return "8" + hashlib.sha512(uuid.encode()).hexdigest()[:94]
+
+
+class XmrtoSimulator:
+    def __init__(self, config: SimulatorConfig = None, clock=None):
+        self.config = config or SimulatorConfig()
+        self.clock = clock or SimulatorClock(speed=self.config.speed)
+
+        self.__lock = threading.Lock()
+        self.__orders = {}
+        self.__buckets = {}
+        self.__stats = collections.Counter()
+
+    @classmethod
+    def error(cls, name):
+        status_code, error, error_msg = ERRORS[name]
+        return status_code, {"error": error, "error_msg": error_msg}
+
+    def get_stats(self):
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["orders"] = len(self.__orders)
+        return stats
+
+    def count(self, name):
+        with self.__lock:
+            self.__stats[name] += 1
+
+    def rate_limited(self, client):
+        """Token bucket per client, True if the request is rejected."""
+
+        if not self.config.rate_limit:
+            return False
+
+        now = time.monotonic()
+        with self.__lock:
+            available, updated = self.__buckets.get(
+                client, (self.config.rate_burst, now)
+            )
+            available = min(
+                self.config.rate_burst,
+                available + (now - updated) * self.config.rate_limit,
+            )
+            limited = available < 1
+            if not limited:
+                available -= 1
+            self.__buckets[client] = (available, now)
+        return limited
+
+    def _quote(self, amount, currency):
+        """BTC and XMR amounts for an amount in 'currency'."""
+
+        price = Decimal(self.config.price)
+        amount = Decimal(str(amount))
+        if amount <= 0:
+            raise InvalidOperation
+        if currency.upper() == "XMR":
+            in_amount = amount.quantize(XMR, rounding=ROUND_UP)
+            out_amount = (amount * price).quantize(BTC)
+        else:
+            out_amount = amount.quantize(BTC)
+            in_amount = (amount / price).quantize(XMR, rounding=ROUND_UP)
+        return out_amount, in_amount, price
+
+    def parameters(self):
+        config = self.config
+        return 200, {
+            "price": config.price,
+            "upper_limit": config.upper_limit,
+            "lower_limit": config.lower_limit,
+            "ln_upper_limit": config.ln_upper_limit,
+            "ln_lower_limit": config.ln_lower_limit,
+            "zero_conf_enabled": config.zero_conf_enabled,
+            "zero_conf_max_amount": config.zero_conf_max_amount,
+        }
+
+    def check_price(self, postdata):
+        try:
+            out_amount, in_amount, price = self._quote(
+                postdata["amount"], postdata.get("amount_currency", "BTC")
+            )
+        except (KeyError, InvalidOperation):
+            return self.error("invalid_amount")
+
+        return 200, {
+            "btc_amount": str(out_amount),
+            "incoming_amount_total": str(in_amount),
+            "incoming_num_confirmations_remaining": self._confirmations(
+                out_amount
+            ),
+            "incoming_price_btc": str(price),
+        }
+
+    def _confirmations(self, out_amount):
+        config = self.config
+        if config.zero_conf_enabled and out_amount <= Decimal(
+            config.zero_conf_max_amount
+        ):
+            return 0
+        return config.confirmations
+
+    @classmethod
+    def _roll(cls, probability):
+        return random.random() < probability  # nosec
+
+    def _create(self, out_address, out_amount, in_amount, price, lightning):
+        config = self.config
+        roll = random.random()  # nosec
+        rejected_state = None
+        if self._roll(config.flag_probability):
+            rejected_state = XmrtoOrder.FLAGGED_DESTINATION_ADDRESS
+        elif self._roll(config.reject_probability):
+            rejected_state = XmrtoOrder.REJECTED
+        order = SimulatedOrder(
+            uuid=new_uuid(),
+            created=self.clock.now(),
+            out_address=out_address,
+            out_amount=out_amount,
+            in_amount=in_amount,
+            in_out_rate=price,
+            uses_lightning=lightning,
+            paid=roll < config.pay_probability,
+            underpaid=(
+                config.pay_probability
+                <= roll
+                < config.pay_probability + config.underpay_probability
+            ),
+            rejected_state=rejected_state,
+            failed_state=(
+                XmrtoOrder.PAYMENT_FAILED
+                if self._roll(config.payment_failure_probability)
+                else None
+            ),
+            timed_out_state=(
+                XmrtoOrder.PURGED
+                if self._roll(config.purge_probability)
+                else XmrtoOrder.TIMED_OUT
+            ),
+            confirmations=self._confirmations(out_amount),
+            created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        )
+        with self.__lock:
+            self.__orders[order.uuid] = order
+
+        return 201, {
+            "uuid": order.uuid,
+            "state": XmrtoOrder.TO_BE_CREATED,
+            "btc_dest_address": order.out_address,
+            "btc_amount": str(order.out_amount),
+            "uses_lightning": order.uses_lightning,
+        }
+
+    def create_order(self, postdata):
+        out_address = postdata.get("btc_dest_address", "")
+        if not out_address or len(out_address) < 26:
+            return self.error("malformed_address")
+        try:
+            out_amount, in_amount, price = self._quote(
+                postdata.get("amount", postdata.get("btc_amount")),
+                postdata.get("amount_currency", "BTC"),
+            )
+        except (TypeError, InvalidOperation):
+            return self.error("invalid_amount")
+        if not (
+            Decimal(self.config.lower_limit)
+            <= out_amount
+            <= Decimal(self.config.upper_limit)
+        ):
+            return self.error("invalid_amount")
+
+        return self._create(out_address, out_amount, in_amount, price, False)
+
+    def create_ln_order(self, postdata):
+        ln_invoice = postdata.get("ln_invoice", "")
+        if not ln_invoice.lower().startswith("ln"):
+            return self.error("invalid_request")
+        out_amount, in_amount, price = self._quote(
+            self.config.ln_lower_limit, "BTC"
+        )
+        return self._create(ln_invoice, out_amount, in_amount, price, True)
+
+    def _state(self, order, now):
+        """Order state and remaining seconds/confirmations at 'now'."""
+
+        config = self.config
+        elapsed = now - order.created
+        unpaid_until = config.create_delay + config.pay_delay
+        timeout = config.create_delay + config.order_timeout - elapsed
+
+        if elapsed < config.create_delay:
+            return XmrtoOrder.TO_BE_CREATED, None, None
+        if order.rejected_state is not None:
+            return order.rejected_state, None, None
+
+        paid_at = unpaid_until
+        if order.underpaid:
+            if order.partial_payment_confirmed is None:
+                if elapsed < unpaid_until:
+                    return XmrtoOrder.UNPAID, timeout, None
+                if timeout > 0:
+                    return XmrtoOrder.UNDERPAID, timeout, None
+                return order.timed_out_state, None, None
+            paid_at = order.partial_payment_confirmed - order.created
+        elif not order.paid or elapsed < unpaid_until:
+            if timeout > 0:
+                return XmrtoOrder.UNPAID, timeout, None
+            return order.timed_out_state, None, None
+
+        confirmed_at = paid_at + order.confirmations * config.block_time
+        if elapsed < confirmed_at + config.send_delay:
+            remaining = max(
+                order.confirmations
+                - int((elapsed - paid_at) // config.block_time),
+                0,
+            )
+            return XmrtoOrder.PAID_UNCONFIRMED, None, remaining
+        return order.failed_state or XmrtoOrder.BTC_SENT, None, None
+
+    def order_status(self, postdata):
+        with self.__lock:
+            order = self.__orders.get(postdata.get("uuid", None), None)
+        if order is None:
+            return self.error("not_found")
+
+        state, timeout, confirmations = self._state(order, self.clock.now())
+        in_amount_remaining = order.in_amount
+        if state in (
+            XmrtoOrder.PAID_UNCONFIRMED,
+            XmrtoOrder.BTC_SENT,
+            XmrtoOrder.PAYMENT_FAILED,
+        ):
+            in_amount_remaining = Decimal(0)
+        elif state == XmrtoOrder.UNDERPAID:
+            in_amount_remaining = (order.in_amount / 2).quantize(XMR)
+
+        attributes = StatusAttributesV3()
+        status = {
+            attributes.state: state,
+            "uuid": order.uuid,
+            attributes.out_amount: str(order.out_amount),
+            attributes.out_amount_partial: "0",
+            attributes.out_address: order.out_address,
+            attributes.created_at: order.created_at,
+            attributes.uses_lightning: order.uses_lightning,
+        }
+        if state != XmrtoOrder.TO_BE_CREATED:
+            status.update(
+                {
+                    attributes.in_out_rate: str(order.in_out_rate),
+                    attributes.payment_subaddress: new_subaddress(order.uuid),
+                    attributes.in_amount: str(order.in_amount),
+                    attributes.in_amount_remaining: str(in_amount_remaining),
+                    attributes.payments: [],
+                }
+            )
+        if timeout is not None:
+            status[attributes.seconds_till_timeout] = int(timeout)
+        if confirmations is not None:
+            status[attributes.in_confirmations_remaining] = confirmations
+        return 200, status
+
+    def partial_payment(self, postdata):
+        with self.__lock:
+            order = self.__orders.get(postdata.get("uuid", None), None)
+        if order is None:
+            return self.error("not_found")
+
+        state, _, _ = self._state(order, self.clock.now())
+        if state != XmrtoOrder.UNDERPAID:
+            return self.error("invalid_request")
+
+        order.partial_payment_confirmed = self.clock.now()
+        order.out_amount = (order.out_amount / 2).quantize(BTC)
+        return 200, None
+
+    def check_routes(self, query):
+        ln_invoice = query.get("ln_invoice", [""])[0]
+        if not ln_invoice.lower().startswith("ln"):
+            return self.error("invalid_request")
+        return 200, {"num_routes": 3, "success_probability": 0.95}
+
+    def qrcode(self, query):
+        """A QR code sized image, the pattern is derived from the data."""
+
+        data = query.get("data", [""])[0].encode()
+        bits = "".join(
+            f"{byte:08b}"
+            for byte in hashlib.shake_256(data).digest((25 * 25 + 7) // 8)
+        )
+        rows = [
+            [bit == "1" for bit in bits[start:][:25]]
+            for start in range(0, 25 * 25, 25)
+        ]
+        return 200, encode_png(rows, scale=8, border=4)
+
+
+class SimulatorRequestHandler(BaseHTTPRequestHandler):
+    server_version = "XmrtoSimulator/0.1"
+    # Keep connections alive, as XMR.to does.
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, do not wait for ACKs.
+    disable_nagle_algorithm = True
+
+    # Set by 'make_server()'.
+    simulator = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status_code, body=None, headers=None):
+        self.simulator.count(f"status_{status_code}")
+        content_type = "application/json"
+        if body is None:
+            content = b""
+        elif isinstance(body, bytes):
+            content = body
+            content_type = "image/png"
+        else:
+            content = json.dumps(body).encode()
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _client(self):
+        forwarded_for = self.headers.get("X-Forwarded-For", None)
+        if self.simulator.config.trust_forwarded_for and forwarded_for:
+            return forwarded_for
+        return self.client_address[0]
+
+    def _handle(self, method):
+        simulator = self.simulator
+        config = simulator.config
+        url = urlparse.urlparse(self.path)
+        # Read before any early response, the connection is kept alive.
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if url.path.rstrip("/") == "/simulator/stats":
+            return self._respond(200, simulator.get_stats())
+
+        endpoint = endpoint_name(url.path)
+        simulator.count(f"requests_{endpoint}")
+
+        if config.latency or config.latency_jitter:
+            time.sleep(
+                max(
+                    random.gauss(
+                        config.latency, config.latency_jitter
+                    ),  # nosec
+                    0,
+                )
+            )
+
+        if simulator.rate_limited(self._client()):
+            headers = {}
+            if config.retry_after is not None:
+                headers["Retry-After"] = str(config.retry_after)
+            _, error = simulator.error("too_many_requests")
+            return self._respond(
+                config.rate_limit_status, error, headers=headers
+            )
+        if random.random() < config.error_rate:  # nosec
+            return self._respond(*simulator.error("unavailable"))
+
+        postdata = {}
+        if method == "POST":
+            try:
+                postdata = json.loads(body or b"{}")
+            except (ValueError):
+                return self._respond(*simulator.error("invalid_request"))
+        query = urlparse.parse_qs(url.query)
+
+        handlers = {
+            ("POST", "create"): lambda: simulator.create_order(postdata),
+            ("POST", "create_ln"): lambda: simulator.create_ln_order(postdata),
+            ("POST", "status"): lambda: simulator.order_status(postdata),
+            ("POST", "price"): lambda: simulator.check_price(postdata),
+            ("POST", "partial"): lambda: simulator.partial_payment(postdata),
+            ("GET", "parameters"): simulator.parameters,
+            ("GET", "routes"): lambda: simulator.check_routes(query),
+            ("GET", "qrcode"): lambda: simulator.qrcode(query),
+        }
+        handler = handlers.get((method, endpoint), None)
+        if handler is None:
+            return self._respond(404, {"detail": "Not found."})
+        return self._respond(*handler())
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def make_server(host="localhost", port=0, config=None, simulator=None):
+    simulator = simulator or XmrtoSimulator(config=config)
+    handler = type(
+        "SimulatorRequestHandler",
+        (SimulatorRequestHandler,),
+        {"simulator": simulator},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.simulator = simulator
+    return server
+
+
+def start_simulator(config=None, host="localhost", port=0):
+    """Run the simulator in a background thread.
+
+    :return: The server (call 'shutdown()' when done) and its URL.
+    """
+
+    server = make_server(host=host, port=port, config=config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://localhost:{server.server_address[1]}"
+
+
+def main():
+    defaults = SimulatorConfig()
+    parser = argparse.ArgumentParser(
+        description="Local XMR.to API simulator.",
+        allow_abbrev=False,
+    )
+    parser.add_argument("--host", default="localhost", help="Address.")
+    parser.add_argument("--port", type=int, default=8000, help="Port.")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=defaults.speed,
+        help="Simulated seconds per second.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=defaults.latency,
+        help="Response latency, in seconds.",
+    )
+    parser.add_argument(
+        "--latency-jitter",
+        type=float,
+        default=defaults.latency_jitter,
+        help="Standard deviation of the latency, in seconds.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=defaults.error_rate,
+        help="Share of requests answered with 503.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=defaults.rate_limit,
+        help="Requests per second and client, rate limited above.",
+    )
+    parser.add_argument(
+        "--rate-burst",
+        type=float,
+        default=defaults.rate_burst,
+        help="Burst of requests allowed per client.",
+    )
+    parser.add_argument(
+        "--rate-limit-status",
+        type=int,
+        choices=(403, 429),
+        default=defaults.rate_limit_status,
+        help="Status code of rate limited responses.",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=int,
+        default=defaults.retry_after,
+        help="'Retry-After' sent when rate limited, in seconds.",
+    )
+    parser.add_argument(
+        "--trust-forwarded-for",
+        action="store_true",
+        help="Rate limit by 'X-Forwarded-For'.",
+    )
+    parser.add_argument(
+        "--pay-probability",
+        type=float,
+        default=defaults.pay_probability,
+        help="Share of orders that get paid.",
+    )
+    parser.add_argument(
+        "--underpay-probability",
+        type=float,
+        default=defaults.underpay_probability,
+        help="Share of orders that get underpaid.",
+    )
+    parser.add_argument(
+        "--flag-probability",
+        type=float,
+        default=defaults.flag_probability,
+        help="Share of orders with a flagged destination address.",
+    )
+    parser.add_argument(
+        "--reject-probability",
+        type=float,
+        default=defaults.reject_probability,
+        help="Share of orders that get rejected.",
+    )
+    parser.add_argument(
+        "--payment-failure-probability",
+        type=float,
+        default=defaults.payment_failure_probability,
+        help="Share of paid orders whose BTC payment fails.",
+    )
+    parser.add_argument(
+        "--purge-probability",
+        type=float,
+        default=defaults.purge_probability,
+        help="Share of unpaid orders that get purged instead of timing out.",
+    )
+    args = parser.parse_args()
+
+    config = SimulatorConfig(
+        speed=args.speed,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_burst=args.rate_burst,
+        rate_limit_status=args.rate_limit_status,
+        retry_after=args.retry_after,
+        trust_forwarded_for=args.trust_forwarded_for,
+        pay_probability=args.pay_probability,
+        underpay_probability=args.underpay_probability,
+        flag_probability=args.flag_probability,
+        reject_probability=args.reject_probability,
+        payment_failure_probability=args.payment_failure_probability,
+        purge_probability=args.purge_probability,
+    )
+    server = make_server(host=args.host, port=args.port, config=config)
+    print(
+        f"XMR.to simulator on 'http://localhost:{server.server_address[1]}'."
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nUser interrupted")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
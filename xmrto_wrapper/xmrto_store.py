@@ -0,0 +1,268 @@
+"""
+Goal:
+  * Keep orders across restarts, without re-polling every uuid ever created.
+
+How to:
+  * Pass an `OrderStore` to `XmrtoOrder(store=...)`,
+    `XmrtoOrderStatus(store=...)` or `OrderTracker(store=...)`.
+    Every created order and every order status is written to SQLite,
+    indexed by uuid, state and creation time.
+  * Writes are buffered and written in one transaction per batch,
+    once `batch_size` orders are buffered, or by a timer thread
+    `flush_interval` seconds after the first order was buffered,
+    even if nothing else is written meanwhile.
+    `flush()` (or `close()`) writes the rest.
+  * At startup, `OrderTracker(store=...)` resumes tracking the orders
+    that are not in a final state yet, found with one indexed query.
+
+    store = OrderStore(path="orders.sqlite")
+    tracker = OrderTracker(url="https://test.xmr.to", store=store)
+    tracker.run()
+    store.close()
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from .xmrto_wrapper import logger, status_to_json, XmrtoOrder
+
+
+@dataclass
+class StoredOrder:
+    uuid: str = ""
+    state: str = None
+    created_at: str = None
+    updated: float = 0.0
+    data: dict = None
+
+
+class OrderStore:
+    BATCH_SIZE = 100
+    FLUSH_INTERVAL = 1.0
+    TIMEOUT = 30
+
+    # States after which an order changes no more are not resumed.
+    ACTIVE_STATES = (
+        XmrtoOrder.TO_BE_CREATED,
+        XmrtoOrder.UNPAID,
+        XmrtoOrder.UNDERPAID,
+        XmrtoOrder.PAID_UNCONFIRMED,
+    )
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS orders ("
+        " uuid TEXT PRIMARY KEY,"
+        " state TEXT,"
+        " created_at TEXT,"
+        " updated REAL NOT NULL,"
+        " data TEXT)",
+        "CREATE INDEX IF NOT EXISTS orders_state ON orders (state)",
+        "CREATE INDEX IF NOT EXISTS orders_created_at"
+        " ON orders (created_at)",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.__lock = threading.Lock()
+        self.__db = None
+        self.__pid = None
+        self.__buffer = {}
+        self.__last_flush = time.monotonic()
+        self.__timer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __connect(self):
+        # Connections must not be shared with forked processes.
+        if self.__db is None or self.__pid != os.getpid():
+            self.__db = sqlite3.connect(
+                self.path,
+                timeout=self.TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self.__pid = os.getpid()
+            self.__db.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                self.__db.execute(statement)
+        return self.__db
+
+    def put(self, uuid, state, created_at=None, data=None):
+        """Buffer an order, replacing an earlier buffered one."""
+
+        if not uuid:
+            return
+        with self.__lock:
+            previous = self.__buffer.get(uuid, None)
+            if created_at is None and previous is not None:
+                created_at = previous[2]
+            self.__buffer[uuid] = (
+                uuid,
+                state,
+                created_at,
+                time.time(),
+                None if data is None else json.dumps(data),
+            )
+            flush = (
+                len(self.__buffer) >= self.batch_size
+                or time.monotonic() - self.__last_flush >= self.flush_interval
+            )
+            if not flush:
+                self.__schedule_flush()
+        if flush:
+            self.flush()
+
+    def __schedule_flush(self):
+        # Not restarted by later orders, so none waits longer.
+        if self.__timer is not None and self.__timer.is_alive():
+            return
+        self.__timer = threading.Timer(self.flush_interval, self.__timed_flush)
+        self.__timer.daemon = True
+        self.__timer.start()
+
+    def __timed_flush(self):
+        try:
+            self.flush()
+        except (Exception) as e:
+            logger.error(f"Could not store orders: {e}.")
+
+    def save(self, order):
+        """Buffer an `XmrtoOrder` or `XmrtoOrderStatus`."""
+
+        created_at = getattr(order, "created_at", None)
+        if created_at is None and order.order_status is not None:
+            # An `XmrtoOrder` knows it from its `XmrtoOrderStatus`.
+            created_at = getattr(order.order_status, "created_at", None)
+
+        self.put(
+            uuid=order.uuid,
+            state=order.state,
+            created_at=created_at,
+            data=order._to_json(),
+        )
+
+    def save_status(self, uuid, order_status):
+        """Buffer an order status as returned by `XmrtoApi.order_status()`."""
+
+        data = {"uuid": uuid}
+        data.update(status_to_json(order_status))
+
+        self.put(
+            uuid=uuid,
+            state=order_status.state,
+            created_at=order_status.created_at,
+            data=data,
+        )
+
+    def flush(self):
+        """Write all buffered orders, in one transaction."""
+
+        with self.__lock:
+            self.__last_flush = time.monotonic()
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            if not self.__buffer:
+                return
+            rows = list(self.__buffer.values())
+            self.__buffer.clear()
+
+            db = self.__connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.executemany(
+                    "INSERT INTO orders (uuid, state, created_at, updated, data)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (uuid) DO UPDATE SET"
+                    " state = excluded.state,"
+                    " created_at = COALESCE(excluded.created_at, created_at),"
+                    " updated = excluded.updated,"
+                    " data = COALESCE(excluded.data, data)",
+                    rows,
+                )
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        logger.debug(f"Stored {len(rows)} orders.")
+
+    def close(self):
+        self.flush()
+        with self.__lock:
+            if self.__db is not None and self.__pid == os.getpid():
+                self.__db.close()
+            self.__db = None
+
+    def __query(self, query, parameters=()):
+        self.flush()
+        with self.__lock:
+            return self.__connect().execute(query, parameters).fetchall()
+
+    @classmethod
+    def _stored_order(cls, row):
+        uuid, state, created_at, updated, data = row
+        return StoredOrder(
+            uuid=uuid,
+            state=state,
+            created_at=created_at,
+            updated=updated,
+            data=None if data is None else json.loads(data),
+        )
+
+    def get(self, uuid):
+        rows = self.__query(
+            "SELECT uuid, state, created_at, updated, data"
+            " FROM orders WHERE uuid = ?",
+            (uuid,),
+        )
+        if not rows:
+            return None
+        return self._stored_order(rows[0])
+
+    def get_orders(self, states=None):
+        """Stored orders, oldest first, optionally only in 'states'."""
+
+        query = "SELECT uuid, state, created_at, updated, data FROM orders"
+        parameters = ()
+        if states is not None:
+            parameters = tuple(states)
+            query += f" WHERE state IN ({', '.join('?' * len(parameters))})"
+        query += " ORDER BY created_at"
+        return [
+            self._stored_order(row) for row in self.__query(query, parameters)
+        ]
+
+    def get_active_orders(self):
+        return self.get_orders(states=self.ACTIVE_STATES)
+
+    def get_active_uuids(self):
+        """Uuids of the orders still to track, from the state index only."""
+
+        parameters = self.ACTIVE_STATES
+        rows = self.__query(
+            "SELECT uuid FROM orders"
+            f" WHERE state IN ({', '.join('?' * len(parameters))})",
+            parameters,
+        )
+        return [uuid for uuid, in rows]
+
+    def count_by_state(self):
+        return dict(
+            self.__query("SELECT state, COUNT(*) FROM orders GROUP BY state")
+        )
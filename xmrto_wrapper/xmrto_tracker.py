@@ -0,0 +1,296 @@
+"""
+Goal:
+  * Track many XMR.to orders at once.
+
+How to:
+  * Orders are kept in a priority queue, ordered by the time they are due
+    to be polled next.
+  * When an order is due next is decided by a `PollingPolicy`.
+  * Due orders are polled by a bounded pool of worker threads,
+    all sharing one `XmrtoApi` (and so one HTTP session).
+  * `max_rate` caps the number of status requests per second,
+    so the request rate stays steady however many orders are tracked.
+  * State changes are reported as `OrderTransition`,
+    either to a callback or by iterating over the tracker.
+  * With an `OrderStore`, every order status is stored and tracking
+    resumes the orders not in a final state yet.
+  * With a `TransitionJournal`, every state change is journaled.
+
+    tracker = OrderTracker(url="https://test.xmr.to", uuids=uuids)
+    for transition in tracker:
+        print(transition.uuid, transition.state)
+"""
+
+import collections
+import heapq
+import threading
+import time
+from concurrent import futures
+from dataclasses import dataclass
+
+from .xmrto_wrapper import (
+    logger,
+    XmrtoApi,
+    XmrtoConnection,
+    PollingPolicy,
+    RateLimiter,
+    XMRTO_URL_DEFAULT,
+    API_VERSION_DEFAULT,
+)
+
+TRANSITION_FIELDS = (
+    "uuid",
+    "previous_state",
+    "state",
+    "order_status",
+    "error",
+)
+OrderTransition = collections.namedtuple("OrderTransition", TRANSITION_FIELDS)
+
+
+@dataclass
+class TrackedOrder:
+    uuid: str = ""
+    state: str = None
+    order_status: object = None
+    errors: int = 0
+    polls: int = 0
+    unchanged: int = 0
+
+
+class OrderTracker:
+    MAX_WORKERS = 8
+    MAX_ERRORS = 3
+    # Upper bound for waiting, so orders added from other threads are seen.
+    MAX_IDLE = 1
+
+    def __init__(
+        self,
+        url=XMRTO_URL_DEFAULT,
+        api=API_VERSION_DEFAULT,
+        uuids=None,
+        connection=None,
+        max_workers: int = MAX_WORKERS,
+        polling_policy: PollingPolicy = None,
+        max_rate: float = None,
+        max_errors: int = MAX_ERRORS,
+        callback=None,
+        rate_limiter: RateLimiter = None,
+        store=None,
+        journal=None,
+        pool_block: bool = XmrtoConnection.POOL_BLOCK,
+    ):
+        # A pooled connection per worker, none opened just to be discarded.
+        self.xmrto_api = XmrtoApi(
+            url=url,
+            api=api,
+            connection=connection,
+            rate_limiter=rate_limiter,
+            pool_maxsize=max_workers,
+            pool_block=pool_block,
+        )
+        self.max_workers = max_workers
+        self.polling_policy = polling_policy or PollingPolicy()
+        self.max_rate = max_rate
+        self.max_errors = max_errors
+        self.callback = callback
+        self.store = store
+        self.journal = journal
+
+        self.__lock = threading.Lock()
+        self.__queue = []
+        self.__counter = 0
+        self.__orders = {}
+        self.__pending = {}
+        self.__next_slot = 0.0
+        self.__stopped = False
+
+        if store is not None:
+            uuids = store.get_active_uuids() + list(uuids or [])
+        for uuid in uuids or []:
+            self.add(uuid=uuid)
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__orders)
+
+    def __iter__(self):
+        return self.follow()
+
+    def get_orders(self):
+        with self.__lock:
+            return dict(self.__orders)
+
+    def add(self, uuid, delay: float = 0):
+        """Start tracking an order, first poll after 'delay' seconds."""
+
+        with self.__lock:
+            if uuid in self.__orders:
+                return
+            self.__orders[uuid] = TrackedOrder(uuid=uuid)
+            self.__schedule(uuid=uuid, due=time.monotonic() + delay)
+
+    def remove(self, uuid):
+        # The queue entry is dropped lazily, when it becomes due.
+        with self.__lock:
+            self.__orders.pop(uuid, None)
+
+    def stop(self):
+        self.__stopped = True
+
+    def __schedule(self, uuid, due):
+        # The counter keeps entries with the same due time in FIFO order.
+        self.__counter += 1
+        heapq.heappush(self.__queue, (due, self.__counter, uuid))
+
+    def __submit_due(self, executor):
+        now = time.monotonic()
+        with self.__lock:
+            while (
+                self.__queue
+                and len(self.__pending) < self.max_workers
+                and self.__queue[0][0] <= now
+            ):
+                if self.max_rate:
+                    if now < self.__next_slot:
+                        break
+                    self.__next_slot = (
+                        max(now, self.__next_slot) + 1.0 / self.max_rate
+                    )
+                due, _, uuid = heapq.heappop(self.__queue)
+                if uuid not in self.__orders:
+                    continue
+                future = executor.submit(
+                    self.xmrto_api.order_status, uuid=uuid
+                )
+                self.__pending[future] = uuid
+
+    def __timeout(self):
+        now = time.monotonic()
+        with self.__lock:
+            timeout = self.MAX_IDLE
+            if len(self.__pending) >= self.max_workers:
+                # Nothing can be submitted before a poll finishes,
+                # however overdue the next order is.
+                return timeout
+            if self.__queue:
+                timeout = min(timeout, self.__queue[0][0] - now)
+            if self.max_rate:
+                timeout = max(timeout, self.__next_slot - now)
+        return max(timeout, 0)
+
+    def __handle(self, future, uuid):
+        try:
+            order_status, error = future.result()
+        except (Exception) as e:
+            order_status, error = None, {"error": str(e)}
+
+        with self.__lock:
+            tracked_order = self.__orders.get(uuid, None)
+            if tracked_order is None:
+                return None
+
+            tracked_order.polls += 1
+            previous_state = tracked_order.state
+            transition = None
+            if error:
+                tracked_order.errors += 1
+                transition = OrderTransition(
+                    uuid=uuid,
+                    previous_state=previous_state,
+                    state=previous_state,
+                    order_status=tracked_order.order_status,
+                    error=error,
+                )
+                if tracked_order.errors >= self.max_errors:
+                    logger.error(
+                        f"Stop tracking '{uuid}' after {tracked_order.errors} errors."
+                    )
+                    del self.__orders[uuid]
+                    return transition
+                interval = self.polling_policy.error_interval(
+                    errors=tracked_order.errors
+                )
+            else:
+                if self.store is not None:
+                    self.store.save_status(
+                        uuid=uuid, order_status=order_status
+                    )
+                if self.journal is not None:
+                    self.journal.record(uuid=uuid, state=order_status.state)
+                tracked_order.errors = 0
+                tracked_order.order_status = order_status
+                tracked_order.state = order_status.state
+                if order_status.state == previous_state:
+                    tracked_order.unchanged += 1
+                else:
+                    tracked_order.unchanged = 0
+                    transition = OrderTransition(
+                        uuid=uuid,
+                        previous_state=previous_state,
+                        state=order_status.state,
+                        order_status=order_status,
+                        error=None,
+                    )
+                interval = self.polling_policy.next_interval_for(
+                    order=tracked_order, unchanged=tracked_order.unchanged
+                )
+                if interval is None:
+                    logger.debug(f"'{uuid}' reached '{order_status.state}'.")
+                    del self.__orders[uuid]
+                    return transition
+
+            self.__schedule(uuid=uuid, due=time.monotonic() + interval)
+
+        return transition
+
+    def follow(self):
+        """Poll until every order is final (or 'stop()' is called).
+
+        Yields an `OrderTransition` for every state change and every error.
+        """
+
+        self.__stopped = False
+        with futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="XmrtoOrderTracker",
+        ) as executor:
+            while not self.__stopped and (len(self) or self.__pending):
+                self.__submit_due(executor)
+
+                timeout = self.__timeout()
+                if not self.__pending:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = futures.wait(
+                    list(self.__pending),
+                    timeout=timeout,
+                    return_when=futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    if self.__stopped:
+                        break
+                    with self.__lock:
+                        uuid = self.__pending.pop(future)
+                    transition = self.__handle(future=future, uuid=uuid)
+                    if transition is None:
+                        continue
+                    if self.callback:
+                        self.callback(transition)
+                    yield transition
+
+            for future in self.__pending:
+                future.cancel()
+            self.__pending.clear()
+
+            if self.store is not None:
+                self.store.flush()
+            if self.journal is not None:
+                self.journal.sync()
+
+    def run(self):
+        """Track all orders, reporting to the callback only."""
+
+        for _ in self.follow():
+            pass
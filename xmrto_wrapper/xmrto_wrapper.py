@@ -11,9 +11,13 @@ How to:
     - `xmrto_wrapper create-order --destination 3K1jSVxYqzqj7c9oLKXC7uJnwgACuTEZrY --btc-amount 0.001` --follow
     - `xmrto_wrapper track-order --secret-key xmrto-ebmA9q`
     - `xmrto_wrapper track-order --secret-key xmrto-ebmA9q` --follow
+    - `xmrto_wrapper track-order --file uuids.txt --parallel 16`
+    - `xmrto_wrapper create-orders --file payouts.csv --rate 5`
     - `xmrto_wrapper check-price --btc-amount 0.01`
     - `xmrto_wrapper parameters`
     - `xmrto_wrapper qrcode --data "something"`
+    - `xmrto_wrapper qrcode --file data.txt --cache-dir qrcodes`
+    - `xmrto_wrapper qrcode --secret-key xmrto-ebmA9q --backend local`
   * Get help
     - xmrto_wrapper -h
   * You can
@@ -34,13 +38,21 @@ XMR.to HTTP errors and status codes;
 import os
 import sys
 import argparse
+import atexit
 import logging
 import json
 import time
 import collections
+import copy
+import csv
+import io
+import itertools
 import re
+import threading
+from concurrent import futures
+from decimal import Decimal
 from typing import List, Dict
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from types import SimpleNamespace
 import urllib.parse as urlparse
 
@@ -49,6 +61,25 @@ from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, SSLError, RequestException
 
 from .rand_ip import get_random_ip_address
+from .xmrto_cache import ResponseCache
+from .xmrto_rate_limit import RateLimiter, get_shared_rate_limiter
+from .xmrto_metrics import MetricsRegistry, REGISTRY as METRICS
+from .xmrto_output import OutputWriter, OUTPUT_FORMATS, TEXT, NDJSON
+from .xmrto_address import check_address, network_for_url
+from .xmrto_bolt11 import check_invoice, invoice_hash
+from .xmrto_price_history import PriceHistory
+from .xmrto_qrcode_cache import QrCodeCache
+from .xmrto_sessions import SessionRegistry, pool_stats
+from .xmrto_qrcode import (
+    render as render_image,
+    monero_uri,
+    LOCAL,
+    REMOTE,
+    BACKENDS,
+    PNG,
+    SVG,
+    IMAGE_FORMATS,
+)
 
 logging.basicConfig()
 logger = logging.getLogger("XmrtoWrapper")
@@ -71,6 +102,29 @@ XMR_AMOUNT = os.environ.get("XMR_AMOUNT", None)
 CERTIFICATE = os.environ.get("XMRTO_CERTIFICATE", None)
 QR_DATA = os.environ.get("QR_DATA", None)
 SECRET_KEY = os.environ.get("SECRET_KEY", None)
+# Orders tracked concurrently by `track-order --file`.
+TRACK_WORKERS = int(os.environ.get("XMRTO_TRACK_WORKERS", 8))
+# Orders created concurrently by `create-orders`.
+CREATE_WORKERS = int(os.environ.get("XMRTO_CREATE_WORKERS", 4))
+# QR codes fetched concurrently by `qrcode --file`.
+QRCODE_WORKERS = int(os.environ.get("XMRTO_QRCODE_WORKERS", 4))
+# Directory of the QR code cache, see `QrCodeCache`.
+QRCODE_CACHE = os.environ.get("XMRTO_QRCODE_CACHE", None)
+# Sessions shared by the module level helpers, see `shared_session()`.
+SESSION_POOL_CONNECTIONS = int(
+    os.environ.get(
+        "XMRTO_SESSION_POOL_CONNECTIONS", SessionRegistry.POOL_CONNECTIONS
+    )
+)
+SESSION_POOL_MAXSIZE = int(
+    os.environ.get("XMRTO_SESSION_POOL_MAXSIZE", SessionRegistry.POOL_MAXSIZE)
+)
+SESSION_IDLE_TIMEOUT = float(
+    os.environ.get("XMRTO_SESSION_IDLE_TIMEOUT", SessionRegistry.IDLE_TIMEOUT)
+)
+# Share one rate limit budget between all processes using this database.
+RATE_LIMIT_DB = os.environ.get("XMRTO_RATE_LIMIT_DB", None)
+RATE_LIMIT = float(os.environ.get("XMRTO_RATE_LIMIT", RateLimiter.RATE))
 
 
 @dataclass
@@ -184,6 +238,14 @@ class OrderV3(Order):
 PRICE_FIELDS = ("out_amount", "in_amount", "in_out_rate")
 Price = collections.namedtuple("Price", PRICE_FIELDS)
 
+# The outcome of creating one order of a batch, see `create_orders()`.
+ORDER_RESULT_FIELDS = ("row", "order", "error")
+OrderResult = collections.namedtuple("OrderResult", ORDER_RESULT_FIELDS)
+
+# The outcome of one QR code of a batch, see `generate_qrcodes()`.
+QRCODE_RESULT_FIELDS = ("data", "path", "cached", "error")
+QrCodeResult = collections.namedtuple("QrCodeResult", QRCODE_RESULT_FIELDS)
+
 
 @dataclass
 class PriceAttributes:
@@ -367,16 +429,70 @@ class ParametersV3(Parameters):
 # Parameters = collections.namedtuple("Parameters", PARAMETERS_FIELDS)
 
 
+class BufferSink:
+    """Writes into a preallocated buffer ('bytearray', 'memoryview', ...)."""
+
+    def __init__(self, buffer):
+        self.view = memoryview(buffer).cast("B")
+        self.size = 0
+
+    def write(self, chunk):
+        start = self.size
+        end = start + len(chunk)
+        if end > len(self.view):
+            raise ValueError(f"Buffer of {len(self.view)} bytes too small.")
+        self.view[start:end] = chunk
+        self.size = end
+        return len(chunk)
+
+
 class XmrtoConnection:
     USER_AGENT = "XmrtoProxy/0.1"
     HTTP_TIMEOUT = 30
     MAX_RETRIES = 3
 
-    retry_adapter = HTTPAdapter(max_retries=MAX_RETRIES)
+    RATE_LIMIT_CODES = (codes.forbidden, codes.too_many_requests)
+    # Bytes read at once when streaming a download.
+    CHUNK_SIZE = 64 * 1024
+    # Connection pool of every new session, see `get_pool_stats()`.
+    POOL_CONNECTIONS = SessionRegistry.POOL_CONNECTIONS
+    POOL_MAXSIZE = SessionRegistry.POOL_MAXSIZE
+    POOL_BLOCK = SessionRegistry.POOL_BLOCK
+    KEEP_ALIVE = True
+
+    def __init__(
+        self,
+        url="",
+        connection=None,
+        timeout: int = HTTP_TIMEOUT,
+        rate_limiter: RateLimiter = None,
+        metrics: MetricsRegistry = None,
+        pool_connections: int = POOL_CONNECTIONS,
+        pool_maxsize: int = POOL_MAXSIZE,
+        pool_block: bool = POOL_BLOCK,
+        keep_alive: bool = KEEP_ALIVE,
+    ):
+        """
+        :param connection: An existing session, used as is.
+            The pool and keep alive arguments only apply to new sessions.
+        :param pool_connections: Number of hosts to keep pools for.
+        :param pool_maxsize: Connections kept open per host,
+            at least the number of threads sharing this connection.
+        :param pool_block: Wait for a free connection when all
+            'pool_maxsize' are in use, instead of opening one to discard.
+        :param keep_alive: If False, every request closes its connection.
+        """
 
-    def __init__(self, url="", connection=None, timeout: int = HTTP_TIMEOUT):
         self.__url = ""
         self.__timeout = timeout
+        self.__metrics = metrics or METRICS
+        if rate_limiter is None and RATE_LIMIT_DB:
+            rate_limiter = get_shared_rate_limiter(
+                path=RATE_LIMIT_DB, rate=RATE_LIMIT
+            )
+        self.__rate_limiter = rate_limiter
+        self.__in_flight = {}
+        self.__in_flight_lock = threading.Lock()
 
         if connection:
             logger.debug("Use existing session.")
@@ -384,18 +500,31 @@ class XmrtoConnection:
         else:
             logger.debug("Create new session.")
             self.__url = urlparse.urlparse(url)
-            headers = {
-                "Content-Type": "application/json",
-                "User-Agent": self.USER_AGENT,
-                "Host": self.__url.hostname,
-            }
-
-            self.__conn = Session()
+            self.__conn = self.create_session(url)
+            # Per session, instances do not compete for one pool.
             self.__conn.mount(
                 f"{self.__url.scheme}://{self.__url.hostname}",
-                self.retry_adapter,
+                HTTPAdapter(
+                    pool_connections=pool_connections,
+                    pool_maxsize=pool_maxsize,
+                    pool_block=pool_block,
+                    max_retries=self.MAX_RETRIES,
+                ),
             )
-            self.__conn.headers = headers
+            if not keep_alive:
+                self.__conn.headers["Connection"] = "close"
+
+    @classmethod
+    def create_session(cls, url):
+        """A session sending the headers XMR.to expects."""
+
+        session = Session()
+        session.headers = {
+            "Content-Type": "application/json",
+            "User-Agent": cls.USER_AGENT,
+            "Host": urlparse.urlparse(url).hostname,
+        }
+        return session
 
     def get_connection(self):
         return self.__conn
@@ -403,18 +532,47 @@ class XmrtoConnection:
     def get_hostname(self):
         return self.__url.hostname
 
-    def get(self, url: str, expect_json=True):
-        return self._request(url=url, func=self._get, expect_json=expect_json)
+    def get_rate_limiter(self):
+        return self.__rate_limiter
+
+    def get_metrics(self):
+        return self.__metrics
+
+    def get_pool_stats(self):
+        """Connections in use, idle and discarded per host, `pool_stats()`."""
+
+        return pool_stats(self.__conn)
+
+    def get(self, url: str, expect_json=True, coalesce=True):
+        return self._request(
+            url=url, func=self._get, expect_json=expect_json, coalesce=coalesce
+        )
 
     def _get(self, url: str, **kwargs):
         return self.__conn.get(url=url, timeout=self.__timeout, **kwargs)
 
+    def download(self, url: str, sink):
+        """Stream the response body into 'sink', without decoding it.
+
+        :param sink: A binary file object (anything with 'write()')
+            or a writable buffer, e.g. a 'bytearray' or 'memoryview'.
+        :return: The number of bytes written, or an error dict.
+        """
+
+        if not hasattr(sink, "write"):
+            sink = BufferSink(sink)
+        return self._request(url=url, func=self._get_stream, sink=sink)
+
+    def _get_stream(self, url: str, **kwargs):
+        return self._get(url=url, stream=True, **kwargs)
+
     def post(
         self,
         url: str,
         postdata: Dict[str, str],
         expect_json=True,
         expect_response=True,
+        coalesce=False,
     ):
         return self._request(
             url=url,
@@ -422,6 +580,7 @@ class XmrtoConnection:
             postdata=postdata,
             expect_json=expect_json,
             expect_response=expect_response,
+            coalesce=coalesce,
         )
 
     def _post(self, url: str, postdata: str, **kwargs):
@@ -434,16 +593,14 @@ class XmrtoConnection:
             **kwargs,  # , allow_redirects=False
         )
 
-    def _request(
-        self,
-        url: str,
-        func,
-        postdata: Dict[str, str] = None,
-        expect_json=True,
-        expect_response=True,
-    ):
-        """Makes the HTTP request"""
+    @classmethod
+    def _normalize_url(cls, url: str):
+        """Lower case the URL and enforce HTTPS, except for localhost.
 
+        The query is kept as it is, e.g. QR code data is case sensitive.
+        """
+
+        url, separator, query = url.partition("?")
         url = url.lower()
         if url.find("localhost") < 0:
             schema = re.compile("http[s]?://")
@@ -455,10 +612,141 @@ class XmrtoConnection:
             if http.match(url):  # 'match' starts at the begining of the line.
                 url = url.replace("http", "https")
 
+        return url + separator + query
+
+    @classmethod
+    def _request_error(cls, url: str, error, error_code: int):
+        error_msg = {"error": str(error)}
+        error_msg["url"] = url
+        error_msg["error_code"] = error_code
+        logger.error(json.dumps(error_msg))
+        return error_msg
+
+    @classmethod
+    def _in_flight_key(
+        cls, method, url, postdata, expect_json=True, expect_response=True
+    ):
+        return (
+            method,
+            cls._normalize_url(url),
+            json.dumps(postdata, sort_keys=True),
+            expect_json,
+            expect_response,
+        )
+
+    def _request(
+        self,
+        url: str,
+        func,
+        postdata: Dict[str, str] = None,
+        expect_json=True,
+        expect_response=True,
+        coalesce=False,
+        sink=None,
+    ):
+        """Makes the HTTP request, once for identical concurrent requests.
+
+        With 'coalesce', a request that is identical to one in flight
+        (method, URL and postdata) waits for that one and gets its result.
+        Only use it for idempotent requests.
+        With 'sink', the response body is streamed into it, see 'download()'.
+        """
+
+        if not coalesce or sink is not None:
+            return self.__request(
+                url=url,
+                func=func,
+                postdata=postdata,
+                expect_json=expect_json,
+                expect_response=expect_response,
+                sink=sink,
+            )
+
+        key = self._in_flight_key(
+            func.__name__, url, postdata, expect_json, expect_response
+        )
+        with self.__in_flight_lock:
+            in_flight = self.__in_flight.get(key, None)
+            leader = in_flight is None
+            if leader:
+                in_flight = SimpleNamespace(
+                    done=threading.Event(), result=None
+                )
+                self.__in_flight[key] = in_flight
+
+        if not leader:
+            logger.debug(f"Waiting for identical request: '{key}'.")
+            in_flight.done.wait()
+            return copy.deepcopy(in_flight.result)
+
+        try:
+            in_flight.result = self.__request(
+                url=url,
+                func=func,
+                postdata=postdata,
+                expect_json=expect_json,
+                expect_response=expect_response,
+            )
+        finally:
+            with self.__in_flight_lock:
+                del self.__in_flight[key]
+            in_flight.done.set()
+
+        return in_flight.result
+
+    def __request(
+        self,
+        url: str,
+        func,
+        postdata: Dict[str, str] = None,
+        expect_json=True,
+        expect_response=True,
+        sink=None,
+    ):
+        """Makes the HTTP request and records it in the metrics."""
+
+        counts = SimpleNamespace(attempts=0, rate_limited=0)
+        start = time.perf_counter()
+        response = self.__send(
+            url=url,
+            func=func,
+            postdata=postdata,
+            expect_json=expect_json,
+            expect_response=expect_response,
+            counts=counts,
+            sink=sink,
+        )
+        self.__metrics.observe_response(
+            url=url,
+            latency=time.perf_counter() - start,
+            response=response,
+            retries=max(counts.attempts - 1, 0),
+            rate_limited=counts.rate_limited,
+        )
+        return response
+
+    def __send(
+        self,
+        url: str,
+        func,
+        postdata: Dict[str, str] = None,
+        expect_json=True,
+        expect_response=True,
+        counts=None,
+        sink=None,
+    ):
+        """Makes the HTTP request"""
+
+        url = self._normalize_url(url)
+
         logger.debug(f"--> URL: {url}")
 
+        host = urlparse.urlparse(url).netloc
         response = None
         retries = 10
+        if self.__rate_limiter:
+            retries = self.__rate_limiter.max_retries
+        attempt = 0
         try:
             try:
                 data = {"url": url}
@@ -466,20 +754,40 @@ class XmrtoConnection:
                     data["postdata"] = json.dumps(postdata)
 
                 while retries > 0:
-                    # Get around endpoint rate limit
-                    # by setting a random IP in 'X-Forwarded-For'.
-                    # Naive approach.
                     if (
                         response is not None
-                        and response.status_code == codes.forbidden
+                        and response.status_code in self.RATE_LIMIT_CODES
                     ):
-                        logger.info(f"[{retries}] Rate limited, trying again.")
                         retries -= 1
-                        random_ip = get_random_ip_address()
-                        # 'X-Forwarded-For' is added
-                        # in addition to the session headers.
-                        # https://requests.readthedocs.io/en/master/user/advanced/
-                        data["headers"] = {"X-Forwarded-For": random_ip}
+                        if self.__rate_limiter:
+                            delay = self.__rate_limiter.rate_limited(
+                                host=host,
+                                attempt=attempt,
+                                retry_after=response.headers.get(
+                                    "Retry-After", None
+                                ),
+                            )
+                            logger.info(
+                                f"[{retries}] Rate limited, trying again in {delay:.2f} seconds."
+                            )
+                        else:
+                            # Get around endpoint rate limit
+                            # by setting a random IP in 'X-Forwarded-For'.
+                            # Naive approach.
+                            logger.info(
+                                f"[{retries}] Rate limited, trying again."
+                            )
+                            random_ip = get_random_ip_address()
+                            # 'X-Forwarded-For' is added
+                            # in addition to the session headers.
+                            # https://requests.readthedocs.io/en/master/user/advanced/
+                            data["headers"] = {"X-Forwarded-For": random_ip}
+                        attempt += 1
+                        # Unread (streamed) responses hold their connection.
+                        response.close()
+                    if self.__rate_limiter:
+                        self.__rate_limiter.acquire(host)
+                    counts.attempts += 1
                     response = func(**data)
                     logger.debug(f"--> METHOD: {response.request.method}.")
                     logger.debug(
@@ -487,8 +795,10 @@ class XmrtoConnection:
                     )
                     logger.debug(f"<-- STATUS CODE: {response.status_code}.")
                     logger.debug(f"<-- RESPONE HEADERS: {response.headers}.")
-                    if response.status_code != codes.forbidden:
+                    if response.status_code not in self.RATE_LIMIT_CODES:
                         retries = 0
+                    else:
+                        counts.rate_limited += 1
 
             except (SSLError) as e:
                 # Disable verification: verify=False
@@ -500,32 +810,77 @@ class XmrtoConnection:
                 data["cert"] = CERTIFICATE
                 data["verify"] = True
 
+                if self.__rate_limiter:
+                    self.__rate_limiter.acquire(host)
+                counts.attempts += 1
                 response = func(**data)
         except (ConnectionError) as e:
             logger.debug(f"Connection error: {str(e)}.")
-            error_msg = {"error": str(e)}
-            error_msg["url"] = url
-            error_msg["error_code"] = 102
-            logger.error(json.dumps(error_msg))
-            return error_msg
+            return self._request_error(url=url, error=e, error_code=102)
         except (RequestException) as e:
             logger.debug(f"Request error: {str(e)}.")
-            error_msg = {"error": str(e)}
-            error_msg["url"] = url
-            error_msg["error_code"] = 104
-            logger.error(json.dumps(error_msg))
-            return error_msg
+            return self._request_error(url=url, error=e, error_code=104)
         except (Exception) as e:
             logger.debug(f"Error: {str(e)}.")
-            error_msg = {"error": str(e)}
-            error_msg["url"] = url
-            error_msg["error_code"] = 103
-            logger.error(json.dumps(error_msg))
-            return error_msg
+            return self._request_error(url=url, error=e, error_code=103)
+
+        if sink is not None:
+            return self._stream_response(url=url, response=response, sink=sink)
+
+        return self._evaluate_response(
+            url=url,
+            response=response,
+            expect_json=expect_json,
+            expect_response=expect_response,
+        )
+
+    @classmethod
+    def _streamable(cls, status_code, headers):
+        """False for responses to evaluate as usual, e.g. API errors."""
+
+        content_type = headers.get("Content-Type", "")
+        return status_code == codes.ok and "json" not in content_type
+
+    @classmethod
+    def _stream_response(cls, url: str, response, sink):
+        """Write the response body to 'sink', chunk by chunk.
+
+        :return: The number of bytes written, or an error dict.
+        """
+
+        try:
+            if not cls._streamable(response.status_code, response.headers):
+                return cls._evaluate_response(url=url, response=response)
+
+            size = 0
+            for chunk in response.iter_content(chunk_size=cls.CHUNK_SIZE):
+                sink.write(chunk)
+                size += len(chunk)
+        except (RequestException) as e:
+            logger.debug(f"Request error: {str(e)}.")
+            return cls._request_error(url=url, error=e, error_code=104)
+        except (Exception) as e:
+            logger.debug(f"Error: {str(e)}.")
+            return cls._request_error(url=url, error=e, error_code=103)
+        finally:
+            response.close()
+
+        logger.debug(f"<-- {size} bytes.")
+        return size
+
+    @classmethod
+    def _evaluate_response(
+        cls, url: str, response, expect_json=True, expect_response=True
+    ):
+        """Turn an HTTP response into the decoded result or an error dict.
+
+        Shared by every transport, so all of them follow the same
+        error contract (error codes 100 and 101, API errors).
+        """
 
         response_ = None
         try:
-            response_ = self._get_response(
+            response_ = cls._get_response(
                 response=response, expect_json=expect_json
             )
         except (ValueError) as e:
@@ -558,7 +913,8 @@ class XmrtoConnection:
 
         return response_
 
-    def _get_response(self, response, expect_json=True):
+    @classmethod
+    def _get_response(cls, response, expect_json=True):
         """Evaluate HTTP request response
 
         :return: Either JSON response or response object in case of PNG (QRCode)
@@ -814,6 +1170,143 @@ class CheckQrCode:
         return data
 
 
+class OrderValidator:
+    """Reject orders XMR.to would reject, before sending them.
+
+    * Amounts outside 'lower_limit'/'upper_limit'
+      ('ln_lower_limit'/'ln_upper_limit' for lightning orders).
+    * With 'zero_conf', amounts XMR.to would not process
+      with zero confirmations.
+
+    Destinations and lightning invoices are checked by `XmrtoApi` itself.
+
+    The order parameters are kept for 'ttl' seconds.
+    """
+
+    TTL = 60
+    # Next to the error codes assigned by `XmrtoConnection`.
+    ERROR_CODE = 105
+
+    def __init__(self, ttl: float = TTL, zero_conf: bool = False):
+        self.ttl = ttl
+        self.zero_conf = zero_conf
+
+        self.__lock = threading.Lock()
+        self.__parameters = None
+        self.__updated = 0.0
+
+    def get_parameters(self):
+        """The order parameters, None if there are none or they expired."""
+
+        with self.__lock:
+            if (
+                self.__parameters is not None
+                and time.monotonic() - self.__updated < self.ttl
+            ):
+                return self.__parameters
+            return None
+
+    def set_parameters(self, parameters):
+        with self.__lock:
+            self.__parameters = parameters
+            self.__updated = time.monotonic()
+
+    @classmethod
+    def to_decimal(cls, value):
+        """A parameter as `Decimal`, None if missing or not a number.
+
+        JSON numbers are parsed as floats,
+        'Decimal(0.002)' would be slightly above 0.002.
+        """
+
+        if value is None:
+            return None
+        try:
+            value = Decimal(str(value))
+        except (ArithmeticError):
+            return None
+        return value if value.is_finite() else None
+
+    @classmethod
+    def _error(cls, url: str, error: str, error_msg: str):
+        return {
+            "error": error,
+            "error_msg": error_msg,
+            "url": url,
+            "error_code": cls.ERROR_CODE,
+        }
+
+    def check_amount(
+        self,
+        parameters,
+        amount,
+        currency="BTC",
+        lightning: bool = False,
+        url: str = "",
+    ):
+        """Error (as returned by the API) for an invalid amount, or None.
+
+        Limits missing from 'parameters' are not checked.
+        """
+
+        invalid = self._error(
+            url=url,
+            error="Invalid amount.",
+            error_msg=f"'{amount}' is not a valid amount.",
+        )
+        try:
+            amount = Decimal(str(amount))
+        except (ArithmeticError):
+            return invalid
+        if not amount.is_finite() or amount <= 0:
+            return invalid
+
+        out_amount = amount
+        if currency.upper() == "XMR":
+            price = self.to_decimal(parameters.price)
+            if price is None:
+                # Without a rate, XMR.to has to check the amount.
+                return None
+            out_amount = amount * price
+
+        if lightning:
+            lower_limit = self.to_decimal(parameters.ln_lower_limit)
+            upper_limit = self.to_decimal(parameters.ln_upper_limit)
+        else:
+            lower_limit = self.to_decimal(parameters.lower_limit)
+            upper_limit = self.to_decimal(parameters.upper_limit)
+        if (lower_limit is not None and out_amount < lower_limit) or (
+            upper_limit is not None and out_amount > upper_limit
+        ):
+            return self._error(
+                url=url,
+                error="Amount out of range.",
+                error_msg=f"{out_amount} BTC is not between {lower_limit} and {upper_limit} BTC.",
+            )
+
+        if self.zero_conf and not lightning:
+            zero_conf_max_amount = self.to_decimal(
+                parameters.zero_conf_max_amount
+            )
+            if not parameters.zero_conf_enabled:
+                return self._error(
+                    url=url,
+                    error="No zero confirmation order.",
+                    error_msg="Zero confirmation orders are disabled.",
+                )
+            if (
+                zero_conf_max_amount is not None
+                and out_amount > zero_conf_max_amount
+            ):
+                return self._error(
+                    url=url,
+                    error="No zero confirmation order.",
+                    error_msg=f"{out_amount} BTC is above the zero confirmation maximum of {zero_conf_max_amount} BTC.",
+                )
+
+        return None
+
+
 class XmrtoApi:
     CREATE_ORDER_ENDPOINT = "/api/{api_version}/xmr2btc/order_create/"
     CREATE_LN_ORDER_ENDPOINT = "/api/{api_version}/xmr2btc/order_create_ln/"
@@ -835,14 +1328,125 @@ class XmrtoApi:
         url=XMRTO_URL_DEFAULT,
         api=API_VERSION_DEFAULT,
         connection=None,
+        cache: ResponseCache = None,
+        rate_limiter: RateLimiter = None,
+        metrics: MetricsRegistry = None,
+        validator: OrderValidator = None,
+        qrcode_cache: QrCodeCache = None,
+        pool_connections: int = XmrtoConnection.POOL_CONNECTIONS,
+        pool_maxsize: int = XmrtoConnection.POOL_MAXSIZE,
+        pool_block: bool = XmrtoConnection.POOL_BLOCK,
+        keep_alive: bool = XmrtoConnection.KEEP_ALIVE,
     ):
         self.url = url[:-1] if url.endswith("/") else url
         self.api = api
-        self.__xmr_conn = XmrtoConnection(url=self.url, connection=connection)
+        self.cache = cache
+        self.qrcode_cache = qrcode_cache
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.validator = validator
+        # See `XmrtoConnection`.
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        # Destinations are checked against the network of 'url'.
+        self.network = network_for_url(self.url)
+        self.__xmr_conn = self._create_connection(connection=connection)
+
+    def _create_connection(self, connection=None):
+        return XmrtoConnection(
+            url=self.url,
+            connection=connection,
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            keep_alive=self.keep_alive,
+        )
 
     def get_connection(self):
         return self.__xmr_conn
 
+    def _send(self, request):
+        """Hand a prepared request to the connection.
+
+        For an asynchronous connection this returns an awaitable.
+        """
+
+        request = dict(request)
+        method = request.pop("method")
+        if method == "get":
+            request.pop("postdata", None)
+            request.pop("expect_response", None)
+            return self.__xmr_conn.get(**request)
+
+        return self.__xmr_conn.post(**request)
+
+    def _cache_key(self, endpoint, request):
+        if self.cache is None:
+            return None
+        postdata = request.get("postdata", None) or {}
+        return self.cache.key(
+            endpoint,
+            self.url,
+            self.api,
+            postdata.get("amount", postdata.get("btc_amount", None)),
+            postdata.get("amount_currency", None),
+        )
+
+    @classmethod
+    def _cacheable(cls, response):
+        return bool(response) and not (
+            isinstance(response, dict) and "error" in response
+        )
+
+    def _routes_cache_key(self, invoice):
+        if self.cache is None:
+            return None
+        return (
+            ResponseCache.ROUTES,
+            self.url,
+            self.api,
+            invoice_hash(invoice.invoice),
+        )
+
+    def __refresh(self, key, request, ttl=None):
+        try:
+            response = self._send(request)
+            if self._cacheable(response):
+                self.cache.set(key, response, ttl=ttl)
+        finally:
+            self.cache.finish_refresh(key)
+
+    def _send_cached(self, key, request, ttl=None):
+        """Like '_send()', but served from the cache if possible.
+
+        Stale responses are returned right away
+        and refreshed in a background thread.
+
+        :param ttl: Passed on to 'ResponseCache.set()'.
+        """
+
+        if key is None:
+            return self._send(request)
+
+        response, fresh = self.cache.get(key)
+        if response is not None:
+            if not fresh and self.cache.start_refresh(key):
+                threading.Thread(
+                    target=self.__refresh,
+                    args=(key, request, ttl),
+                    daemon=True,
+                ).start()
+            return response
+
+        response = self._send(request)
+        if self._cacheable(response):
+            self.cache.set(key, response, ttl=ttl)
+        return response
+
     def __add_amount_and_currency(self, out_amount=None, currency=None):
         additional_api_keys = {}
         amount_key = "btc_amount"
@@ -854,7 +1458,9 @@ class XmrtoApi:
 
         return additional_api_keys
 
-    def create_order(self, out_address=None, out_amount=None, currency="BTC"):
+    def _create_order_request(
+        self, out_address=None, out_amount=None, currency="BTC"
+    ):
         if out_address is None:
             error = {
                 "error": "Argument missing.",
@@ -871,6 +1477,16 @@ class XmrtoApi:
             api_version=self.api
         )
 
+        error_msg = check_address(address=out_address, network=self.network)
+        if error_msg:
+            error = OrderValidator._error(
+                url=create_order_url,
+                error="Invalid destination.",
+                error_msg=error_msg,
+            )
+            logger.error(f"Rejected order: {json.dumps(error)}.")
+            return None, error
+
         postdata = {"btc_dest_address": out_address}
         postdata.update(
             self.__add_amount_and_currency(
@@ -878,13 +1494,101 @@ class XmrtoApi:
             )
         )
 
-        response = self.__xmr_conn.post(
-            url=create_order_url, postdata=postdata
+        return {
+            "method": "post",
+            "url": create_order_url,
+            "postdata": postdata,
+        }, None
+
+    def validation_parameters(self):
+        """The order parameters the 'validator' checks orders against.
+
+        Fetched if there are none yet or they expired, so calling this
+        before creating many orders fetches them once, up front.
+        None without a 'validator' or if they could not be fetched.
+        """
+
+        if self.validator is None:
+            return None
+        parameters = self.validator.get_parameters()
+        if parameters is None:
+            parameters, error = self.order_check_parameters()
+            if error:
+                logger.warning("No order parameters, not validating.")
+                return None
+            self.validator.set_parameters(parameters)
+        return parameters
+
+    def _validate_order(
+        self, request, parameters, out_amount, currency, lightning=False
+    ):
+        """Error for an order the validator rejects, None otherwise."""
+
+        if parameters is None:
+            return None
+        return self.validator.check_amount(
+            parameters=parameters,
+            amount=out_amount,
+            currency=currency,
+            lightning=lightning,
+            url=request["url"],
         )
 
+    def _check_invoice(self, request, ln_invoice):
+        """Decode an invoice, rejecting invalid and expired ones.
+
+        :return: '(invoice, error)'
+        """
+
+        invoice, error_msg = check_invoice(
+            ln_invoice=ln_invoice, network=self.network
+        )
+        if error_msg:
+            error = OrderValidator._error(
+                url=request["url"],
+                error="Invalid invoice.",
+                error_msg=error_msg,
+            )
+            logger.error(f"Rejected invoice: {json.dumps(error)}.")
+            return None, error
+        return invoice, None
+
+    def _validate_ln_order(self, request, parameters, invoice):
+        """Error for an invoice amount the validator rejects, or None."""
+
+        if invoice.amount is None:
+            return None
+        return self._validate_order(
+            request=request,
+            parameters=parameters,
+            out_amount=invoice.amount,
+            currency="BTC",
+            lightning=True,
+        )
+
+    def create_order(self, out_address=None, out_amount=None, currency="BTC"):
+        request, error = self._create_order_request(
+            out_address=out_address, out_amount=out_amount, currency=currency
+        )
+        if error:
+            return None, error
+
+        if self.validator is not None:
+            error = self._validate_order(
+                request=request,
+                parameters=self.validation_parameters(),
+                out_amount=out_amount,
+                currency=currency,
+            )
+            if error:
+                logger.error(f"Rejected order: {json.dumps(error)}.")
+                return None, error
+
+        response = self._send(request)
+
         return CreateOrder.get(data=response, api=self.api)
 
-    def create_ln_order(self, ln_invoice=None):
+    def _create_ln_order_request(self, ln_invoice=None):
         if ln_invoice is None:
             error = {
                 "error": "Argument missing.",
@@ -897,13 +1601,38 @@ class XmrtoApi:
 
         postdata = {"ln_invoice": ln_invoice}
 
-        response = self.__xmr_conn.post(
-            url=create_order_url, postdata=postdata
+        return {
+            "method": "post",
+            "url": create_order_url,
+            "postdata": postdata,
+        }, None
+
+    def create_ln_order(self, ln_invoice=None):
+        request, error = self._create_ln_order_request(ln_invoice=ln_invoice)
+        if error:
+            return None, error
+
+        invoice, error = self._check_invoice(
+            request=request, ln_invoice=ln_invoice
         )
+        if error:
+            return None, error
+
+        if self.validator is not None:
+            error = self._validate_ln_order(
+                request=request,
+                parameters=self.validation_parameters(),
+                invoice=invoice,
+            )
+            if error:
+                logger.error(f"Rejected order: {json.dumps(error)}.")
+                return None, error
+
+        response = self._send(request)
 
         return CreateOrder.get(data=response, api=self.api)
 
-    def order_status(self, uuid=None):
+    def _order_status_request(self, uuid=None):
         if uuid is None:
             error = {
                 "error": "Argument missing.",
@@ -915,31 +1644,44 @@ class XmrtoApi:
         )
         postdata = {"uuid": uuid}
 
-        response = self.__xmr_conn.post(
-            url=order_status_url, postdata=postdata
-        )
+        return {
+            "method": "post",
+            "url": order_status_url,
+            "postdata": postdata,
+            "coalesce": True,
+        }, None
+
+    def order_status(self, uuid=None):
+        request, error = self._order_status_request(uuid=uuid)
+        if error:
+            return None, error
+
+        response = self._send(request)
 
         return OrderStatus.get(data=response, api=self.api)
 
-    def confirm_partial_payment(self, uuid=None):
+    def _confirm_partial_payment_request(self, uuid=None):
         if uuid is None:
             error = {
                 "error": "Argument missing.",
                 "error_msg": "Expected argument '--secret-key', see 'python xmrto-wrapper.py -h'.",
             }
-            return False, error
+            return None, error
         partial_payment_url = self.url + self.PARTIAL_PAYMENT_ENDPOINT.format(
             api_version=self.api
         )
         postdata = {"uuid": uuid}
 
-        response = self.__xmr_conn.post(
-            url=partial_payment_url,
-            postdata=postdata,
-            expect_json=False,
-            expect_response=False,
-        )
+        return {
+            "method": "post",
+            "url": partial_payment_url,
+            "postdata": postdata,
+            "expect_json": False,
+            "expect_response": False,
+        }, None
 
+    @classmethod
+    def _confirm_partial_payment_result(cls, response):
         xmrto_error = None
         confirmed = True
         if response and "error" in response:
@@ -951,7 +1693,16 @@ class XmrtoApi:
 
         return confirmed, xmrto_error
 
-    def order_check_price(
+    def confirm_partial_payment(self, uuid=None):
+        request, error = self._confirm_partial_payment_request(uuid=uuid)
+        if error:
+            return False, error
+
+        response = self._send(request)
+
+        return self._confirm_partial_payment_result(response)
+
+    def _order_check_price_request(
         self, btc_amount=None, xmr_amount=None, currency="BTC"
     ):
         if btc_amount is None and xmr_amount is None:
@@ -978,13 +1729,29 @@ class XmrtoApi:
             )
         )
 
-        response = self.__xmr_conn.post(
-            url=order_check_price_url, postdata=postdata
+        return {
+            "method": "post",
+            "url": order_check_price_url,
+            "postdata": postdata,
+            "coalesce": True,
+        }, None
+
+    def order_check_price(
+        self, btc_amount=None, xmr_amount=None, currency="BTC"
+    ):
+        request, error = self._order_check_price_request(
+            btc_amount=btc_amount, xmr_amount=xmr_amount, currency=currency
+        )
+        if error:
+            return None, error
+
+        response = self._send_cached(
+            key=self._cache_key(ResponseCache.PRICE, request), request=request
         )
 
         return CheckPrice.get(data=response, api=self.api)
 
-    def order_check_ln_routes(self, ln_invoice=None):
+    def _order_check_ln_routes_request(self, ln_invoice=None):
         logger.debug(ln_invoice)
         if ln_invoice is None:
             error = {
@@ -997,37 +1764,187 @@ class XmrtoApi:
             + self.CHECK_LN_ROUTES_ENDPOINT.format(api_version=self.api)
         )
 
-        query_param = f"?ln_invoice={ln_invoice}"
+        query_param = f"?ln_invoice={ln_invoice}"
+
+        return {
+            "method": "get",
+            "url": order_check_ln_routes_url + query_param,
+        }, None
+
+    def order_check_ln_routes(self, ln_invoice=None):
+        """Routes for an invoice, cached until the invoice expires."""
+
+        request, error = self._order_check_ln_routes_request(
+            ln_invoice=ln_invoice
+        )
+        if error:
+            return None, error
+
+        invoice, error = self._check_invoice(
+            request=request, ln_invoice=ln_invoice
+        )
+        if error:
+            return None, error
+
+        response = self._send_cached(
+            key=self._routes_cache_key(invoice),
+            request=request,
+            ttl=invoice.seconds_till_expiry(),
+        )
+
+        return CheckRoutes.get(data=response, api=self.api)
+
+    def _order_check_parameters_request(self):
+        order_check_parameters_url = (
+            self.url
+            + self.CHECK_PARAMETERS_ENDPOINT.format(api_version=self.api)
+        )
+
+        return {"method": "get", "url": order_check_parameters_url}, None
+
+    def order_check_parameters(self):
+        request, error = self._order_check_parameters_request()
+
+        response = self._send_cached(
+            key=self._cache_key(ResponseCache.PARAMETERS, request),
+            request=request,
+        )
+
+        return CheckParameters.get(data=response, api=self.api)
+
+    def _generate_qrcode_request(self, data=None):
+        if data is None:
+            error = {
+                "error": "Argument missing.",
+                "error_msg": "Expected argument '--data', see 'python xmrto-wrapper.py -h'.",
+            }
+            return None, error
+        generate_qrcode_url = (
+            self.url
+            + self.QRCODE_ENDPOINT.format(api_version=self.api)
+            + f"/?data={urlparse.quote(str(data), safe='')}"
+        )
+
+        return {
+            "method": "get",
+            "url": generate_qrcode_url,
+            "expect_json": False,
+        }, None
 
-        response = self.__xmr_conn.get(
-            url=order_check_ln_routes_url + query_param
-        )
+    @classmethod
+    def _write_qrcode(cls, url, qrcode, sink=None, path=None):
+        """Hand out a QR code image, see 'download_qrcode()'."""
 
-        return CheckRoutes.get(data=response, api=self.api)
+        try:
+            if sink is not None:
+                if not hasattr(sink, "write"):
+                    sink = BufferSink(sink)
+                sink.write(qrcode)
+                return len(qrcode), None
+            if path is not None:
+                temporary_path = path + ".tmp"
+                with open(temporary_path, "wb") as qrcode_file:
+                    qrcode_file.write(qrcode)
+                os.replace(temporary_path, path)
+                return path, None
+        except (Exception) as e:
+            logger.debug(f"Error: {str(e)}.")
+            return None, XmrtoConnection._request_error(
+                url=url, error=e, error_code=103
+            )
+        return qrcode, None
 
-    def order_check_parameters(self):
-        order_check_parameters_url = (
-            self.url
-            + self.CHECK_PARAMETERS_ENDPOINT.format(api_version=self.api)
-        )
+    def _qrcode_download(self, data=None, sink=None, path=None):
+        """Where 'download_qrcode()' streams the QR code image to.
 
-        response = self.__xmr_conn.get(url=order_check_parameters_url)
+        :return: '(request, target, result)', the 'result' if there is
+            nothing to download (an error or a cached QR code).
+        """
 
-        return CheckParameters.get(data=response, api=self.api)
+        request, error = self._generate_qrcode_request(data=data)
+        if error:
+            return None, None, (None, error)
+
+        if self.qrcode_cache is not None:
+            qrcode = self.qrcode_cache.get(data)
+            if qrcode is not None:
+                return (
+                    None,
+                    None,
+                    self._write_qrcode(
+                        url=request["url"], qrcode=qrcode, sink=sink, path=path
+                    ),
+                )
+            # Cached before it is handed out.
+            return request, io.BytesIO(), None
+        if sink is not None:
+            return request, sink, None
+        if path is not None:
+            return request, open(path + ".tmp", "wb"), None
+        return request, io.BytesIO(), None
+
+    def _qrcode_downloaded(
+        self, data, request, target, response, sink=None, path=None
+    ):
+        """The result of 'download_qrcode()', once streamed to 'target'."""
+
+        if self.qrcode_cache is None and sink is None and path is not None:
+            target.close()
+            if isinstance(response, dict):
+                os.remove(target.name)
+                return None, response
+            os.replace(target.name, path)
+            return path, None
+
+        if isinstance(response, dict):
+            return None, response
+        if self.qrcode_cache is not None:
+            qrcode = target.getvalue()
+            self.qrcode_cache.put(data, qrcode)
+            return self._write_qrcode(
+                url=request["url"], qrcode=qrcode, sink=sink, path=path
+            )
+        if sink is not None:
+            return response, None
+        return target.getvalue(), None
+
+    def download_qrcode(self, data=None, sink=None, path=None):
+        """Stream the QR code image (PNG) for 'data'.
+
+        With a 'qrcode_cache', stored QR codes are not fetched again.
+
+        :param sink: Binary file object or writable buffer to write to.
+        :param path: File to write to, replaced once complete.
+        :return: '(qrcode, error)', 'qrcode' being the number of bytes
+            written to 'sink', 'path', or else the image as bytes.
+        """
+
+        request, target, result = self._qrcode_download(
+            data=data, sink=sink, path=path
+        )
+        if result is not None:
+            return result
+
+        response = self.__xmr_conn.download(url=request["url"], sink=target)
+
+        return self._qrcode_downloaded(
+            data=data,
+            request=request,
+            target=target,
+            response=response,
+            sink=sink,
+            path=path,
+        )
 
     def generate_qrcode(self, data=None):
+        """The QR code image (PNG) as bytes, an error dict if it failed."""
+
         if data is None:
             return None
-        generate_qrcode_url = (
-            self.url
-            + self.QRCODE_ENDPOINT.format(api_version=self.api)
-            + f"/?data={data}"
-        )
-        response = self.__xmr_conn.get(
-            url=generate_qrcode_url, expect_json=False
-        )
 
-        return CheckQrCode.get(data=response, api=self.api)
+        qrcode, error = self.download_qrcode(data=data)
+
+        return CheckQrCode.get(data=error or qrcode, api=self.api)
 
 
 class OrderStateType(type):
@@ -1044,9 +1961,28 @@ class OrderStateType(type):
         x.FLAGGED_DESTINATION_ADDRESS = "FLAGGED_DESTINATION_ADDRESS"
         x.PAYMENT_FAILED = "PAYMENT_FAILED"
         x.REJECTED = "REJECTED"
+        # No further state changes after these.
+        x.FINAL_STATES = (
+            x.BTC_SENT,
+            x.TIMED_OUT,
+            x.PURGED,
+            x.FLAGGED_DESTINATION_ADDRESS,
+            x.PAYMENT_FAILED,
+            x.REJECTED,
+        )
         return x
 
 
+def status_to_json(order_status):
+    """A `Status` keyed like the API response, without empty fields."""
+
+    data = {}
+    for name, value in asdict(order_status).items():
+        if value is not None:
+            data[getattr(order_status.attributes, name, name)] = value
+    return data
+
+
 class XmrtoOrderStatus:
     def __init__(
         self,
@@ -1054,12 +1990,16 @@ class XmrtoOrderStatus:
         api=API_VERSION_DEFAULT,
         uuid=None,
         connection=None,
+        store=None,
+        journal=None,
     ):
         self.url = url[:-1] if url.endswith("/") else url
         self.api = api
         self.xmrto_api = XmrtoApi(
             url=self.url, api=self.api, connection=connection
         )
+        self.store = store
+        self.journal = journal
         self.uuid = uuid
         self.order_status = None
         self.error = None
@@ -1108,6 +2048,11 @@ class XmrtoOrderStatus:
                 self.payments = self.order_status.payments
                 self.uses_lightning = self.order_status.uses_lightning
 
+            if self.store is not None:
+                self.store.save(self)
+            if self.journal is not None:
+                self.journal.record_status(self)
+
         return True
 
     def confirm_partial_payment(self, uuid=None):
@@ -1196,12 +2141,16 @@ class XmrtoOrder(metaclass=OrderStateType):
         btc_amount=None,
         xmr_amount=None,
         connection=None,
+        store=None,
+        journal=None,
     ):
         self.url = url[:-1] if url.endswith("/") else url
         self.api = api
         self.xmrto_api = XmrtoApi(
             url=self.url, api=self.api, connection=connection
         )
+        self.store = store
+        self.journal = journal
         self.order = None
         self.order_status = None
         self.error = None
@@ -1274,6 +2223,10 @@ class XmrtoOrder(metaclass=OrderStateType):
             self.out_address = self.order.out_address
             if self.api == API_VERSIONS.v3:
                 self.uses_lightning = self.order.uses_lightning
+            if self.store is not None:
+                self.store.save(self)
+            if self.journal is not None:
+                self.journal.record_status(self)
 
     def get_order_status(self, uuid=None):
         if uuid is None:
@@ -1286,6 +2239,7 @@ class XmrtoOrder(metaclass=OrderStateType):
             url=self.url,
             api=self.api,
             connection=self.xmrto_api.get_connection().get_connection(),
+            journal=self.journal,
         )
         self.order_status.get_order_status(uuid=uuid)
         if self.order_status:
@@ -1301,6 +2255,8 @@ class XmrtoOrder(metaclass=OrderStateType):
                 self.uses_lightning = self.order.uses_lightning
 
             self.error = self.order_status.error
+            if self.store is not None and not self.error:
+                self.store.save(self)
 
     def _to_json(self):
         data = {}
@@ -1341,8 +2297,16 @@ class XmrtoLnOrder(XmrtoOrder):
         api=API_VERSION_DEFAULT,
         ln_invoice=None,
         connection=None,
+        store=None,
+        journal=None,
     ):
-        super().__init__(url=url, api=api, connection=connection)
+        super().__init__(
+            url=url,
+            api=api,
+            connection=connection,
+            store=store,
+            journal=journal,
+        )
         self.ln_invoice = ln_invoice
 
     def create_order(self, ln_invoice=None):
@@ -1364,6 +2328,27 @@ class XmrtoLnOrder(XmrtoOrder):
             self.state = self.order.state
             self.out_amount = self.order.out_amount
             self.out_address = self.order.out_address
+            if self.store is not None:
+                self.store.save(self)
+            if self.journal is not None:
+                self.journal.record_status(self)
+
+
+# The helpers below share one session per host, unless given a 'connection'.
+SESSIONS = SessionRegistry(
+    pool_connections=SESSION_POOL_CONNECTIONS,
+    pool_maxsize=SESSION_POOL_MAXSIZE,
+    max_retries=XmrtoConnection.MAX_RETRIES,
+    idle_timeout=SESSION_IDLE_TIMEOUT,
+    session_factory=XmrtoConnection.create_session,
+)
+atexit.register(SESSIONS.close)
+
+
+def shared_session(xmrto_url=XMRTO_URL):
+    """The process wide session for 'xmrto_url', keeping connections warm."""
+
+    return SESSIONS.get(xmrto_url, cert=CERTIFICATE)
 
 
 def create_order(
@@ -1374,6 +2359,8 @@ def create_order(
     xmr_amount=XMR_AMOUNT,
     connection=None,
 ):
+    if connection is None:
+        connection = shared_session(xmrto_url=xmrto_url)
     order = XmrtoOrder(
         url=xmrto_url,
         api=api_version,
@@ -1398,6 +2385,8 @@ def create_ln_order(
     ln_invoice=LN_INVOICE,
     connection=None,
 ):
+    if connection is None:
+        connection = shared_session(xmrto_url=xmrto_url)
     order = XmrtoLnOrder(
         url=xmrto_url,
         api=api_version,
@@ -1420,6 +2409,8 @@ def track_order(
     uuid=SECRET_KEY,
     connection=None,
 ):
+    if connection is None:
+        connection = shared_session(xmrto_url=xmrto_url)
     order_status = XmrtoOrderStatus(
         url=xmrto_url, api=api_version, uuid=uuid, connection=connection
     )
@@ -1427,6 +2418,232 @@ def track_order(
     return order_status
 
 
+def read_uuids(lines):
+    """Uuids from lines of text, one per line, or NDJSON with 'uuid'.
+
+    Blank lines and lines starting with '#' are skipped,
+    as are (logged) lines that are not valid JSON.
+    """
+
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                line = json.loads(line).get(OrderAttributesV3.uuid, None)
+            except (json.JSONDecodeError) as e:
+                logger.error(f"Line {number}: skipped, invalid JSON: {e}.")
+                continue
+            if not line:
+                continue
+        yield line
+
+
+def pooled_connection(xmrto_url=XMRTO_URL, size: int = TRACK_WORKERS):
+    """A session keeping up to 'size' connections to XMR.to open."""
+
+    # A connection per worker, instead of discarding the surplus ones.
+    return XmrtoConnection(url=xmrto_url, pool_maxsize=size).get_connection()
+
+
+def track_orders(
+    uuids,
+    xmrto_url=XMRTO_URL,
+    api_version=API_VERSION,
+    connection=None,
+    max_workers: int = TRACK_WORKERS,
+):
+    """Order status of many orders, fetched concurrently over one session.
+
+    Yields an `XmrtoOrderStatus` per uuid, in completion order.
+    'uuids' is consumed lazily, so it can be a file or stdin.
+    """
+
+    if connection is None:
+        connection = pooled_connection(xmrto_url=xmrto_url, size=max_workers)
+
+    def track_order_(uuid):
+        return track_order(
+            xmrto_url=xmrto_url,
+            api_version=api_version,
+            uuid=uuid,
+            connection=connection,
+        )
+
+    with futures.ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="XmrtoTrackOrders"
+    ) as executor:
+        pending = set()
+        for uuid in uuids:
+            pending.add(executor.submit(track_order_, uuid))
+            # Bounded, so not every uuid is read (and queued) up front.
+            if len(pending) >= 2 * max_workers:
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
+        for future in futures.as_completed(pending):
+            yield future.result()
+
+
+def _read_json_record(line):
+    """The JSON object of 'line', or why there is none."""
+
+    try:
+        record = json.loads(line)
+    except (json.JSONDecodeError) as e:
+        return str(e)
+    if not isinstance(record, dict):
+        return "Not a JSON object"
+    return record
+
+
+def read_order_rows(lines):
+    """Orders to create, from CSV (with header) or NDJSON lines.
+
+    Columns/keys: 'destination' and either 'btc_amount', 'xmr_amount'
+    or 'amount' and 'currency' (default 'BTC').
+    Yields dicts with 'line', 'destination', 'amount' and 'currency'.
+    Lines that are not valid JSON (or no JSON object) are logged
+    and yielded with an 'error', see `check_order_row()`.
+    """
+
+    # 'line' is the line number in the file, blank lines included.
+    numbered = enumerate(lines, start=1)
+    for number, first in numbered:
+        if first.strip():
+            break
+    else:
+        return
+    numbered = itertools.chain([(number, first)], numbered)
+
+    if first.lstrip().startswith("{"):
+        records = (
+            (line, _read_json_record(text))
+            for line, text in numbered
+            if text.strip()
+        )
+    else:
+        # 'line_num' counts the lines read, from the header on.
+        reader = csv.DictReader(text for _, text in numbered)
+        records = ((number - 1 + reader.line_num, record) for record in reader)
+
+    for line, record in records:
+        if not isinstance(record, dict):
+            logger.error(f"Line {line}: invalid JSON: {record}.")
+            yield {
+                "line": line,
+                "destination": None,
+                "amount": None,
+                "currency": None,
+                "error": {
+                    "error": "Invalid JSON.",
+                    "error_msg": f"Line {line}: {record}.",
+                },
+            }
+            continue
+        record = {
+            key.strip().lower(): str(value).strip()
+            for key, value in record.items()
+            if key and value is not None
+        }
+        currency = record.get("currency", "BTC").upper()
+        amount = record.get("amount", None)
+        if record.get("btc_amount", None):
+            amount, currency = record["btc_amount"], "BTC"
+        elif record.get("xmr_amount", None):
+            amount, currency = record["xmr_amount"], "XMR"
+        yield {
+            "line": line,
+            "destination": record.get(
+                "destination", record.get(OrderAttributesV3.out_address, None)
+            ),
+            "amount": amount,
+            "currency": currency,
+        }
+
+
+def check_order_row(row):
+    """Error for a row without destination or amount, None if complete."""
+
+    if row.get("error", None):
+        return row["error"]
+    if not row["destination"]:
+        return {
+            "error": "Argument missing.",
+            "error_msg": f"Line {row['line']}: no destination.",
+        }
+    if not row["amount"] or row["currency"] not in ("BTC", "XMR"):
+        return {
+            "error": "Argument missing.",
+            "error_msg": f"Line {row['line']}: no BTC or XMR amount.",
+        }
+    return None
+
+
+def create_orders(
+    rows,
+    xmrto_url=XMRTO_URL,
+    api_version=API_VERSION,
+    connection=None,
+    max_workers: int = CREATE_WORKERS,
+    rate_limiter: RateLimiter = None,
+    validator: OrderValidator = None,
+):
+    """Create many orders, concurrently and at most at the rate limit.
+
+    'rows' as returned by `read_order_rows()`, consumed lazily.
+    Every row is checked against the order parameters (fetched once
+    per 'OrderValidator.TTL') before anything is sent.
+    Yields an `OrderResult` per row, in completion order.
+    Unlike `create_order()`, no order status is queried.
+    """
+
+    if connection is None:
+        connection = pooled_connection(xmrto_url=xmrto_url, size=max_workers)
+    xmrto_api = XmrtoApi(
+        url=xmrto_url,
+        api=api_version,
+        connection=connection,
+        rate_limiter=rate_limiter or RateLimiter(),
+        validator=validator or OrderValidator(),
+    )
+    # Fetched once up front, not by every worker at once.
+    xmrto_api.validation_parameters()
+
+    def create_order_(row):
+        try:
+            order, error = xmrto_api.create_order(
+                out_address=row["destination"],
+                out_amount=row["amount"],
+                currency=row["currency"],
+            )
+        except (Exception) as e:
+            order, error = None, {"error": str(e)}
+        return OrderResult(row=row, order=order, error=error)
+
+    with futures.ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="XmrtoCreateOrders"
+    ) as executor:
+        pending = set()
+        for row in rows:
+            error = check_order_row(row=row)
+            if error:
+                yield OrderResult(row=row, order=None, error=error)
+                continue
+            pending.add(executor.submit(create_order_, row))
+            if len(pending) >= 2 * max_workers:
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
+        for future in futures.as_completed(pending):
+            yield future.result()
+
+
 def confirm_partial_payment(
     xmrto_url=XMRTO_URL,
     api_version=API_VERSION,
@@ -1460,8 +2677,13 @@ def order_check_price(
     btc_amount=BTC_AMOUNT,
     xmr_amount=XMR_AMOUNT,
     connection=None,
+    cache=None,
 ):
-    xmrto_api = XmrtoApi(url=xmrto_url, api=api_version, connection=connection)
+    if connection is None:
+        connection = shared_session(xmrto_url=xmrto_url)
+    xmrto_api = XmrtoApi(
+        url=xmrto_url, api=api_version, connection=connection, cache=cache
+    )
     return xmrto_api.order_check_price(
         btc_amount=btc_amount, xmr_amount=xmr_amount
     )
@@ -1472,53 +2694,425 @@ def order_check_ln_routes(
     api_version=API_VERSION,
     ln_invoice=LN_INVOICE,
     connection=None,
+    cache=None,
 ):
-    xmrto_api = XmrtoApi(url=xmrto_url, api=api_version, connection=connection)
+    if connection is None:
+        connection = shared_session(xmrto_url=xmrto_url)
+    xmrto_api = XmrtoApi(
+        url=xmrto_url, api=api_version, connection=connection, cache=cache
+    )
 
     return xmrto_api.order_check_ln_routes(ln_invoice=ln_invoice)
 
 
 def order_check_parameters(
-    xmrto_url=XMRTO_URL, api_version=API_VERSION, connection=None
+    xmrto_url=XMRTO_URL, api_version=API_VERSION, connection=None, cache=None
 ):
-    xmrto_api = XmrtoApi(url=xmrto_url, api=api_version, connection=connection)
+    if connection is None:
+        connection = shared_session(xmrto_url=xmrto_url)
+    xmrto_api = XmrtoApi(
+        url=xmrto_url, api=api_version, connection=connection, cache=cache
+    )
 
     return xmrto_api.order_check_parameters()
 
 
+def payment_uri(order, description: str = None):
+    """'monero:' URI to pay what is left of an order.
+
+    'order' is an `XmrtoOrderStatus`, `XmrtoOrder` or order status,
+    anything with 'payment_subaddress' and 'in_amount_remaining'.
+    """
+
+    if not order or not order.payment_subaddress:
+        return None
+    return monero_uri(
+        address=order.payment_subaddress,
+        amount=order.in_amount_remaining,
+        description=description,
+    )
+
+
+def render_qrcode(data=None, image_format=PNG, sink=None, path=None):
+    """Render the QR code for 'data' locally, without XMR.to.
+
+    Same parameters and result as `XmrtoApi.download_qrcode()`.
+    """
+
+    if not data:
+        error = {
+            "error": "Argument missing.",
+            "error_msg": "Expected argument '--data', see 'python xmrto-wrapper.py -h'.",
+        }
+        return None, error
+    try:
+        qrcode = render_image(data, image_format=image_format)
+    except (ValueError) as e:
+        return None, {"error": "Invalid data.", "error_msg": str(e)}
+    return XmrtoApi._write_qrcode(
+        url=None, qrcode=qrcode, sink=sink, path=path
+    )
+
+
+def _check_backend(backend, image_format):
+    if backend not in BACKENDS:
+        return {
+            "error": "Unknown backend.",
+            "error_msg": f"Expected one of {', '.join(BACKENDS)}.",
+        }
+    if backend == REMOTE and image_format != PNG:
+        return {
+            "error": "Unsupported format.",
+            "error_msg": "XMR.to only generates PNG, use the local backend.",
+        }
+    return None
+
+
 def generate_qrcode(
-    xmrto_url=XMRTO_URL, api_version=API_VERSION, data=QR_DATA, connection=None
+    xmrto_url=XMRTO_URL,
+    api_version=API_VERSION,
+    data=QR_DATA,
+    connection=None,
+    path=None,
+    cache: QrCodeCache = None,
+    backend=REMOTE,
+    image_format=PNG,
 ):
-    xmrto_api = XmrtoApi(url=xmrto_url, api=api_version, connection=connection)
+    """Store the QR code for 'data' in 'path', streamed as it arrives.
 
-    qrcode = xmrto_api.generate_qrcode(data=data)
-    if not qrcode:
+    With the 'local' backend, it is rendered without XMR.to, as PNG or SVG.
+    'path' defaults to 'qrcode.png' ('qrcode.svg').
+    """
+
+    if not data:
         print("No data provided to convert to qrcode.")
-    with open("qrcode.png", "wb") as qrcode_file:
-        for chunk in qrcode:
-            qrcode_file.write(chunk)
-    print("Stored qrcode in qrcode.png.")
+        return None
+    if path is None:
+        path = f"qrcode.{image_format}"
+
+    error = _check_backend(backend=backend, image_format=image_format)
+    if error:
+        qrcode = None
+    elif backend == LOCAL:
+        qrcode, error = render_qrcode(
+            data=data, image_format=image_format, path=path
+        )
+    else:
+        if connection is None:
+            connection = shared_session(xmrto_url=xmrto_url)
+        xmrto_api = XmrtoApi(
+            url=xmrto_url,
+            api=api_version,
+            connection=connection,
+            qrcode_cache=cache,
+        )
+        qrcode, error = xmrto_api.download_qrcode(data=data, path=path)
+    if error:
+        print(f"No qrcode: {json.dumps(error)}")
+        return None
+    print(f"Stored qrcode in {qrcode}.")
+    return qrcode
+
+
+def read_qrcode_data(lines):
+    """QR code data from lines of text, one per line, or NDJSON with 'data'.
+
+    Blank lines are skipped, as are (logged) lines that are not valid JSON.
+    """
+
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                line = json.loads(line).get("data", None)
+            except (json.JSONDecodeError) as e:
+                logger.error(f"Line {number}: skipped, invalid JSON: {e}.")
+                continue
+            if not line:
+                continue
+        yield line
+
+
+def generate_qrcodes(
+    data,
+    xmrto_url=XMRTO_URL,
+    api_version=API_VERSION,
+    connection=None,
+    max_workers: int = QRCODE_WORKERS,
+    cache: QrCodeCache = None,
+    directory=".",
+    backend=REMOTE,
+    image_format=PNG,
+):
+    """Store the QR codes for many 'data', fetching only the cache misses.
+
+    Every QR code is stored as '<directory>/<SHA256 of its data>.png'.
+    QR codes in the 'cache' are written right away, the others are
+    fetched concurrently, each distinct data once.
+    With the 'local' backend, all are rendered without XMR.to
+    (as '.png' or '.svg') and the 'cache' is not used.
+    'data' is consumed lazily, so it can be a file or stdin.
+    Yields a `QrCodeResult` per data, in completion order.
+    """
+
+    error = _check_backend(backend=backend, image_format=image_format)
+    if error:
+        raise ValueError(error["error_msg"])
+    if backend == LOCAL:
+        cache = None
+    elif connection is None:
+        connection = pooled_connection(xmrto_url=xmrto_url, size=max_workers)
+    xmrto_api = XmrtoApi(
+        url=xmrto_url,
+        api=api_version,
+        connection=connection,
+        qrcode_cache=cache,
+    )
+    os.makedirs(directory, exist_ok=True)
+
+    def path_(data_):
+        return os.path.join(
+            directory, f"{QrCodeCache.key(data_)}.{image_format}"
+        )
+
+    def generate_qrcode_(data_):
+        try:
+            if backend == LOCAL:
+                return render_qrcode(
+                    data=data_, image_format=image_format, path=path_(data_)
+                )
+            return xmrto_api.download_qrcode(data=data_, path=path_(data_))
+        except (Exception) as e:
+            return None, {"error": str(e)}
+
+    def results(future):
+        path, error = future.result()
+        data_list = pending.pop(future)
+        key = QrCodeCache.key(data_list[0])
+        if fetching.get(key, None) is future:
+            del fetching[key]
+        for data_ in data_list:
+            yield QrCodeResult(
+                data=data_, path=path, cached=False, error=error
+            )
+
+    with futures.ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="XmrtoQrCodes"
+    ) as executor:
+        # Future -> all data it is fetched for.
+        pending = {}
+        fetching = {}
+        for data_ in data:
+            if cache is not None and data_ in cache:
+                path, error = generate_qrcode_(data_)
+                yield QrCodeResult(
+                    data=data_, path=path, cached=error is None, error=error
+                )
+                continue
+
+            key = QrCodeCache.key(data_)
+            future = fetching.get(key, None)
+            if future is None or future.done():
+                future = executor.submit(generate_qrcode_, data_)
+                fetching[key] = future
+                pending[future] = []
+            pending[future].append(data_)
+            if len(pending) >= 2 * max_workers:
+                done, _ = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield from results(future)
+        for future in futures.as_completed(list(pending)):
+            yield from results(future)
+
+
+class PollingPolicy:
+    """Decide when to poll an order next, based on its state.
+
+    * Unpaid orders are polled less often the longer nothing changes,
+      but polled once more right after they are supposed to time out.
+    * Paid orders are polled according to the confirmations still needed,
+      often once only one confirmation is left.
+    * Orders in a final state are not polled anymore.
+    """
+
+    INTERVAL = 3
+    MAX_INTERVAL = 60
+    BACKOFF = 1.5
+    # Monero target block time.
+    BLOCK_TIME = 120
+    TIMEOUT_GRACE = 1
+
+    def __init__(
+        self,
+        interval: float = INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        backoff: float = BACKOFF,
+        block_time: float = BLOCK_TIME,
+        timeout_grace: float = TIMEOUT_GRACE,
+    ):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.block_time = block_time
+        self.timeout_grace = timeout_grace
+
+    def next_interval(
+        self,
+        state,
+        seconds_till_timeout=None,
+        in_confirmations_remaining=None,
+        unchanged: int = 0,
+    ):
+        """Seconds to wait before the next poll, None for final states.
+
+        :param unchanged: Number of consecutive polls without state change.
+        """
+
+        if state in XmrtoOrder.FINAL_STATES:
+            return None
+
+        interval = self.interval
+        if state in (XmrtoOrder.UNPAID, XmrtoOrder.UNDERPAID):
+            interval = min(
+                self.interval * self.backoff**unchanged, self.max_interval
+            )
+            if seconds_till_timeout is not None and seconds_till_timeout >= 0:
+                interval = min(
+                    interval, seconds_till_timeout + self.timeout_grace
+                )
+        elif state == XmrtoOrder.PAID_UNCONFIRMED:
+            if in_confirmations_remaining and in_confirmations_remaining > 1:
+                interval = min(
+                    (in_confirmations_remaining - 1) * self.block_time,
+                    self.max_interval,
+                )
+
+        return max(interval, 0)
 
+    def error_interval(self, errors: int = 1):
+        return min(self.interval * self.backoff**errors, self.max_interval)
+
+    def next_interval_for(self, order, unchanged: int = 0):
+        """Same as 'next_interval()', for an order (status) object."""
+
+        def value(name):
+            value_ = getattr(order, name, None)
+            order_status = getattr(order, "order_status", None)
+            if value_ is None and order_status is not None:
+                value_ = getattr(order_status, name, None)
+            return value_
+
+        return self.next_interval(
+            state=order.state,
+            seconds_till_timeout=value("seconds_till_timeout"),
+            in_confirmations_remaining=value("in_confirmations_remaining"),
+            unchanged=unchanged,
+        )
+
+
+def follow_order(order: None, follow=False, polling_policy=None, writer=None):
+    if polling_policy is None:
+        polling_policy = PollingPolicy()
+    if writer is None:
+        writer = OutputWriter()
 
-def follow_order(order: None, follow=False):
-    total = 1
     if order:
-        while not order.state == XmrtoOrder.BTC_SENT and not order.error:
-            print(order)
-            if order.state in (XmrtoOrder.UNPAID, XmrtoOrder.UNDERPAID):
+        unchanged = 0
+        while not order.error:
+            interval = polling_policy.next_interval_for(
+                order=order, unchanged=unchanged
+            )
+            if interval is None:
+                break
+            written = writer.write(order, key=order.uuid)
+            if (
+                written
+                and writer.is_text()
+                and order.state in (XmrtoOrder.UNPAID, XmrtoOrder.UNDERPAID)
+            ):
                 print("Pay:")
                 print(
                     f"    transfer {order.order_status.payment_subaddress} {order.order_status.in_amount_remaining}"
                 )
             if not follow:
                 return
-            if order.state == XmrtoOrder.TIMED_OUT:
-                total -= 1
-                if total == 0:
-                    break
-            time.sleep(3)
+            logger.debug(f"Next poll in {interval} seconds.")
+            time.sleep(interval)
+            previous_state = order.state
             order.get_order_status()
-        print(order)
+            unchanged = unchanged + 1 if order.state == previous_state else 0
+        writer.write(order, key=order.uuid)
+
+
+def stream_orders(
+    uuids,
+    xmrto_url=XMRTO_URL,
+    api_version=API_VERSION,
+    max_workers: int = TRACK_WORKERS,
+    follow=False,
+    writer=None,
+):
+    """Write the status of many orders, and their state changes if 'follow'.
+
+    Every line carries the uuid of its order.
+    """
+
+    if writer is None:
+        writer = OutputWriter(output=NDJSON)
+
+    def write(uuid, order_status, error):
+        data = {}
+        if order_status is not None:
+            data = status_to_json(order_status)
+        if error:
+            data["error"] = error
+        writer.write(data, key=uuid, extra={OrderAttributesV3.uuid: uuid})
+
+    states = {}
+    for order_status in track_orders(
+        uuids=uuids,
+        xmrto_url=xmrto_url,
+        api_version=api_version,
+        max_workers=max_workers,
+    ):
+        write(
+            uuid=order_status.uuid,
+            order_status=order_status.order_status,
+            error=order_status.error,
+        )
+        if (
+            follow
+            and not order_status.error
+            and order_status.state not in XmrtoOrder.FINAL_STATES
+        ):
+            states[order_status.uuid] = order_status.state
+
+    if not states:
+        return
+
+    from .xmrto_tracker import OrderTracker
+
+    tracker = OrderTracker(
+        url=xmrto_url,
+        api=api_version,
+        uuids=list(states),
+        max_workers=max_workers,
+    )
+    for transition in tracker:
+        # The first poll of the tracker, still in the state written above.
+        if transition.previous_state is None and (
+            transition.state == states[transition.uuid]
+        ):
+            continue
+        write(
+            uuid=transition.uuid,
+            order_status=transition.order_status,
+            error=transition.error,
+        )
 
 
 def logo_action(text=""):
@@ -1570,6 +3164,22 @@ def main():
         "--debug", action="store_true", help="Show debug info."
     )
     config.add_argument("--cert", nargs="?", help="Local certificate.")
+    config.add_argument(
+        "--output",
+        choices=OUTPUT_FORMATS,
+        help="Output format, 'ndjson' writes one JSON object per line.\n"
+        "Default: 'text', 'ndjson' for 'track-order --file'.",
+    )
+    config.add_argument(
+        "--changes-only",
+        action="store_true",
+        help="Only output what changed since the last output.",
+    )
+    config.add_argument(
+        "--diff",
+        action="store_true",
+        help="Add the changed fields to the output ('ndjson' only).",
+    )
 
     # subparsers
     subparsers = parser.add_subparsers(help="Sub commands.", dest="subcommand")
@@ -1601,6 +3211,41 @@ def main():
         "--follow", action="store_true", help="Keep tracking order."
     )
 
+    # Create orders
+    create_many = subparsers.add_parser(
+        "create-orders",
+        parents=[config],
+        help="Create many orders.",
+        description="Create many orders, from CSV or NDJSON.\n"
+        "CSV columns, NDJSON keys: 'destination' and 'btc_amount',\n"
+        "'xmr_amount' or 'amount' and 'currency'.",
+        formatter_class=argparse.RawTextHelpFormatter,
+        epilog=__complete__,
+        allow_abbrev=False,
+    )
+    create_many.add_argument(
+        "--file",
+        required=True,
+        help="File with the orders to create ('-' for stdin).",
+    )
+    create_many.add_argument(
+        "--parallel",
+        type=int,
+        default=CREATE_WORKERS,
+        help="Orders created at once.",
+    )
+    create_many.add_argument(
+        "--rate",
+        type=float,
+        default=RATE_LIMIT,
+        help="Orders created per second, at most.",
+    )
+    create_many.add_argument(
+        "--zero-conf",
+        action="store_true",
+        help="Only create orders processed with zero confirmations.",
+    )
+
     # Create lightning order
     create_ln = subparsers.add_parser(
         "create-ln-order",
@@ -1640,9 +3285,19 @@ def main():
     track_group.add_argument(
         "--key", help="Existing secret key of an existing order."
     )
+    track_group.add_argument(
+        "--file",
+        help="File with secret keys, one per line ('-' for stdin).",
+    )
     track.add_argument(
         "--follow", action="store_true", help="Keep tracking order."
     )
+    track.add_argument(
+        "--parallel",
+        type=int,
+        default=TRACK_WORKERS,
+        help="Orders tracked at once, with '--file'.",
+    )
 
     # Partial payment
     partial = subparsers.add_parser(
@@ -1688,6 +3343,15 @@ def main():
     price.add_argument(
         "--follow", action="store_true", help="Keep checking price."
     )
+    price.add_argument(
+        "--window",
+        type=float,
+        help="With '--follow', also output the OHLC of the last seconds.",
+    )
+    price.add_argument(
+        "--history-file",
+        help="With '--follow', keep the price history in this file.",
+    )
 
     # Check ightning routes
     routes = subparsers.add_parser(
@@ -1723,23 +3387,73 @@ def main():
     qrcode = subparsers.add_parser(
         "qrcode",
         parents=[config],
-        description="Create a qrcode, is stored in a file called 'qrcode.png'.",
+        description="Create a qrcode, is stored in a file called 'qrcode.png'.\n"
+        "With '--file', a qrcode per line is stored in '--directory',\n"
+        "named by the SHA256 of its data.\n"
+        "With '--secret-key', the qrcode to pay the order is created.",
         formatter_class=argparse.RawTextHelpFormatter,
         epilog=__complete__,
         allow_abbrev=False,
     )
-    qrcode.add_argument("--data", required=True, help=".")
+    qrcode_group = qrcode.add_mutually_exclusive_group(required=True)
+    qrcode_group.add_argument("--data", help="Data to encode.")
+    qrcode_group.add_argument(
+        "--file",
+        help="File with the data to encode, one per line ('-' for stdin).",
+    )
+    qrcode_group.add_argument(
+        "--secret-key",
+        help="Secret key of an order, to encode its 'monero:' payment URI.",
+    )
+    qrcode.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=REMOTE,
+        help="Let XMR.to generate the qrcode ('remote'),\n"
+        "or render it without XMR.to ('local').",
+    )
+    qrcode.add_argument(
+        "--format",
+        choices=IMAGE_FORMATS,
+        default=PNG,
+        help=f"Image format, '{SVG}' requires '--backend {LOCAL}'.",
+    )
+    qrcode.add_argument(
+        "--directory",
+        default=".",
+        help="Directory to store the qrcodes in, with '--file'.",
+    )
+    qrcode.add_argument(
+        "--parallel",
+        type=int,
+        default=QRCODE_WORKERS,
+        help="Qrcodes fetched at once, with '--file'.",
+    )
+    qrcode.add_argument(
+        "--cache-dir",
+        default=QRCODE_CACHE,
+        help="Keep qrcodes in this directory and reuse them.",
+    )
+    qrcode.add_argument(
+        "--cache-size",
+        type=int,
+        default=QrCodeCache.MAX_SIZE,
+        help="Bytes the cached qrcodes may take, at most.",
+    )
 
     args = parser.parse_args()
 
     cmd_create_order = False
     cmd_create_ln_order = False
+    cmd_create_orders = False
     cmd_track_order = False
+    cmd_track_orders = False
     cmd_partial_payment = False
     cmd_check_price = False
     cmd_check_ln_routes = False
     cmd_get_parameters = False
     cmd_create_qrcode = False
+    cmd_create_qrcodes = False
     follow = False
 
     debug = args.debug
@@ -1754,16 +3468,38 @@ def main():
     else:
         logger.setLevel(logging.INFO)
 
+    output = args.output or TEXT
+    if (
+        args.subcommand == "create-orders"
+        or (args.subcommand == "track-order" and args.file)
+        or (args.subcommand == "qrcode" and args.file)
+    ):
+        output = args.output or NDJSON
+    writer = OutputWriter(
+        output=output, changes_only=args.changes_only, diff=args.diff
+    )
+
     if args.subcommand == "create-order":
         cmd_create_order = True
         destination_address = args.destination
         btc_amount = args.btc_amount or args.btc
         xmr_amount = args.xmr_amount or args.xmr
         follow = args.follow
+    elif args.subcommand == "create-orders":
+        cmd_create_orders = True
+        orders_file = args.file
+        parallel = args.parallel
+        rate = args.rate
+        zero_conf = args.zero_conf
     elif args.subcommand == "create-ln-order":
         cmd_create_ln_order = True
         ln_invoice = args.invoice
         follow = args.follow
+    elif args.subcommand == "track-order" and args.file:
+        cmd_track_orders = True
+        secret_keys_file = args.file
+        parallel = args.parallel
+        follow = args.follow
     elif args.subcommand == "track-order":
         cmd_track_order = True
         secret_key = args.secret_key or args.secret or args.key
@@ -1777,15 +3513,36 @@ def main():
         btc_amount = args.btc_amount or args.btc
         xmr_amount = args.xmr_amount or args.xmr
         follow = args.follow
+        window = args.window
+        history_file = args.history_file
     elif args.subcommand == "check-ln-routes":
         cmd_check_ln_routes = True
         ln_invoice = args.invoice
     elif args.subcommand == "parameters":
         cmd_get_parameters = True
         follow = args.follow
+    elif args.subcommand == "qrcode" and args.file:
+        cmd_create_qrcodes = True
+        qr_data_file = args.file
+        qr_directory = args.directory
+        parallel = args.parallel
     elif args.subcommand == "qrcode":
         cmd_create_qrcode = True
         qr_data = args.data
+        secret_key = args.secret_key
+
+    if args.subcommand == "qrcode":
+        qr_backend = args.backend
+        qr_format = args.format
+        if qr_backend == REMOTE and qr_format != PNG:
+            print(f"'--format {qr_format}' requires '--backend {LOCAL}'.")
+            return 1
+
+    qrcode_cache = None
+    if args.subcommand == "qrcode" and args.cache_dir:
+        qrcode_cache = QrCodeCache(
+            directory=args.cache_dir, max_size=args.cache_size
+        )
 
     xmrto_url = args.url
     api_version = args.api
@@ -1793,6 +3550,14 @@ def main():
         print(f"API {api_version} is not supported.")
         return 1
 
+    if cmd_create_order:
+        error_msg = check_address(
+            address=destination_address, network=network_for_url(xmrto_url)
+        )
+        if error_msg:
+            print(error_msg)
+            return 1
+
     global CERTIFICATE
     if not CERTIFICATE:
         CERTIFICATE = args.cert
@@ -1817,11 +3582,40 @@ def main():
         logger.debug(f"Order: {order.uuid}")
 
         try:
-            follow_order(order=order, follow=follow)
+            follow_order(order=order, follow=follow, writer=writer)
         except KeyboardInterrupt:
             print("\nUser interrupted")
             if order:
-                print(order)
+                writer.write(order, key=order.uuid)
+    elif cmd_create_orders:
+        orders = sys.stdin
+        if orders_file != "-":
+            orders = open(orders_file, newline="")
+        errors = 0
+        try:
+            for result in create_orders(
+                rows=read_order_rows(orders),
+                xmrto_url=xmrto_url,
+                api_version=api_version,
+                max_workers=parallel,
+                rate_limiter=RateLimiter(rate=rate),
+                validator=OrderValidator(zero_conf=zero_conf),
+            ):
+                data = dict(result.row)
+                if result.order:
+                    data[OrderAttributesV3.uuid] = result.order.uuid
+                    data[OrderAttributesV3.state] = result.order.state
+                if result.error:
+                    errors += 1
+                    data["error"] = result.error
+                writer.write(data, key=result.row["line"])
+        except KeyboardInterrupt:
+            print("\nUser interrupted")
+        finally:
+            if orders is not sys.stdin:
+                orders.close()
+        if errors:
+            return 1
     elif cmd_create_ln_order:
         order = create_ln_order(
             xmrto_url=xmrto_url,
@@ -1831,11 +3625,11 @@ def main():
         )
 
         try:
-            follow_order(order=order, follow=follow)
+            follow_order(order=order, follow=follow, writer=writer)
         except KeyboardInterrupt:
             print("\nUser interrupted")
             if order:
-                print(order)
+                writer.write(order, key=order.uuid)
     elif cmd_track_order:
         order_status = track_order(
             xmrto_url=xmrto_url,
@@ -1845,11 +3639,29 @@ def main():
         )
 
         try:
-            follow_order(order=order_status, follow=follow)
+            follow_order(order=order_status, follow=follow, writer=writer)
         except KeyboardInterrupt:
             print("\nUser interrupted")
             if order_status:
-                print(order_status)
+                writer.write(order_status, key=order_status.uuid)
+    elif cmd_track_orders:
+        secret_keys = sys.stdin
+        if secret_keys_file != "-":
+            secret_keys = open(secret_keys_file)
+        try:
+            stream_orders(
+                uuids=read_uuids(secret_keys),
+                xmrto_url=xmrto_url,
+                api_version=api_version,
+                max_workers=parallel,
+                follow=follow,
+                writer=writer,
+            )
+        except KeyboardInterrupt:
+            print("\nUser interrupted")
+        finally:
+            if secret_keys is not sys.stdin:
+                secret_keys.close()
     elif cmd_partial_payment:
         order_status = confirm_partial_payment(
             xmrto_url=xmrto_url,
@@ -1858,14 +3670,17 @@ def main():
             connection=connection,
         )
         try:
-            follow_order(order=order_status, follow=follow)
+            follow_order(order=order_status, follow=follow, writer=writer)
         except KeyboardInterrupt:
             print("\nUser interrupted")
             if order_status:
-                print(order_status)
+                writer.write(order_status, key=order_status.uuid)
     elif cmd_check_price:
-        while True:
-            try:
+        history = PriceHistory()
+        if history_file and os.path.exists(history_file):
+            history = PriceHistory.load(history_file)
+        try:
+            while True:
                 price, error = order_check_price(
                     xmrto_url=xmrto_url,
                     api_version=api_version,
@@ -1875,17 +3690,24 @@ def main():
                 )
 
                 if error:
-                    print(error)
+                    writer.write(error)
                     return 1
 
-                print(price)
+                writer.write(price)
+                if not history.add_price(price):
+                    logger.warning("No rate, not added to the price history.")
+                if window:
+                    writer.write(history.ohlc(seconds=window), key="ohlc")
 
                 if not follow:
                     return
                 time.sleep(1)
-            except KeyboardInterrupt:
-                print("\nUser interrupted")
-                return
+        except KeyboardInterrupt:
+            print("\nUser interrupted")
+            return
+        finally:
+            if history_file and follow:
+                history.dump(history_file)
     elif cmd_check_ln_routes:
         routes, error = order_check_ln_routes(
             xmrto_url=xmrto_url,
@@ -1895,10 +3717,10 @@ def main():
         )
 
         if error:
-            print(error)
+            writer.write(error)
             return 1
 
-        print(routes)
+        writer.write(routes)
     elif cmd_get_parameters:
         while True:
             try:
@@ -1909,10 +3731,10 @@ def main():
                 )
 
                 if error:
-                    print(error)
+                    writer.write(error)
                     return 1
 
-                print(parameters)
+                writer.write(parameters)
 
                 if not follow:
                     return
@@ -1921,12 +3743,53 @@ def main():
                 print("\nUser interrupted")
                 return
     elif cmd_create_qrcode:
-        generate_qrcode(
+        if secret_key:
+            order_status = track_order(
+                xmrto_url=xmrto_url,
+                api_version=api_version,
+                uuid=secret_key,
+                connection=connection,
+            )
+            qr_data = payment_uri(order_status)
+            if not qr_data:
+                print(f"No payment subaddress for order '{secret_key}'.")
+                return 1
+        if not generate_qrcode(
             xmrto_url=xmrto_url,
             api_version=api_version,
             data=qr_data,
             connection=connection,
-        )
+            cache=qrcode_cache,
+            backend=qr_backend,
+            image_format=qr_format,
+        ):
+            return 1
+    elif cmd_create_qrcodes:
+        qr_data_lines = sys.stdin
+        if qr_data_file != "-":
+            qr_data_lines = open(qr_data_file)
+        errors = 0
+        try:
+            for result in generate_qrcodes(
+                data=read_qrcode_data(qr_data_lines),
+                xmrto_url=xmrto_url,
+                api_version=api_version,
+                max_workers=parallel,
+                cache=qrcode_cache,
+                directory=qr_directory,
+                backend=qr_backend,
+                image_format=qr_format,
+            ):
+                if result.error:
+                    errors += 1
+                writer.write(result._asdict(), key=result.data)
+        except KeyboardInterrupt:
+            print("\nUser interrupted")
+        finally:
+            if qr_data_lines is not sys.stdin:
+                qr_data_lines.close()
+        if errors:
+            return 1
 
 
 if __name__ == "__main__":